@@ -18,6 +18,24 @@ USAGE:
   python aliexpress_import.py "luxury bed frame" # Search specific keyword
   python aliexpress_import.py --category beds    # Search by category
   python aliexpress_import.py --bulk             # Bulk import all categories
+
+  Options (any mode):
+    --rps 5          Max API requests per second, shared by all workers
+    --workers 8      Concurrent search workers
+    --pages 3        Result pages to walk per keyword (default 1)
+    --offline        Serve searches only from the on-disk response cache
+    --no-cache       Bypass the response and curation caches for this run
+    --enrich         Fetch product details (colours, sizes, all images) in batches
+    --incremental    Only curate new/changed products since the last run
+    --probe-images   Check every image URL (header bytes only) and drop dead/tiny ones
+    --dedup-titles   Collapse listings whose raw titles are the same words reshuffled (MinHash/LSH)
+    --dedup-images   Collapse listings whose main image is the same photo (perceptual hash)
+    --metrics FILE   Write curation stats and per-stage timings (p50/p95/p99) as JSON
+    --record DIR     Save every live API response as a JSON fixture in DIR
+    --replay DIR     Serve API calls from fixtures in DIR (no network, no credentials)
+
+  Load testing without credentials: start `python mock_aliexpress_server.py`
+  and point the importer at it with AE_API_URL=http://127.0.0.1:8765/sync
 """
 
 import os
@@ -26,6 +44,10 @@ import json
 import time
 import hashlib
 import hmac
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -37,9 +59,18 @@ except ImportError:
     HAS_SDK = False
 
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+from disk_cache import DiskCache
+from catalog_io import write_catalog, write_product_workbook
+from catalog_state import CatalogState, content_hash
+
+try:
+    from premium_curator import PremiumCurator, QualityGates, change_key, featured_flag
+    HAS_CURATOR = True
+except ImportError:
+    HAS_CURATOR = False
 
 # ═══════════════════════════════════════════════════════════════
 # CONFIGURATION — Fill these in or set as environment variables
@@ -53,7 +84,65 @@ MARKUP_MULTIPLIER = 2.5  # 2.5x = 60% margin
 CURRENCY = "USD"  # AliExpress API returns USD, we convert to AED
 USD_TO_AED = 3.67
 
-# Output files
+# Search price window (USD). The lower bound is raised per category to the
+# curator's price floor, so the API never returns items we would reject.
+IMPORT_MIN_PRICE_AED = 100   # products at or below this selling price are dropped
+SEARCH_MAX_PRICE_USD = 2000
+
+# API quota — every worker draws from one shared token bucket
+REQUESTS_PER_SECOND = float(os.environ.get("AE_REQUESTS_PER_SECOND", "5"))
+IMPORT_WORKERS = int(os.environ.get("AE_IMPORT_WORKERS", "8"))
+
+# Curation processes (default: one per CPU core; 1 = in-process)
+CURATE_WORKERS = int(os.environ.get("AE_CURATE_WORKERS", "0")) or None
+
+# Caches and state live in tools/.cache, whichever directory the importer runs from
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+# Per-product curation results, reused while the product and the rules are unchanged
+CURATION_CACHE_PATH = os.environ.get("AE_CURATION_CACHE_PATH", str(CACHE_DIR / "curation.sqlite"))
+CURATION_CACHE_MAX_MB = int(os.environ.get("AE_CURATION_CACHE_MAX_MB", "128"))
+
+# --probe-images: concurrent header-only image checks, cached per URL
+IMAGE_PROBE_CACHE_PATH = os.environ.get("AE_IMAGE_PROBE_CACHE_PATH", str(CACHE_DIR / "image_probe.sqlite"))
+IMAGE_PROBE_CONNECTIONS = int(os.environ.get("AE_IMAGE_PROBE_CONNECTIONS", "16"))
+
+# Curation stats + per-stage timings as JSON (--metrics FILE), for dashboards
+CURATION_METRICS_PATH = os.environ.get("AE_CURATION_METRICS") or None
+
+# Perceptual image hashes for --dedup-images (dedup.py)
+IMAGE_HASH_CACHE_PATH = os.environ.get("AE_IMAGE_HASH_CACHE_PATH", str(CACHE_DIR / "image_hash.sqlite"))
+
+# HTTP transport — keep-alive pool sized for the workers, retry transient errors
+HTTP_POOL_SIZE = int(os.environ.get("AE_HTTP_POOL_SIZE", str(IMPORT_WORKERS)))
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_BASE = 0.5   # seconds, doubled per attempt
+HTTP_BACKOFF_MAX = 30
+
+# product.query returns at most 50 items per page
+MAX_PAGE_SIZE = 50
+# productdetail.get accepts at most 50 comma-separated product ids
+DETAIL_BATCH_SIZE = 50
+
+# On-disk response cache (re-runs replay searches instead of re-fetching)
+API_CACHE_PATH = os.environ.get("AE_CACHE_PATH", str(CACHE_DIR / "aliexpress.sqlite"))
+API_CACHE_MAX_MB = int(os.environ.get("AE_CACHE_MAX_MB", "256"))
+API_CACHE_TTLS = {  # seconds, per API method
+    "aliexpress.affiliate.product.query": 6 * 3600,
+    "aliexpress.affiliate.hotproduct.query": 3600,
+    "aliexpress.affiliate.productdetail.get": 24 * 3600,
+}
+OFFLINE = False
+
+# Per-product state for --incremental runs
+STATE_PATH = os.environ.get("AE_STATE_PATH", str(CACHE_DIR / "catalog_state.sqlite"))
+
+# API endpoint (override to point at mock_aliexpress_server.py)
+DEFAULT_API_URL = "https://api-sg.aliexpress.com/sync"
+API_URL = os.environ.get("AE_API_URL", DEFAULT_API_URL)
+
+# Output files (the catalog feeds generate_site.py; the spreadsheet is for review)
+CATALOG_OUTPUT = os.environ.get("AE_CATALOG_OUTPUT", "unicorn-furniture-catalog.jsonl")
 SPREADSHEET_OUTPUT = "unicorn-furniture-products.xlsx"
 SITE_OUTPUT = "unicorn-furniture-generated.jsx"
 
@@ -104,19 +193,111 @@ FURNITURE_SEARCHES = {
 }
 
 
+# ═══════════════════════════════════════════════════════════════
+# RATE LIMITING (token bucket shared across worker threads)
+# ═══════════════════════════════════════════════════════════════
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` acquisitions per second.
+    
+    `burst` is the bucket size. The default of 1 spaces calls evenly, so
+    no one-second window ever sees more than `rate` requests.
+    A rate of 0 (or less) disables limiting.
+    """
+    
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+    
+    def set_rate(self, rate):
+        """Change the rate in place, so clients holding this limiter follow."""
+        with self._lock:
+            self.rate = float(rate)
+
+
+RATE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+
+
+def configure_rate_limit(rps):
+    """Set the shared limiter's rate (e.g. from the --rps CLI option)."""
+    RATE_LIMITER.set_rate(rps)
+
+
 # ═══════════════════════════════════════════════════════════════
 # ALIEXPRESS API CLIENT (Direct API if SDK not available)
 # ═══════════════════════════════════════════════════════════════
 
+class TransientAPIError(Exception):
+    """A 5xx, 429 or throttling response that is worth retrying."""
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class OfflineCacheMiss(LookupError):
+    """Raised in offline mode when a request has no cached response."""
+
+
+class FixtureMissing(LookupError):
+    """Raised in replay mode when no recorded fixture matches a request."""
+
+
 class AliExpressClient:
-    """Direct API client for AliExpress Open Platform."""
+    """Direct API client for AliExpress Open Platform.
+    
+    One client holds a pooled keep-alive session, so reuse it across
+    calls (and threads) instead of building one per search.
     
-    BASE_URL = "https://api-sg.aliexpress.com/sync"
+    With a `cache` (DiskCache), successful responses are stored per
+    method + business params; `offline=True` serves only from it.
+    `record_dir` writes each live response to a JSON fixture and
+    `replay_dir` serves requests from such fixtures instead of the API.
+    """
     
-    def __init__(self, app_key, app_secret, tracking_id):
+    BASE_URL = API_URL
+    
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    # error_response codes the gateway uses when a quota is exhausted
+    THROTTLE_CODES = ("ApiCallLimit", "AppCallLimit", "SessionCallLimit", "isp.frequency-limited")
+    
+    def __init__(self, app_key, app_secret, tracking_id, rate_limiter=None,
+                 pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES,
+                 cache=None, offline=False, record_dir=None, replay_dir=None):
         self.app_key = app_key
         self.app_secret = app_secret
         self.tracking_id = tracking_id
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.cache = cache
+        self.offline = offline
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.replay_dir = Path(replay_dir) if replay_dir else None
+        if self.record_dir:
+            self.record_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def _sign(self, params):
         """Generate API signature."""
@@ -131,8 +312,62 @@ class AliExpressClient:
             hashlib.sha256
         ).hexdigest().upper()
     
+    @staticmethod
+    def cache_key(method, params):
+        """Cache key: method + canonical business params.
+        
+        System params (timestamp, sign, app_key…) are added later in
+        _request_once, so they never make otherwise-equal requests differ.
+        """
+        return DiskCache.make_key(method, {k: str(v) for k, v in params.items()})
+    
+    def fixture_path(self, directory, method, params):
+        """Fixture file for a request: <method>-<key prefix>.json."""
+        return directory / f"{method}-{self.cache_key(method, params)[:20]}.json"
+    
     def _request(self, method, params):
-        """Make API request."""
+        """Make API request (fixtures/cache first), retrying transient failures."""
+        if self.replay_dir:
+            path = self.fixture_path(self.replay_dir, method, params)
+            if not path.exists():
+                raise FixtureMissing(f"no fixture {path.name} for {method}")
+            return json.loads(path.read_text())["response"]
+        
+        key = self.cache_key(method, params) if self.cache is not None else None
+        if key:
+            cached = self.cache.get(key, allow_expired=self.offline)
+            if cached is not None:
+                return cached
+        if self.offline:
+            raise OfflineCacheMiss(f"{method} not in cache ({params.get('keywords', params.get('product_ids', ''))})")
+        
+        data = self._request_with_retries(method, params)
+        if isinstance(data, dict) and "error_response" not in data:
+            if key:
+                self.cache.set(key, data, ttl=API_CACHE_TTLS.get(method))
+            if self.record_dir:
+                path = self.fixture_path(self.record_dir, method, params)
+                path.write_text(json.dumps({"method": method, "params": params, "response": data}, indent=1))
+        return data
+    
+    def _request_with_retries(self, method, params):
+        """Send with exponential backoff + jitter on transient failures."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._request_once(method, params)
+            except (TransientAPIError, requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt)
+                delay = random.uniform(0, delay)  # full jitter
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after:
+                    delay = max(delay, retry_after)
+                print(f"    ↻ {method} retry {attempt + 1}/{self.max_retries} in {delay:.1f}s ({e})")
+                time.sleep(delay)
+    
+    def _request_once(self, method, params):
+        """Sign and send one request (timestamp and sign are fresh per attempt)."""
         sys_params = {
             "app_key": self.app_key,
             "method": method,
@@ -143,8 +378,21 @@ class AliExpressClient:
         all_params = {**sys_params, **params}
         all_params["sign"] = self._sign(all_params)
         
-        response = requests.get(self.BASE_URL, params=all_params, timeout=30)
-        return response.json()
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        response = self.session.get(self.BASE_URL, params=all_params, timeout=30)
+        
+        if response.status_code in self.RETRY_STATUS:
+            raise TransientAPIError(f"HTTP {response.status_code}",
+                                    _parse_retry_after(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        
+        data = response.json()
+        error = data.get("error_response") if isinstance(data, dict) else None
+        if error and any(c in str(error.get("code", "")) + str(error.get("sub_code", ""))
+                         for c in self.THROTTLE_CODES):
+            raise TransientAPIError(f"throttled: {error.get('code')}")
+        return data
     
     def search_products(self, keywords, category_id=None, page=1, page_size=20, 
                        sort="SALE_PRICE_ASC", min_price=None, max_price=None):
@@ -207,13 +455,119 @@ class AliExpressClient:
         )
 
 
-def search_with_sdk(keywords, page_size=20):
+def _parse_retry_after(value):
+    """Seconds from a Retry-After header (HTTP-date form is ignored)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def configure_cache(enabled=True, offline=False, path=API_CACHE_PATH):
+    """Set up the response cache used by get_client() (call before searching)."""
+    global OFFLINE
+    OFFLINE = offline
+    with _shared_lock:
+        _shared.pop("client", None)
+        _shared["cache"] = DiskCache(path, max_bytes=API_CACHE_MAX_MB * 1024 * 1024) if (enabled or offline) else None
+
+
+def configure_curation_cache(enabled=True, path=CURATION_CACHE_PATH):
+    """Set up the curation cache used by curate_products()."""
+    with _shared_lock:
+        _shared["curation_cache"] = DiskCache(path, max_bytes=CURATION_CACHE_MAX_MB * 1024 * 1024) if enabled else None
+
+
+def configure_image_probe(enabled=False, use_cache=True):
+    """Set up the image probe used by curate_products() (--probe-images)."""
+    probe = None
+    if enabled:
+        from image_probe import ImageProbe
+        cache = DiskCache(IMAGE_PROBE_CACHE_PATH) if use_cache else None
+        probe = ImageProbe(cache=cache, max_connections=IMAGE_PROBE_CONNECTIONS)
+    with _shared_lock:
+        _shared["image_probe"] = probe
+
+
+def configure_dedup(images=False, titles=False, use_cache=True):
+    """Set up the duplicate-listing filters used by curate_products() (--dedup-titles / --dedup-images)."""
+    dedupers = []
+    if titles:
+        from dedup import TitleDeduper
+        dedupers.append(TitleDeduper())
+    if images:
+        from dedup import ImageDeduper
+        cache = DiskCache(IMAGE_HASH_CACHE_PATH) if use_cache else None
+        dedupers.append(ImageDeduper(cache=cache, connections=IMAGE_PROBE_CONNECTIONS, workers=CURATE_WORKERS))
+    with _shared_lock:
+        _shared["dedupers"] = dedupers
+
+
+def configure_fixtures(record_dir=None, replay_dir=None):
+    """Record live responses to, or replay them from, a fixture directory."""
+    with _shared_lock:
+        _shared.pop("client", None)
+        _shared["record_dir"] = record_dir
+        _shared["replay_dir"] = replay_dir
+
+
+def get_client():
+    """Process-wide AliExpressClient, so every search shares one connection pool."""
+    with _shared_lock:
+        if "client" not in _shared:
+            _shared["client"] = AliExpressClient(APP_KEY, APP_SECRET, TRACKING_ID,
+                                                 rate_limiter=RATE_LIMITER,
+                                                 cache=_shared.get("cache"),
+                                                 offline=OFFLINE,
+                                                 record_dir=_shared.get("record_dir"),
+                                                 replay_dir=_shared.get("replay_dir"))
+        return _shared["client"]
+
+
+def use_sdk():
+    """The SDK talks to the live API itself and returns model objects,
+    so any run that caches, records, replays or works offline (and
+    mock-server runs) goes through the direct client; the SDK is only
+    used with --no-cache."""
+    return HAS_SDK and not (OFFLINE or _shared.get("cache") is not None or _shared.get("record_dir")
+                            or _shared.get("replay_dir") or API_URL != DEFAULT_API_URL)
+
+
+def get_sdk():
+    """Process-wide AliexpressApi instance (the SDK is only built once)."""
+    with _shared_lock:
+        if "sdk" not in _shared:
+            _shared["sdk"] = AliexpressApi(APP_KEY, APP_SECRET, ae_models.Language.EN,
+                                           ae_models.Currency.USD, TRACKING_ID)
+        return _shared["sdk"]
+
+
+def search_filters(category):
+    """Cheap quality gates expressed as search params for one category.
+    
+    min_price is the higher of the curator's MIN_COST_USD floor and the
+    cost below which the selling price would fall under IMPORT_MIN_PRICE_AED.
+    """
+    min_price = (IMPORT_MIN_PRICE_AED + 1) / (USD_TO_AED * MARKUP_MULTIPLIER)
+    if HAS_CURATOR:
+        min_price = max(min_price, QualityGates.min_cost_usd(category))
+    return {"min_price": round(min_price, 2), "max_price": SEARCH_MAX_PRICE_USD}
+
+
+def search_with_sdk(keywords, page_size=20, page=1, min_price=None, max_price=500):
     """Search using official Python SDK."""
-    aliexpress = AliexpressApi(APP_KEY, APP_SECRET, ae_models.Language.EN, ae_models.Currency.USD, TRACKING_ID)
+    aliexpress = get_sdk()
     try:
+        RATE_LIMITER.acquire()
         products = aliexpress.get_hotproducts(
             keywords=keywords,
-            max_sale_price=500,  # USD max price for furniture
+            min_sale_price=min_price,
+            max_sale_price=max_price,  # USD max price for furniture
+            page_no=page,
             page_size=page_size,
             ship_to_country=ae_models.Country.AE,
             sort=ae_models.SortBy.SALE_PRICE_ASC,
@@ -224,16 +578,17 @@ def search_with_sdk(keywords, page_size=20):
         return None
 
 
-def search_with_direct_api(keywords, page_size=20):
+def search_with_direct_api(keywords, page_size=20, page=1, min_price=50, max_price=SEARCH_MAX_PRICE_USD):
     """Search using direct API client."""
-    client = AliExpressClient(APP_KEY, APP_SECRET, TRACKING_ID)
+    client = get_client()
     try:
         result = client.search_products(
             keywords=keywords,
+            page=page,
             page_size=page_size,
             sort="SALE_PRICE_ASC",
-            min_price=50,   # Min $50 (furniture)
-            max_price=2000, # Max $2000
+            min_price=min_price,
+            max_price=max_price,
         )
         return result
     except Exception as e:
@@ -241,6 +596,85 @@ def search_with_direct_api(keywords, page_size=20):
         return None
 
 
+def fetch_raw_page(keywords, page=1, page_size=20, filters=None):
+    """Fetch one page of raw results → (raw_products, total_record_count).
+    
+    `filters` are extra search params (see search_filters).
+    total_record_count is 0 when the backend does not report it.
+    Cached and offline runs always use the direct client, which owns the cache.
+    """
+    filters = filters or {}
+    if use_sdk():
+        raw = search_with_sdk(keywords, page_size=page_size, page=page, **filters)
+        if raw and hasattr(raw, 'products'):
+            return list(raw.products or []), int(getattr(raw, "total_record_count", 0) or 0)
+        return [], 0
+    
+    result = search_with_direct_api(keywords, page_size=page_size, page=page, **filters)
+    if not result:
+        return [], 0
+    # Navigate nested response
+    resp = result.get("aliexpress_affiliate_product_query_response", {})
+    resp_result = resp.get("resp_result", {}).get("result", {})
+    raw_products = resp_result.get("products", {}).get("product", [])
+    return raw_products, int(resp_result.get("total_record_count", 0) or 0)
+
+
+def iter_raw_products(keywords, page_size=MAX_PAGE_SIZE, max_pages=None, filters=None):
+    """Lazily walk result pages for one keyword, yielding raw products.
+    
+    A page is only requested once the previous one has been consumed.
+    Stops after `max_pages`, on an empty page, or once the reported
+    total_record_count has been covered.
+    """
+    page = 1
+    while max_pages is None or page <= max_pages:
+        raw_products, total = fetch_raw_page(keywords, page=page, page_size=page_size, filters=filters)
+        if not raw_products:
+            return
+        yield from raw_products
+        if total and page * page_size >= total:
+            return
+        page += 1
+
+
+def iter_products(category, keywords, max_results=None, max_pages=None, page_size=MAX_PAGE_SIZE):
+    """Stream normalized products for one keyword (see extract_product_data).
+    
+    Stops when `max_results` products have been yielded, or when the
+    page walk ends. Memory use does not grow with the result-set size.
+    
+    The category's price floor is pushed into the search itself; titles
+    hitting the curator's reject keywords (which the API cannot exclude)
+    are dropped here, before dedup, enrichment or curation see them.
+    """
+    count = 0
+    filters = search_filters(category)
+    for raw_p in iter_raw_products(keywords, page_size=page_size, max_pages=max_pages, filters=filters):
+        try:
+            p = extract_product_data(raw_p, category)
+        except Exception as e:
+            print(f"    ⚠️ Skipped product: {e}")
+            continue
+        if p["price_aed"] <= IMPORT_MIN_PRICE_AED:  # Filter out cheap items
+            continue
+        if HAS_CURATOR and QualityGates.find_reject_keyword(p["name"].lower()):
+            continue
+        yield p
+        count += 1
+        if max_results and count >= max_results:
+            return
+
+
+def dedup_products(products):
+    """Drop repeated product_ids from a product stream, keeping the first."""
+    seen = set()
+    for p in products:
+        if p["product_id"] not in seen:
+            seen.add(p["product_id"])
+            yield p
+
+
 # ═══════════════════════════════════════════════════════════════
 # PRODUCT DATA EXTRACTION
 # ═══════════════════════════════════════════════════════════════
@@ -308,7 +742,7 @@ def extract_product_data(raw_product, category):
     
     # Collect all images (main + additional)
     all_images = [main_image] if main_image else []
-    for img in image_list[:3]:  # Max 3 additional
+    for img in image_list:
         if img and img not in all_images:
             all_images.append(img)
     
@@ -337,7 +771,7 @@ def extract_product_data(raw_product, category):
         "old_price_aed": old_price_aed,
         "badge": badge,
         "description": "",  # AliExpress titles are descriptive enough
-        "colors": "",  # Would need variant API call
+        "colors": "",  # Filled in by enrich_products (detail API)
         "sizes": "",
         "images": all_images,
         "cost_aed": cost_aed,
@@ -351,189 +785,301 @@ def extract_product_data(raw_product, category):
     }
 
 
+# ═══════════════════════════════════════════════════════════════
+# PRODUCT DETAIL ENRICHMENT (batched productdetail.get)
+# ═══════════════════════════════════════════════════════════════
+
+COLOR_PROPERTY_HINTS = ("color", "colour")
+SIZE_PROPERTY_HINTS = ("size", "dimension", "length", "width", "specification", "seat")
+
+
+def _field(raw, name, default=None):
+    """Read a field from an API dict or an SDK object."""
+    if isinstance(raw, dict):
+        return raw.get(name, default)
+    return getattr(raw, name, default)
+
+
+def _string_list(value):
+    """Normalise the API's {'string': [...]} / list / comma-string shapes."""
+    if isinstance(value, dict):
+        value = value.get("string", [])
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in (value or []) if v and str(v).strip()]
+
+
+def _sku_properties(node):
+    """Yield (property_name, value) pairs from anywhere in a detail record.
+    
+    Variant data is nested differently across API versions, so walk the
+    record and pick up every dict that names a SKU property.
+    """
+    if isinstance(node, dict):
+        name = node.get("sku_property_name")
+        value = node.get("property_value_definition_name") or node.get("sku_property_value")
+        if name and value:
+            yield str(name), str(value)
+        for child in node.values():
+            yield from _sku_properties(child)
+    elif isinstance(node, list):
+        for child in node:
+            yield from _sku_properties(child)
+
+
+def parse_detail(raw_detail):
+    """Extract {'images', 'colors', 'sizes'} from one productdetail record."""
+    images = []
+    main = _field(raw_detail, "product_main_image_url")
+    for img in ([main] if main else []) + _string_list(_field(raw_detail, "product_small_image_urls")):
+        if img not in images:
+            images.append(img)
+    
+    colors, sizes = [], []
+    if isinstance(raw_detail, dict):
+        for prop, value in _sku_properties(raw_detail):
+            prop = prop.lower()
+            if any(h in prop for h in COLOR_PROPERTY_HINTS):
+                target = colors
+            elif any(h in prop for h in SIZE_PROPERTY_HINTS):
+                target = sizes
+            else:
+                continue
+            if value not in target:
+                target.append(value)
+    
+    return {"images": images, "colors": colors, "sizes": sizes}
+
+
+def fetch_details(product_ids):
+    """One productdetail call for up to DETAIL_BATCH_SIZE ids → {id: raw_detail}."""
+    if use_sdk():
+        RATE_LIMITER.acquire()
+        raw_products = get_sdk().get_products_details(product_ids) or []
+    else:
+        result = get_client().get_product_detail(list(product_ids))
+        resp = result.get("aliexpress_affiliate_productdetail_get_response", {})
+        resp_result = resp.get("resp_result", {}).get("result", {})
+        raw_products = resp_result.get("products", {}).get("product", [])
+    return {str(_field(raw, "product_id", "")): raw for raw in raw_products}
+
+
+def enrich_products(products, batch_size=DETAIL_BATCH_SIZE, workers=None):
+    """Merge colours, sizes and full image sets from the detail API.
+    
+    Ids are collected from the whole run and fetched in batches of
+    `batch_size` (N/50 calls instead of N), several batches at a time on
+    the shared, rate-limited client. Products are updated in place; fields
+    a product already has (e.g. hand-entered colours) are kept.
+    """
+    by_id = {}
+    for p in products:
+        pid = str(p.get("product_id", "")).replace("AE-", "", 1)
+        if pid:
+            by_id.setdefault(pid, []).append(p)
+    ids = list(by_id)
+    if not ids:
+        return products
+    
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    workers = workers or IMPORT_WORKERS
+    print(f"🧩 Enriching {len(ids)} products in {len(batches)} detail batch(es)...")
+    
+    def fetch(batch):
+        try:
+            return fetch_details(batch)
+        except Exception as e:
+            print(f"    ⚠️ Detail batch failed ({len(batch)} ids): {e}")
+            return {}
+    
+    enriched = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+        for details in pool.map(fetch, batches):
+            for pid, raw_detail in details.items():
+                detail = parse_detail(raw_detail)
+                for p in by_id.get(pid, []):
+                    images = list(p.get("images") or [])
+                    for img in detail["images"]:
+                        if img not in images:
+                            images.append(img)
+                    p["images"] = images
+                    if detail["colors"] and not p.get("colors"):
+                        p["colors"] = ", ".join(detail["colors"])
+                    if detail["sizes"] and not p.get("sizes"):
+                        p["sizes"] = ", ".join(detail["sizes"])
+                    enriched += 1
+    
+    print(f"  ✅ Enriched {enriched}/{len(products)} products")
+    return products
+
+
 # ═══════════════════════════════════════════════════════════════
 # SPREADSHEET GENERATION
 # ═══════════════════════════════════════════════════════════════
 
 def products_to_spreadsheet(products, output_path):
-    """Write products to the Unicorn Furniture spreadsheet format."""
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Products"
-    
-    header_font = Font(bold=True, color="FFFFFF", size=11, name="Arial")
-    header_fill = PatternFill("solid", fgColor="1A1A1A")
-    data_font = Font(size=10, name="Arial")
-    thin_border = Border(
-        left=Side(style='thin', color='E0DCD5'),
-        right=Side(style='thin', color='E0DCD5'),
-        top=Side(style='thin', color='E0DCD5'),
-        bottom=Side(style='thin', color='E0DCD5')
-    )
-    
-    headers = [
-        "product_id", "name", "category", "subcategory", "price_aed",
-        "old_price_aed", "badge", "description", "colors", "sizes",
-        "image_url_1", "image_url_2", "image_url_3", "image_url_4",
-        "supplier", "supplier_sku", "cost_aed", "margin_%",
-        "stock_qty", "delivery_days", "featured", "active",
-        "ae_url", "ae_orders", "ae_rating"
-    ]
-    
-    for col, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = thin_border
-    
-    for row_idx, p in enumerate(products, 2):
-        images = p.get("images", [])
-        row_data = [
-            p.get("product_id", ""),
-            p.get("name", ""),
-            p.get("category", ""),
-            "",  # subcategory
-            p.get("price_aed", 0),
-            p.get("old_price_aed", ""),
-            p.get("badge", ""),
-            p.get("description", ""),
-            p.get("colors", ""),
-            p.get("sizes", ""),
-            images[0] if len(images) > 0 else "",
-            images[1] if len(images) > 1 else "",
-            images[2] if len(images) > 2 else "",
-            images[3] if len(images) > 3 else "",
-            "AliExpress",
-            p.get("product_id", ""),
-            p.get("cost_aed", 0),
-            "",  # margin formula
-            0,
-            p.get("delivery_days", 21),
-            p.get("featured", "NO"),
-            p.get("active", "YES"),
-            p.get("ae_url", ""),
-            p.get("ae_orders", 0),
-            p.get("ae_rating", ""),
-        ]
-        
-        for col_idx, val in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=val if val else "")
-            cell.font = data_font
-            cell.border = thin_border
-        
-        # Margin formula
-        ws.cell(row=row_idx, column=18, value=f'=ROUND((E{row_idx}-Q{row_idx})/E{row_idx}*100,1)')
-    
-    # Column widths
-    ws.column_dimensions['A'].width = 16
-    ws.column_dimensions['B'].width = 40
-    ws.column_dimensions['C'].width = 14
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['K'].width = 50
-    ws.column_dimensions['W'].width = 60
-    
-    ws.auto_filter.ref = f"A1:Y{len(products)+1}"
-    ws.freeze_panes = "A2"
-    
-    # Categories sheet
-    ws2 = wb.create_sheet("Categories")
-    cat_headers = ["category_id", "name", "display_order", "image_url", "description"]
-    for col, h in enumerate(cat_headers, 1):
-        cell = ws2.cell(row=1, column=col, value=h)
-        cell.font = header_font
-        cell.fill = header_fill
-    
-    cats = list(dict.fromkeys([p.get("category", "") for p in products]))
-    for i, cat in enumerate(cats, 2):
-        ws2.cell(row=i, column=1, value=cat)
-        ws2.cell(row=i, column=2, value=cat.replace("-", " ").title())
-        ws2.cell(row=i, column=3, value=i-1)
-    
-    wb.save(output_path)
-    print(f"📊 Spreadsheet saved: {output_path} ({len(products)} products)")
+    """Write products to the Unicorn Furniture spreadsheet format.
+    
+    `products` may be any iterable; rows are streamed (see catalog_io).
+    """
+    rows, _ = write_product_workbook(products, output_path, include_ae=True, default_delivery_days=21)
+    print(f"📊 Spreadsheet saved: {output_path} ({rows} products)")
 
 
 # ═══════════════════════════════════════════════════════════════
 # MAIN IMPORT PIPELINE
 # ═══════════════════════════════════════════════════════════════
 
-def import_category(category, keywords_list, max_per_keyword=10):
-    """Import products for one category."""
-    products = []
+def search_keyword(category, keywords, max_per_keyword=10, max_pages=1):
+    """Yield one keyword search's extracted products, page by page as they arrive.
     
-    for keywords in keywords_list:
-        print(f"  🔍 Searching: '{keywords}'...")
-        
-        if HAS_SDK:
-            raw = search_with_sdk(keywords, page_size=max_per_keyword)
-            if raw and hasattr(raw, 'products'):
-                raw_products = raw.products
-            else:
-                raw_products = []
-        else:
-            result = search_with_direct_api(keywords, page_size=max_per_keyword)
-            if result:
-                # Navigate nested response
-                resp = result.get("aliexpress_affiliate_product_query_response", {})
-                resp_result = resp.get("resp_result", {}).get("result", {})
-                raw_products = resp_result.get("products", {}).get("product", [])
-            else:
-                raw_products = []
-        
-        for raw_p in raw_products:
-            try:
-                p = extract_product_data(raw_p, category)
-                if p["price_aed"] > 100:  # Filter out cheap items
-                    products.append(p)
-            except Exception as e:
-                print(f"    ⚠️ Skipped product: {e}")
-        
-        print(f"    Found {len(raw_products)} products")
-        time.sleep(1)  # Rate limit respect
+    Safe to run from worker threads: the shared RATE_LIMITER paces the
+    actual API calls, so no fixed sleep is needed between searches.
+    """
+    count = 0
+    for p in iter_products(category, keywords, max_pages=max_pages,
+                           page_size=min(max_per_keyword, MAX_PAGE_SIZE)):
+        count += 1
+        yield p
+    print(f"  🔍 '{keywords}' → {count} products")
+
+
+_SEARCH_DONE = object()
+
+
+def iter_searches(jobs, max_per_keyword=10, workers=None, max_pages=1):
+    """Fan out (category, keywords) searches over a thread pool, yielding products.
     
-    return products
+    Each search feeds its own queue as its pages arrive. Products come
+    out job by job in `jobs` order, so the result (and the dedup that
+    follows) does not depend on thread timing, yet the first job's
+    products flow on while the later searches are still fetching.
+    """
+    workers = workers or IMPORT_WORKERS
+    queues = [queue.Queue() for _ in jobs]
+    
+    def run(out, category, keywords):
+        try:
+            for p in search_keyword(category, keywords, max_per_keyword, max_pages):
+                out.put(p)
+        except Exception as e:
+            out.put(e)
+        finally:
+            out.put(_SEARCH_DONE)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        for out, (cat, kw) in zip(queues, jobs):
+            pool.submit(run, out, cat, kw)
+        for out in queues:
+            while (item := out.get()) is not _SEARCH_DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+
+def import_category(category, keywords_list, max_per_keyword=10, workers=None, max_pages=1):
+    """Import products for one category."""
+    jobs = [(category, kw) for kw in keywords_list]
+    return list(iter_searches(jobs, max_per_keyword, workers, max_pages))
 
 
-def bulk_import():
+def bulk_import(workers=None, max_pages=1, enrich=False, incremental=False):
     """Import all furniture categories."""
-    all_products = []
-    
     print("🚀 UNICORN FURNITURE — AliExpress Bulk Import")
     print("=" * 50)
     
-    for category, keywords_list in FURNITURE_SEARCHES.items():
-        print(f"\n📦 Category: {category.upper()}")
-        products = import_category(category, keywords_list)
-        all_products.extend(products)
-        print(f"  ✅ Total for {category}: {len(products)} products")
+    jobs = [(cat, kw) for cat, keywords_list in FURNITURE_SEARCHES.items() for kw in keywords_list]
+    print(f"🔍 {len(jobs)} searches · {workers or IMPORT_WORKERS} workers · "
+          f"≤{RATE_LIMITER.rate:g} req/s")
+    started = time.monotonic()
     
-    # Remove duplicates by product_id
-    seen = set()
-    unique = []
-    for p in all_products:
-        if p["product_id"] not in seen:
-            seen.add(p["product_id"])
-            unique.append(p)
+    # Extraction and dedup run while the searches are still paging; enrichment
+    # and curation need the whole feed (detail batches, ranking, featured picks).
+    counts = dict.fromkeys(FURNITURE_SEARCHES, 0)
+    
+    def counted(products):
+        for p in products:
+            counts[p["category"]] += 1
+            yield p
+    
+    unique = list(dedup_products(counted(iter_searches(jobs, workers=workers, max_pages=max_pages))))
+    for category, count in counts.items():
+        print(f"  ✅ Total for {category}: {count} products")
+    print(f"  ⏱️ Searches finished in {time.monotonic() - started:.1f}s")
     
     print(f"\n{'=' * 50}")
     print(f"📊 Total raw products: {len(unique)}")
     
-    # ── PREMIUM CURATION ──
+    if incremental:
+        return incremental_update(unique, categories=list(FURNITURE_SEARCHES),
+                                  workers=workers, enrich=enrich)
+    if enrich:
+        enrich_products(unique, workers=workers)
+    return curate_products(unique)
+
+
+def curate_products(products, reserved_names=()):
+    """Run the premium curator (or the top-seller fallback without it)."""
     try:
         from premium_curator import PremiumCurator
         print(f"\n🦄 Running Premium Curation Engine...")
-        curator = PremiumCurator()
-        curated = curator.curate(unique)
+        curator = PremiumCurator(cache=_shared.get("curation_cache"), image_probe=_shared.get("image_probe"),
+                                 dedupers=_shared.get("dedupers", ()))
+        curated = curator.curate_parallel(products, workers=CURATE_WORKERS, reserved_names=reserved_names)
         curator.print_report()
+        if CURATION_METRICS_PATH:
+            curator.export_stats(CURATION_METRICS_PATH)
+            print(f"  📈 Curation metrics: {CURATION_METRICS_PATH}")
         return curated
     except ImportError:
         print("⚠️ premium_curator.py not found — skipping curation")
         # Fallback: mark top sellers as featured
-        for p in sorted(unique, key=lambda x: x.get("ae_orders", 0), reverse=True)[:10]:
+        for p in sorted(products, key=lambda x: x.get("ae_orders", 0), reverse=True)[:10]:
             p["featured"] = "YES"
-        return unique
+        return products
+
+
+def incremental_update(products, categories=None, workers=None, enrich=False):
+    """Curate only what changed since the last run; return the full catalog.
+    
+    Unchanged products keep their stored listing (no enrichment, no
+    re-curation); products missing from the searched categories are
+    retired. The returned list is the complete active catalog, because
+    the spreadsheet/site are full snapshots; with --dedup-* it is
+    collapsed as a whole, so duplicates are caught across runs too.
+    """
+    state = CatalogState(STATE_PATH)
+    delta = state.diff(products, categories=categories, key=change_key if HAS_CURATOR else content_hash)
+    print(f"🔁 Incremental: {delta.summary()}")
+    
+    todo = delta.new + delta.changed
+    curated = []
+    if todo:
+        if enrich:
+            enrich_products(todo, workers=workers)
+        todo_ids = {p["product_id"] for p in todo}
+        curated = curate_products(todo, reserved_names=state.listing_names(exclude=todo_ids))
+    if HAS_CURATOR:
+        # The curator tops up featured listings within the delta; store each
+        # listing's own flag and top up over the whole catalog instead
+        for c in curated:
+            c["featured"] = featured_flag(c["quality_score"], c["badge"])
+    state.commit(delta, curated)
+    
+    catalog = list(state.active_products())
+    state.close()
+    # --dedup-*: the curator only saw the delta, so a new listing that
+    # duplicates a stored one slips through; collapse the whole catalog
+    for deduper in _shared.get("dedupers", ()):
+        catalog, dropped = deduper.collapse(catalog)
+        if dropped:
+            print(f"  🧬 {len(dropped)} {deduper.label} duplicates collapsed across the catalog")
+    if HAS_CURATOR:
+        for c in catalog:
+            c["featured"] = featured_flag(c.get("quality_score", 0), c.get("badge", ""))
+        PremiumCurator.top_up_featured(catalog)
+    print(f"  ✅ Catalog: {len(catalog)} active listings ({len(curated)} re-curated)")
+    return catalog
 
 
 def search_import(query, category="uncategorized"):
@@ -588,20 +1134,74 @@ def check_credentials():
     return True
 
 
+def _pop_option(args, name, cast=str, default=None):
+    """Remove `--name value` from args and return the cast value."""
+    if name in args:
+        i = args.index(name)
+        if i + 1 < len(args):
+            value = args[i + 1]
+            del args[i:i + 2]
+            return cast(value)
+        del args[i]
+    return default
+
+
 def main():
-    if not check_credentials():
+    global CURATION_METRICS_PATH
+    args = sys.argv[1:]
+    offline = "--offline" in args
+    use_cache = "--no-cache" not in args
+    args = [a for a in args if a not in ("--offline", "--no-cache")]
+    record_dir = _pop_option(args, "--record")
+    replay_dir = _pop_option(args, "--replay")
+    
+    needs_live_api = not (offline or replay_dir or API_URL != DEFAULT_API_URL)
+    if needs_live_api and not check_credentials():
         sys.exit(0)
+    configure_cache(enabled=use_cache and not (replay_dir or record_dir), offline=offline)
+    configure_curation_cache(enabled=use_cache)
+    configure_fixtures(record_dir=record_dir, replay_dir=replay_dir)
+    if offline:
+        print("📴 Offline mode — serving searches from the response cache only")
+    if replay_dir:
+        print(f"📼 Replaying API fixtures from {replay_dir}")
+    elif record_dir:
+        print(f"⏺️ Recording API responses to {record_dir}")
+    if API_URL != DEFAULT_API_URL:
+        print(f"🧪 Using API endpoint {API_URL}")
+    
+    rps = _pop_option(args, "--rps", float)
+    if rps is not None:
+        configure_rate_limit(rps)
+    workers = _pop_option(args, "--workers", int)
+    pages = _pop_option(args, "--pages", int, default=1)
+    CURATION_METRICS_PATH = _pop_option(args, "--metrics", default=CURATION_METRICS_PATH)
+    enrich = "--enrich" in args
+    incremental = "--incremental" in args
+    spreadsheet = "--no-xlsx" not in args
+    configure_image_probe(enabled="--probe-images" in args, use_cache=use_cache)
+    configure_dedup(images="--dedup-images" in args, titles="--dedup-titles" in args, use_cache=use_cache)
+    args = [a for a in args if a not in ("--enrich", "--incremental", "--no-xlsx", "--probe-images",
+                                         "--dedup-images", "--dedup-titles")]
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--bulk":
-            products = bulk_import()
-        elif sys.argv[1] == "--category":
-            cat = sys.argv[2] if len(sys.argv) > 2 else "beds"
+    if args:
+        if args[0] == "--bulk":
+            products = bulk_import(workers=workers, max_pages=pages, enrich=enrich,
+                                   incremental=incremental)
+        elif args[0] == "--category":
+            cat = args[1] if len(args) > 1 else "beds"
             keywords = FURNITURE_SEARCHES.get(cat, [f"modern luxury {cat}"])
-            products = import_category(cat, keywords)
+            products = import_category(cat, keywords, workers=workers, max_pages=pages)
+            if incremental:
+                products = incremental_update(list(dedup_products(products)), categories=[cat],
+                                              workers=workers, enrich=enrich)
+            elif enrich:
+                enrich_products(products, workers=workers)
         else:
-            query = " ".join(sys.argv[1:])
+            query = " ".join(args)
             products = search_import(query)
+            if enrich:
+                enrich_products(products, workers=workers)
     else:
         # Interactive mode
         print("🦄 UNICORN FURNITURE — AliExpress Importer")
@@ -614,26 +1214,32 @@ def main():
         choice = input("Choose (1/2/3): ").strip()
         
         if choice == "1":
-            products = bulk_import()
+            products = bulk_import(workers=workers, max_pages=pages, enrich=enrich,
+                                   incremental=incremental)
         elif choice == "2":
             print(f"Categories: {', '.join(FURNITURE_SEARCHES.keys())}")
             cat = input("Category: ").strip()
             keywords = FURNITURE_SEARCHES.get(cat, [f"modern luxury {cat}"])
-            products = import_category(cat, keywords)
+            products = import_category(cat, keywords, workers=workers, max_pages=pages)
         else:
             query = input("Search: ").strip() or "luxury modern bed frame"
             products = search_import(query)
     
     if products:
-        # Save to spreadsheet
-        products_to_spreadsheet(products, SPREADSHEET_OUTPUT)
+        # Save the catalog (+ optional review spreadsheet)
+        count = write_catalog(products, CATALOG_OUTPUT)
+        print(f"🗂️ Catalog saved: {CATALOG_OUTPUT} ({count} products)")
+        if spreadsheet:
+            products_to_spreadsheet(products, SPREADSHEET_OUTPUT)
         
         # Auto-generate site
         print(f"\n🏗️ Generating site...")
-        os.system(f"python generate_site.py {SPREADSHEET_OUTPUT} {SITE_OUTPUT}")
+        os.system(f"python generate_site.py {CATALOG_OUTPUT} {SITE_OUTPUT}")
         
         print(f"\n🎉 DONE!")
-        print(f"  📊 Products: {SPREADSHEET_OUTPUT}")
+        print(f"  🗂️ Catalog: {CATALOG_OUTPUT}")
+        if spreadsheet:
+            print(f"  📊 Products: {SPREADSHEET_OUTPUT}")
         print(f"  🌐 Site: {SITE_OUTPUT}")
         print(f"  📦 {len(products)} products imported")
         print(f"\nNext: Push {SITE_OUTPUT} to your Vercel project")
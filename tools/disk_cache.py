@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — PERSISTENT DISK CACHE
+==========================================
+Small SQLite key/value store shared by the tools that want to survive
+between runs (API responses, curation results, image probes).
+
+  - JSON values, one row per key
+  - Per-entry TTL (expired rows are misses unless allow_expired=True)
+  - Size-bounded: least-recently-used rows are evicted past max_bytes
+  - Safe to share between threads in one process
+
+USAGE:
+  from disk_cache import DiskCache
+  cache = DiskCache(".cache/aliexpress.sqlite", max_bytes=256 * 1024**2)
+  key = DiskCache.make_key("aliexpress.affiliate.product.query", params)
+  data = cache.get(key)
+  if data is None:
+      data = fetch()
+      cache.set(key, data, ttl=6 * 3600)
+
+  # Batched (one transaction) for per-product caches
+  found = cache.get_many(keys)
+  cache.set_many({key: value, ...})
+"""
+
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SQL_BATCH = 500        # keys per IN (...) query in the *_many methods
+TOUCH_INTERVAL = 3600  # get_many() refreshes LRU timestamps at most hourly
+
+
+class DiskCache:
+    """SQLite-backed JSON cache with TTLs and LRU eviction."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires REAL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def make_key(*parts):
+        """Stable key from JSON-serializable parts (dict order does not matter)."""
+        blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def get(self, key, allow_expired=False):
+        """Cached value for key, or None on a miss (or an expired entry)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (not allow_expired and row[1] is not None and row[1] < now):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """Store value under key. ttl=None keeps it until evicted."""
+        blob = json.dumps(value, separators=(",", ":"), default=str)
+        now = time.time()
+        expires = now + ttl if ttl else None
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires, now),
+            )
+            self._bytes += len(blob) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def get_many(self, keys):
+        """{key: value} for the keys that hit, looked up in one transaction.
+
+        Hits are decoded in a single json.loads() call, and their LRU
+        timestamp is only rewritten when older than TOUCH_INTERVAL, so a
+        warm batch is mostly reads.
+        """
+        now = time.time()
+        found = {}
+        stale = []
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            self._db.execute("BEGIN")
+            for i in range(0, len(keys), SQL_BATCH):
+                batch = keys[i:i + SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                for key, value, expires, accessed in self._db.execute(
+                    f"SELECT key, value, expires, accessed FROM entries WHERE key IN ({marks})", batch
+                ):
+                    if expires is None or expires >= now:
+                        found[key] = value
+                        if accessed < now - TOUCH_INTERVAL:
+                            stale.append((now, key))
+            self._db.executemany("UPDATE entries SET accessed = ? WHERE key = ?", stale)
+            self._db.execute("COMMIT")
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        values = json.loads("[" + ",".join(found.values()) + "]")
+        return dict(zip(found, values))
+
+    def set_many(self, items, ttl=None):
+        """Store every (key, value) of a dict in one transaction."""
+        if not items:
+            return
+        now = time.time()
+        expires = now + ttl if ttl else None
+        rows = [(key, json.dumps(value, separators=(",", ":"), default=str)) for key, value in items.items()]
+        with self._lock:
+            self._db.execute("BEGIN")
+            keys = [key for key, _ in rows]
+            old = 0
+            for i in range(0, len(keys), SQL_BATCH):
+                batch = keys[i:i + SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                old += self._db.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({marks})", batch
+                ).fetchone()[0]
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                [(key, blob, len(blob), expires, now) for key, blob in rows],
+            )
+            self._db.execute("COMMIT")
+            self._bytes += sum(len(blob) for _, blob in rows) - old
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bytes -= row[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._bytes = 0
+
+    def _evict(self):
+        """Drop expired rows, then least-recently-used rows, down to 90% of max_bytes."""
+        self._db.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self._bytes <= target:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,))
+            freed += size
+            if self._bytes - freed <= target:
+                break
+        self._db.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._bytes -= freed
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -2,69 +2,183 @@
 """
 UNICORN FURNITURE — AUTOMATED SITE GENERATOR
 =============================================
-Reads product data from Excel spreadsheet → Generates complete React storefront.
+Reads product data from the catalog (or Excel spreadsheet) → Generates complete React storefront.
 
 Usage:
+  python generate_site.py unicorn-furniture-catalog.jsonl output/unicorn-furniture.jsx
   python generate_site.py unicorn-furniture-products.xlsx output/unicorn-furniture.jsx
 
+  .jsonl / .parquet catalogs (see catalog_io.py) are read directly;
+  .xlsx is still accepted for hand-edited spreadsheets.
+
 Pipeline:
   1. Fill spreadsheet with products + image URLs
   2. Run this script
   3. Push output to GitHub → Vercel auto-deploys
   4. Add new products → re-run → auto-updates
+
+Product data is not inlined in the JSX. It is written as JSON shards to
+public/data/ (SITE_DATA_DIR) and fetched by the storefront on demand:
+  manifest.json                 categories, page counts, shard folders (no-cache)
+  <category>/pos.<hash>/N.json  PAGE_SIZE products per page, catalog order
+  <category>/price.<hash>/N.json  same, cheapest first (read backwards for high → low)
+  featured.<hash>.json          home page picks
+  search.<hash>.json            id/name/price/image per product, loaded on first search
+Shard folders are named after their content, so a product change only
+invalidates its own category; the JSX itself only changes with this template.
 """
 
+import hashlib
 import json
+import os
+import re
 import sys
+from collections import Counter
+
 import pandas as pd
 from pathlib import Path
 
-def read_products(xlsx_path):
-    df = pd.read_excel(xlsx_path, sheet_name="Products", header=0, skiprows=[1])
-    df = df[df['active'].astype(str).str.upper() == 'YES'] if 'active' in df.columns else df
-    
+from catalog_io import is_catalog_path, read_catalog
+
+# Rust-backed xlsx parser, ~10x faster than openpyxl on large sheets
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # pandas default (openpyxl)
+
+# The storefront's public/ folder, found from this script rather than
+# the current directory
+PUBLIC_DIR = Path(__file__).resolve().parent.parent / "public"
+
+# Written by image_pipeline.py; when present, product images are served
+# locally as responsive WebP/AVIF instead of hot-linked supplier files.
+IMAGE_MANIFEST = os.environ.get("SITE_IMAGE_MANIFEST", str(PUBLIC_DIR / "products" / "manifest.json"))
+DEFAULT_IMAGE_WIDTH = 640   # <img src> for browsers without srcset support
+
+# Lazily loaded product data (see build_shards)
+DATA_DIR = os.environ.get("SITE_DATA_DIR", str(PUBLIC_DIR / "data"))
+DATA_URL = "/data/"         # where DATA_DIR is served from
+PAGE_SIZE = 48              # products per shard page (and per "Load more")
+FEATURED_LIMIT = 24         # featured products shown on the home page
+
+def read_catalog_products(catalog_path):
+    """Storefront products from a .jsonl/.parquet catalog (same shape as the xlsx reader)."""
     products = []
-    for _, row in df.iterrows():
-        images = []
-        for i in range(1, 5):
-            col = f'image_url_{i}'
-            if col in row and pd.notna(row[col]) and str(row[col]).startswith('http'):
-                images.append(str(row[col]))
-        
-        colors = [c.strip() for c in str(row.get('colors', '')).split(',') if c.strip()] if pd.notna(row.get('colors')) else []
-        sizes = [s.strip() for s in str(row.get('sizes', '')).split(',') if s.strip()] if pd.notna(row.get('sizes')) else []
-        
+    for rec in read_catalog(catalog_path):
+        if str(rec.get('active') or 'YES').upper() != 'YES':
+            continue
         products.append({
-            'id': str(row.get('product_id', f'P{len(products)+1}')),
-            'name': str(row.get('name', 'Untitled')),
-            'category': str(row.get('category', 'uncategorized')).lower().replace(' & ', '-').replace(' ', '-'),
-            'price': int(row.get('price_aed', 0)),
-            'oldPrice': int(row['old_price_aed']) if pd.notna(row.get('old_price_aed')) and row.get('old_price_aed') else None,
-            'badge': str(row.get('badge', '')) if pd.notna(row.get('badge')) else None,
-            'description': str(row.get('description', '')) if pd.notna(row.get('description')) else '',
-            'colors': colors,
-            'sizes': sizes,
-            'images': images,
-            'featured': str(row.get('featured', 'NO')).upper() == 'YES',
-            'deliveryDays': int(row.get('delivery_days', 14)) if pd.notna(row.get('delivery_days')) else 14,
+            'id': str(rec.get('product_id') or f'P{len(products)+1}'),
+            'name': str(rec.get('name') or 'Untitled'),
+            'category': str(rec.get('category') or 'uncategorized').lower().replace(' & ', '-').replace(' ', '-'),
+            'price': int(rec.get('price_aed') or 0),
+            'oldPrice': int(rec['old_price_aed']) if rec.get('old_price_aed') else None,
+            'badge': str(rec['badge']) if rec.get('badge') else None,
+            'description': str(rec.get('description') or ''),
+            'colors': [c.strip() for c in str(rec.get('colors') or '').split(',') if c.strip()],
+            'sizes': [s.strip() for s in str(rec.get('sizes') or '').split(',') if s.strip()],
+            'images': [str(i) for i in (rec.get('images') or []) if str(i).startswith('http')][:4],
+            'featured': str(rec.get('featured') or 'NO').upper() == 'YES',
+            'deliveryDays': int(rec.get('delivery_days') or 14),
         })
-    
     return products
 
+PRODUCT_COLUMNS = [
+    'product_id', 'name', 'category', 'price_aed', 'old_price_aed', 'badge',
+    'description', 'colors', 'sizes', 'image_url_1', 'image_url_2',
+    'image_url_3', 'image_url_4', 'delivery_days', 'featured', 'active',
+]
+TEXT_COLUMNS = {c: str for c in PRODUCT_COLUMNS if c not in ('price_aed', 'old_price_aed', 'delivery_days')}
+CATEGORY_COLUMNS = ['category_id', 'name', 'image_url', 'description']
+
+def _column(df, name, default):
+    """Column `name` with empty cells set to `default` (all `default` if the sheet lacks it)."""
+    if name not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[name] if default is None else df[name].fillna(default)
+
+def _excel(source):
+    return source if isinstance(source, pd.ExcelFile) else pd.ExcelFile(source, engine=EXCEL_ENGINE)
+
+def _split_list(col):
+    """'a, b,,c' → ['a', 'b', 'c'] for a whole column; missing cells → []."""
+    parts = col.where(col.notna(), '').astype(str).str.split(',')
+    return [[x.strip() for x in items if x.strip()] for items in parts]
+
+def read_products(xlsx_path):
+    """Active products from a catalog or the spreadsheet's Products sheet.
+
+    `xlsx_path` may also be an open pd.ExcelFile (see read_workbook).
+    Parsing is column-wise; only the storefront columns are loaded.
+    """
+    if is_catalog_path(xlsx_path):
+        return read_catalog_products(xlsx_path)
+    df = pd.read_excel(_excel(xlsx_path), sheet_name="Products", header=0, skiprows=[1],
+                       usecols=lambda c: c in PRODUCT_COLUMNS, dtype=TEXT_COLUMNS)
+    if 'active' in df.columns:
+        df = df[df['active'].astype(str).str.upper() == 'YES']
+    df = df.reset_index(drop=True)
+    n = len(df)
+
+    image_cols = [c for c in PRODUCT_COLUMNS if c.startswith('image_url_') and c in df.columns]
+    images = df[image_cols].astype(object)
+    images = images.where(images.apply(lambda s: s.str.startswith('http', na=False)))
+    images = [[u for u in row if isinstance(u, str)] for row in images.to_numpy()]
+
+    ids = _column(df, 'product_id', pd.Series([f'P{i}' for i in range(1, n + 1)])).astype(str)
+    category = _column(df, 'category', 'uncategorized').astype(str).str.lower()
+    category = category.str.replace(' & ', '-', regex=False).str.replace(' ', '-', regex=False)
+    price = pd.to_numeric(_column(df, 'price_aed', 0), errors='coerce').fillna(0).astype('int64')
+    old = pd.to_numeric(_column(df, 'old_price_aed', None), errors='coerce')
+    old = old.where(old.notna() & (old != 0))
+    badge = _column(df, 'badge', None)
+    description = _column(df, 'description', None)
+    delivery = pd.to_numeric(_column(df, 'delivery_days', None), errors='coerce').fillna(14).astype('int64')
+    featured = _column(df, 'featured', 'NO').astype(str).str.upper() == 'YES'
+
+    columns = {
+        'id': ids.tolist(),
+        'name': _column(df, 'name', 'Untitled').astype(str).tolist(),
+        'category': category.tolist(),
+        'price': price.tolist(),
+        'oldPrice': [int(v) if v == v else None for v in old.tolist()],
+        'badge': badge.astype(object).where(badge.notna(), None).tolist(),
+        'description': description.where(description.notna(), '').astype(str).tolist(),
+        'colors': _split_list(_column(df, 'colors', None)),
+        'sizes': _split_list(_column(df, 'sizes', None)),
+        'images': images,
+        'featured': featured.tolist(),
+        'deliveryDays': delivery.tolist(),
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
 def read_categories(xlsx_path):
+    if is_catalog_path(xlsx_path):
+        return []  # derived from the products by prepare_categories
     try:
-        df = pd.read_excel(xlsx_path, sheet_name="Categories")
-        cats = []
-        for _, row in df.iterrows():
-            cats.append({
-                'id': str(row.get('category_id', '')),
-                'name': str(row.get('name', '')),
-                'image': str(row.get('image_url', '')) if pd.notna(row.get('image_url')) else '',
-                'description': str(row.get('description', '')) if pd.notna(row.get('description')) else '',
-            })
-        return cats
+        df = pd.read_excel(_excel(xlsx_path), sheet_name="Categories",
+                           usecols=lambda c: c in CATEGORY_COLUMNS, dtype=str)
     except Exception:
         return []
+    image = _column(df, 'image_url', None)
+    description = _column(df, 'description', None)
+    columns = {
+        'id': _column(df, 'category_id', '').astype(str).tolist(),
+        'name': _column(df, 'name', '').astype(str).tolist(),
+        'image': image.where(image.notna(), '').astype(str).tolist(),
+        'description': description.where(description.notna(), '').astype(str).tolist(),
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+def read_workbook(path):
+    """(products, categories), opening a spreadsheet only once for both sheets."""
+    if is_catalog_path(path):
+        return read_products(path), read_categories(path)
+    with pd.ExcelFile(path, engine=EXCEL_ENGINE) as xls:
+        return read_products(xls), read_categories(xls)
 
 # Fallback images by category for products without images
 FALLBACK_IMAGES = {
@@ -101,51 +215,281 @@ CATEGORY_IMAGES = {
     'nightstands': 'https://images.unsplash.com/photo-1551298370-9d3d53740c72?w=800&q=80',
 }
 
-def generate_jsx(products, categories, whatsapp="971526455121"):
-    """Generate complete React JSX from product data."""
-    
-    # Assign fallback images
+def load_image_manifest(path=IMAGE_MANIFEST):
+    """image_pipeline.py manifest, or None when the images are not self-hosted."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def apply_image_manifest(products, manifest):
+    """Point product images at the local copies and add per-image srcsets.
+
+    `srcsets` runs parallel to `images`: {"webp": "...", "avif": "..."} for
+    self-hosted images, null for URLs the pipeline has not processed.
+    """
+    prefix = manifest.get("url_prefix", "/products/")
+    local = manifest["images"]
+    hits = 0
+    for p in products:
+        images, srcsets = [], []
+        for url in p['images']:
+            entry = local.get(url)
+            if not entry:
+                images.append(url)
+                srcsets.append(None)
+                continue
+            hits += 1
+            webp = entry["webp"]
+            default = next((name for w, name in webp if w >= DEFAULT_IMAGE_WIDTH), webp[-1][1])
+            images.append(prefix + default)
+            srcsets.append({fmt: ", ".join(f"{prefix}{name} {w}w" for w, name in entry[fmt])
+                            for fmt in ("avif", "webp") if fmt in entry})
+        p['images'] = images
+        p['srcsets'] = srcsets
+    return hits
+
+
+def prepare_categories(products, categories):
+    """Storefront categories with counts; fills product fallback images.
+
+    Categories come from the spreadsheet when given, otherwise from the
+    products; categories of products that the sheet does not list are
+    appended, so every active product can be browsed.
+    """
     for p in products:
         if not p['images']:
             fallback = FALLBACK_IMAGES.get(p['category'], 'https://images.unsplash.com/photo-1618221195710-dd6b41faaea6?w=600&q=80')
             p['images'] = [fallback]
-    
-    # Build category list from products if not provided
-    if not categories:
-        cat_ids = list(dict.fromkeys([p['category'] for p in products]))
-        categories = [{'id': cid, 'name': cid.replace('-', ' ').title(), 'image': CATEGORY_IMAGES.get(cid, ''), 'description': ''} for cid in cat_ids]
-    
-    # Count products per category
+
+    counts = Counter(p['category'] for p in products)
+    categories = [dict(c) for c in categories or []]
+    listed = {c['id'] for c in categories}
+    categories += [{'id': cid, 'name': cid.replace('-', ' ').title(), 'image': CATEGORY_IMAGES.get(cid, ''), 'description': ''}
+                   for cid in counts if cid not in listed]
     for cat in categories:
-        cat['count'] = len([p for p in products if p['category'] == cat['id']])
+        cat['count'] = counts.get(cat['id'], 0)
         if not cat.get('image'):
             cat['image'] = CATEGORY_IMAGES.get(cat['id'], '')
-    
-    # Filter to categories that have products
-    categories = [c for c in categories if c['count'] > 0]
-    
-    products_json = json.dumps(products, indent=2)
-    categories_json = json.dumps(categories, indent=2)
-    
+    return [c for c in categories if c['count'] > 0]
+
+
+def _compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:10]
+
+
+def _folder_name(category_id):
+    return re.sub(r'[^a-z0-9_-]+', '-', str(category_id).lower()).strip('-') or 'uncategorized'
+
+
+def build_shards(products, categories, page_size=PAGE_SIZE):
+    """{relative path: JSON text} for every data file, manifest.json included.
+
+    Products get a `pos` (catalog position), which the storefront uses to
+    merge categories back into catalog order for the "All" view.
+    """
+    categories = prepare_categories(products, categories)
+    by_category = {}
+    for pos, p in enumerate(products):
+        by_category.setdefault(p['category'], []).append(dict(p, pos=pos))
+
+    files, search, folders = {}, [], set()
+    for cat in categories:
+        rows = by_category[cat['id']]
+        folder = _folder_name(cat['id'])
+        while folder in folders:
+            folder += '-'
+        folders.add(folder)
+        for order, ordered in (('pos', rows), ('price', sorted(rows, key=lambda r: (r['price'], r['pos'])))):
+            pages = [_compact(ordered[i:i + page_size]) for i in range(0, len(ordered), page_size)]
+            path = f"{folder}/{order}.{_digest(''.join(pages))}"
+            for n, text in enumerate(pages):
+                files[f"{path}/{n}.json"] = text
+            cat[order] = path
+        cat['pages'] = -(-len(rows) // page_size)
+        # column-wise, in catalog order: a product's pos page is its index // page_size
+        columns = {'category': cat['id'], 'id': [r['id'] for r in rows], 'name': [r['name'] for r in rows],
+                   'price': [r['price'] for r in rows], 'image': [r['images'][0] for r in rows]}
+        if any(r.get('srcsets') for r in rows):
+            columns['srcset'] = [(r.get('srcsets') or [None])[0] for r in rows]
+        search.append(columns)
+
+    named = {}
+    for key, value in (('featured', [dict(p, pos=i) for i, p in enumerate(products) if p['featured']][:FEATURED_LIMIT]),
+                       ('search', search)):
+        text = _compact(value)
+        named[key] = f"{key}.{_digest(text)}.json"
+        files[named[key]] = text
+
+    manifest = {'pageSize': page_size, 'total': len(products), 'categories': categories, **named}
+    files['manifest.json'] = json.dumps(manifest, ensure_ascii=False, indent=1) + "\n"
+    return files
+
+
+# Files build_shards() can produce; write_shards() never deletes anything else
+SHARD_NAME = re.compile(r'manifest\.json|(featured|search)\.[0-9a-f]+\.json'
+                        r'|[a-z0-9_-]+/(pos|price)\.[0-9a-f]+/\d+\.json')
+
+
+def write_shards(files, out_dir=DATA_DIR):
+    """Write build_shards() output; remove shards of earlier builds.
+
+    Returns (written, unchanged, removed). Only files named like this
+    generator's own (SHARD_NAME) are removed, so other files in out_dir
+    (images, favicon ...) are left alone.
+    """
+    out = Path(out_dir)
+    written = 0
+    for rel, text in files.items():
+        path = out / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written += write_if_changed(path, text)
+    removed = 0
+    emptied = set()
+    for path in sorted(out.rglob("*.json")):
+        rel = path.relative_to(out).as_posix()
+        if rel not in files and SHARD_NAME.fullmatch(rel) and path.is_file():
+            path.unlink()
+            removed += 1
+            emptied.update(p for p in path.parents if out in p.parents)
+    for folder in sorted(emptied, key=lambda p: len(p.parts), reverse=True):
+        if not any(folder.iterdir()):
+            folder.rmdir()
+    return written, len(files) - written, removed
+
+
+def generate_jsx(whatsapp="971526455121", data_url=DATA_URL):
+    """Generate the React storefront; product data is fetched from data_url (see build_shards)."""
     return f'''// ═══════════════════════════════════════════════════════════════
 // UNICORN FURNITURE — Auto-generated from product spreadsheet
 // Generated by: generate_site.py
-// Products: {len(products)} | Categories: {len(categories)}
+// Product data: {data_url}manifest.json + shards (fetched on demand)
 // ═══════════════════════════════════════════════════════════════
 
 import {{ useState, useEffect, useRef }} from "react";
 
 const WHATSAPP = "{whatsapp}";
-const PRODUCTS = {products_json};
-const CATEGORIES = {categories_json};
+const DATA_URL = "{data_url}";
+
+/* ─── Product data: JSON shards from generate_site.py, fetched on demand ─── */
+const shards = new Map();   // path → Promise of its rows
+const known = new Map();    // product id → product, from every page fetched so far
+let manifestPromise = null;
+let manifestValue = null;
+let searchPromise = null;
+
+function loadManifest() {{
+  if (!manifestPromise) {{
+    manifestPromise = fetch(DATA_URL + "manifest.json", {{ cache: "no-cache" }})
+      .then(r => r.json())
+      .then(m => (manifestValue = m))
+      .catch(e => {{ manifestPromise = null; throw e; }});
+  }}
+  return manifestPromise;
+}}
+
+function loadShard(path, products = true) {{
+  if (!shards.has(path)) {{
+    shards.set(path, fetch(DATA_URL + path)
+      .then(r => {{ if (!r.ok) throw new Error(`${{r.status}} ${{path}}`); return r.json(); }})
+      .then(rows => {{ if (products) rows.forEach(p => known.set(p.id, p)); return rows; }})
+      .catch(e => {{ shards.delete(path); throw e; }}));
+  }}
+  return shards.get(path);
+}}
+
+function useManifest() {{
+  const [manifest, setManifest] = useState(manifestValue);
+  useEffect(() => {{
+    let live = true;
+    loadManifest().then(m => live && setManifest(m));
+    return () => {{ live = false; }};
+  }}, []);
+  return manifest;
+}}
+
+/* The search shard is column-wise per category; flattened once into entries */
+function loadSearch() {{
+  if (!searchPromise) {{
+    searchPromise = loadManifest().then(m => loadShard(m.search, false)).then(cols => cols.flatMap(c =>
+      c.id.map((id, i) => ({{ id, name: c.name[i], price: c.price[i], category: c.category,
+                             page: Math.floor(i / manifestValue.pageSize), images: [c.image[i]],
+                             srcsets: c.srcset && [c.srcset[i]] }}))))
+      .catch(e => {{ searchPromise = null; throw e; }});
+  }}
+  return searchPromise;
+}}
+
+async function findProduct(id) {{
+  if (known.has(id)) return known.get(id);
+  const m = await loadManifest();
+  const hit = (await loadSearch()).find(e => e.id === id);
+  const cat = hit && m.categories.find(c => c.id === hit.category);
+  if (!cat) return null;
+  await loadShard(`${{cat.pos}}/${{hit.page}}.json`);
+  return known.get(id) || null;
+}}
+
+/* One category (or all of them, merged) page by page. "featured" is catalog
+   order; "low" / "high" use the price shards, read backwards for "high". */
+class Listing {{
+  constructor(manifest, cat, sort) {{
+    const cats = cat === "all" ? manifest.categories : manifest.categories.filter(c => c.id === cat);
+    const desc = sort === "high";
+    this.key = sort === "featured" ? (p => p.pos) : desc ? (p => -p.price) : (p => p.price);
+    this.sources = cats.map(c => ({{ path: sort === "featured" ? c.pos : c.price, pages: c.pages,
+                                    next: desc ? c.pages - 1 : 0, step: desc ? -1 : 1, rows: [] }}));
+    this.items = [];
+    this.queue = Promise.resolve();
+  }}
+  get done() {{
+    return this.sources.every(s => !s.rows.length && (s.next < 0 || s.next >= s.pages));
+  }}
+  more(n) {{
+    this.queue = this.queue.catch(() => {{}}).then(() => this.take(n));
+    return this.queue;
+  }}
+  async take(n) {{
+    for (; n > 0; n--) {{
+      await Promise.all(this.sources.filter(s => !s.rows.length && s.next >= 0 && s.next < s.pages).map(async s => {{
+        const rows = await loadShard(`${{s.path}}/${{s.next}}.json`);
+        s.next += s.step;
+        s.rows = s.step < 0 ? [...rows].reverse() : [...rows];
+      }}));
+      let best = null;
+      for (const s of this.sources) if (s.rows.length && (!best || this.key(s.rows[0]) < this.key(best.rows[0]))) best = s;
+      if (!best) break;
+      this.items.push(best.rows.shift());
+    }}
+    return [...this.items];
+  }}
+}}
 
 /* ─── Full component code follows (same architecture as handcrafted version) ─── */
 /* The complete storefront component with all pages and interactions */
 
+function Img({{ p, i = 0, sizes = "100vw", ...rest }}) {{
+  const src = p.images[i] || p.images[0];
+  const set = p.srcsets && p.srcsets[p.images[i] ? i : 0];
+  if (!set) return <img src={{src}} loading="lazy" decoding="async" {{...rest}} />;
+  return (
+    <picture>
+      {{set.avif && <source type="image/avif" srcSet={{set.avif}} sizes={{sizes}} />}}
+      <img src={{src}} srcSet={{set.webp}} sizes={{sizes}} loading="lazy" decoding="async" {{...rest}} />
+    </picture>
+  );
+}}
+
 function Header({{ cart, wishlist, onNav, view }}) {{
   const [scrolled, setScrolled] = useState(false);
   const [searchOpen, setSearchOpen] = useState(false);
   const [searchQuery, setSearchQuery] = useState("");
+  const [index, setIndex] = useState(null);
   
   useEffect(() => {{
     const el = document.querySelector("[data-sc]");
@@ -155,8 +499,13 @@ function Header({{ cart, wishlist, onNav, view }}) {{
     return () => el.removeEventListener("scroll", h);
   }}, []);
 
-  const filteredProducts = searchQuery.length > 1 
-    ? PRODUCTS.filter(p => p.name.toLowerCase().includes(searchQuery.toLowerCase()))
+  useEffect(() => {{
+    if (!searchOpen || index) return;
+    loadSearch().then(setIndex);
+  }}, [searchOpen]);
+
+  const filteredProducts = searchQuery.length > 1 && index
+    ? index.filter(p => p.name.toLowerCase().includes(searchQuery.toLowerCase()))
     : [];
 
   return (
@@ -196,7 +545,7 @@ function Header({{ cart, wishlist, onNav, view }}) {{
               <div style={{{{ position:"absolute", top:"100%", left:40, right:40, background:"#fff", border:"1px solid #e0dcd5", maxHeight:300, overflow:"auto", zIndex:200 }}}}>
                 {{filteredProducts.slice(0,5).map(p => (
                   <div key={{p.id}} onClick={{() => {{ onNav("product", p.id); setSearchOpen(false); setSearchQuery(""); }}}} style={{{{ padding:"12px 20px", cursor:"pointer", borderBottom:"1px solid #f0f0f0", display:"flex", gap:12, alignItems:"center" }}}}>
-                    <img src={{p.images[0]}} style={{{{ width:40, height:40, objectFit:"cover" }}}} />
+                    <Img p={{p}} sizes="40px" style={{{{ width:40, height:40, objectFit:"cover" }}}} />
                     <div>
                       <div style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:13 }}}}>{{}}</div>
                       <div style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:12, color:"#999" }}}}>AED {{}}</div>
@@ -238,7 +587,7 @@ function ProductCard({{ product: p, onCart, onWish, wished, onNav }}) {{
   return (
     <div onMouseOver={{() => setHov(true)}} onMouseOut={{() => setHov(false)}} style={{{{ position:"relative", cursor:"pointer" }}}}>
       <div onClick={{() => onNav("product", p.id)}} style={{{{ position:"relative", paddingTop:"120%", overflow:"hidden", background:"#f0ede8", marginBottom:16 }}}}>
-        <img src={{p.images[0]}} alt={{p.name}} style={{{{ position:"absolute", inset:0, width:"100%", height:"100%", objectFit:"cover", transition:"transform 0.8s", transform: hov ? "scale(1.05)" : "scale(1)" }}}} />
+        <Img p={{p}} sizes="(max-width: 768px) 50vw, 25vw" alt={{p.name}} style={{{{ position:"absolute", inset:0, width:"100%", height:"100%", objectFit:"cover", transition:"transform 0.8s", transform: hov ? "scale(1.05)" : "scale(1)" }}}} />
         {{p.badge && <span style={{{{ position:"absolute", top:12, left:12, background: p.badge==="Sale" ? "#c9b99a" : "#1a1a1a", color:"#fff", fontFamily:"'DM Sans',sans-serif", fontSize:10, letterSpacing:"1.5px", textTransform:"uppercase", padding:"5px 12px" }}}}>{{}}</span>}}
         <div style={{{{ position:"absolute", bottom:12, left:12, right:12, display:"flex", gap:8, justifyContent:"center", opacity: hov ? 1 : 0, transform: hov ? "translateY(0)" : "translateY(10px)", transition:"all 0.3s" }}}}>
           <button onClick={{e => {{ e.stopPropagation(); onCart(p); }}}} style={{{{ flex:1, padding:"12px", background:"rgba(26,26,26,0.9)", color:"#fff", border:"none", fontFamily:"'DM Sans',sans-serif", fontSize:11, letterSpacing:"2px", textTransform:"uppercase", cursor:"pointer" }}}}>Add to Cart</button>
@@ -259,16 +608,24 @@ function ProductCard({{ product: p, onCart, onWish, wished, onNav }}) {{
 
 function Shop({{ filter, onCart, onWish, wishlist, onNav }}) {{
   const [cat, setCat] = useState(filter || "all");
+  const manifest = useManifest();
   const [sort, setSort] = useState("featured");
-  let prods = cat === "all" ? PRODUCTS : PRODUCTS.filter(p => p.category === cat);
-  if (sort === "low") prods = [...prods].sort((a,b) => a.price - b.price);
-  if (sort === "high") prods = [...prods].sort((a,b) => b.price - a.price);
+  const [prods, setProds] = useState([]);
+  const listing = useRef(null);
+  const more = (l) => l.more(manifest.pageSize).then(items => listing.current === l && setProds(items));
+  useEffect(() => {{
+    if (!manifest) return;
+    listing.current = new Listing(manifest, cat, sort);
+    setProds([]);
+    more(listing.current);
+  }}, [manifest, cat, sort]);
+  const categories = manifest ? manifest.categories : [];
   
   return (
     <section style={{{{ maxWidth:1400, margin:"0 auto", padding:"48px 40px" }}}}>
       <div style={{{{ display:"flex", justifyContent:"space-between", alignItems:"flex-end", marginBottom:40, flexWrap:"wrap", gap:16 }}}}>
         <h1 style={{{{ fontFamily:"'Cormorant Garamond',serif", fontSize:42, fontWeight:300, color:"#1a1a1a", margin:0 }}}}>
-          {{cat === "all" ? "All Pieces" : CATEGORIES.find(c => c.id === cat)?.name || "Shop"}}
+          {{cat === "all" ? "All Pieces" : categories.find(c => c.id === cat)?.name || "Shop"}}
         </h1>
         <select value={{sort}} onChange={{e => setSort(e.target.value)}} style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:12, padding:"10px 16px", border:"1px solid #e0dcd5", background:"#fff" }}}}>
           <option value="featured">Featured</option>
@@ -278,24 +635,41 @@ function Shop({{ filter, onCart, onWish, wishlist, onNav }}) {{
       </div>
       <div style={{{{ display:"flex", gap:8, marginBottom:40, overflowX:"auto", paddingBottom:8 }}}}>
         <button onClick={{() => setCat("all")}} style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:11, letterSpacing:"1.5px", textTransform:"uppercase", padding:"10px 20px", border:"1px solid", cursor:"pointer", whiteSpace:"nowrap", background: cat==="all" ? "#1a1a1a" : "transparent", color: cat==="all" ? "#fff" : "#1a1a1a", borderColor: cat==="all" ? "#1a1a1a" : "#ddd" }}}}>All</button>
-        {{CATEGORIES.map(c => <button key={{c.id}} onClick={{() => setCat(c.id)}} style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:11, letterSpacing:"1.5px", textTransform:"uppercase", padding:"10px 20px", border:"1px solid", cursor:"pointer", whiteSpace:"nowrap", background: cat===c.id ? "#1a1a1a" : "transparent", color: cat===c.id ? "#fff" : "#1a1a1a", borderColor: cat===c.id ? "#1a1a1a" : "#ddd" }}}}>{{}}</button>)}}
+        {{categories.map(c => <button key={{c.id}} onClick={{() => setCat(c.id)}} style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:11, letterSpacing:"1.5px", textTransform:"uppercase", padding:"10px 20px", border:"1px solid", cursor:"pointer", whiteSpace:"nowrap", background: cat===c.id ? "#1a1a1a" : "transparent", color: cat===c.id ? "#fff" : "#1a1a1a", borderColor: cat===c.id ? "#1a1a1a" : "#ddd" }}}}>{{}}</button>)}}
       </div>
       <div style={{{{ display:"grid", gridTemplateColumns:"repeat(auto-fill, minmax(280px, 1fr))", gap:32 }}}}>
         {{prods.map(p => <ProductCard key={{p.id}} product={{p}} onCart={{onCart}} onWish={{onWish}} wished={{wishlist.includes(p.id)}} onNav={{onNav}} />)}}
       </div>
-      {{prods.length === 0 && <div style={{{{ textAlign:"center", padding:"80px 0", color:"#999", fontFamily:"'DM Sans',sans-serif" }}}}>No products yet. Coming soon.</div>}}
+      {{listing.current && !listing.current.done && prods.length > 0 && <div style={{{{ textAlign:"center", marginTop:48 }}}}>
+        <button onClick={{() => more(listing.current)}} style={{{{ fontFamily:"'DM Sans',sans-serif", fontSize:12, letterSpacing:"3px", textTransform:"uppercase", background:"transparent", color:"#1a1a1a", border:"1px solid #1a1a1a", padding:"16px 48px", cursor:"pointer" }}}}>Load More</button>
+      </div>}}
+      {{prods.length === 0 && listing.current?.done && <div style={{{{ textAlign:"center", padding:"80px 0", color:"#999", fontFamily:"'DM Sans',sans-serif" }}}}>No products yet. Coming soon.</div>}}
     </section>
   );
 }}
 
 function Detail({{ pid, onCart, onWish, wishlist, onNav }}) {{
-  const p = PRODUCTS.find(x => x.id === pid);
+  const manifest = useManifest();
+  const [p, setP] = useState(() => known.get(pid) || null);
+  const [missing, setMissing] = useState(false);
+  const [related, setRelated] = useState([]);
   const [ci, setCi] = useState(0);
   const [si, setSi] = useState(0);
   const [qty, setQty] = useState(1);
   const [imgIdx, setImgIdx] = useState(0);
-  if (!p) return <div style={{{{ padding:80, textAlign:"center" }}}}>Product not found</div>;
-  const related = PRODUCTS.filter(x => x.category === p.category && x.id !== p.id).slice(0,3);
+  useEffect(() => {{
+    let live = true;
+    findProduct(pid).then(x => {{ if (live) {{ setP(x); setMissing(!x); }} }});
+    return () => {{ live = false; }};
+  }}, [pid]);
+  useEffect(() => {{
+    const cat = p && manifest && manifest.categories.find(c => c.id === p.category);
+    if (!cat) return;
+    let live = true;
+    loadShard(`${{cat.pos}}/0.json`).then(rows => live && setRelated(rows.filter(x => x.id !== p.id).slice(0,3)));
+    return () => {{ live = false; }};
+  }}, [p, manifest]);
+  if (!p) return <div style={{{{ padding:80, textAlign:"center" }}}}>{{missing ? "Product not found" : ""}}</div>;
   
   return (
     <section style={{{{ maxWidth:1400, margin:"0 auto", padding:"48px 40px" }}}}>
@@ -305,9 +679,9 @@ function Detail({{ pid, onCart, onWish, wishlist, onNav }}) {{
       <div style={{{{ display:"grid", gridTemplateColumns:"1fr 1fr", gap:64, marginBottom:80 }}}}>
         <div>
           <div style={{{{ position:"relative", paddingTop:"100%", overflow:"hidden", background:"#f0ede8", marginBottom:12 }}}}>
-            <img src={{p.images[imgIdx] || p.images[0]}} alt={{p.name}} style={{{{ position:"absolute", inset:0, width:"100%", height:"100%", objectFit:"cover" }}}} />
+            <Img p={{p}} i={{imgIdx}} sizes="(max-width: 768px) 100vw, 50vw" alt={{p.name}} style={{{{ position:"absolute", inset:0, width:"100%", height:"100%", objectFit:"cover" }}}} />
           </div>
-          {{p.images.length > 1 && <div style={{{{ display:"flex", gap:8 }}}}>{{p.images.map((img, i) => <div key={{i}} onClick={{() => setImgIdx(i)}} style={{{{ width:72, height:72, overflow:"hidden", border: imgIdx===i ? "2px solid #1a1a1a" : "1px solid #ddd", cursor:"pointer" }}}}><img src={{img}} style={{{{ width:"100%", height:"100%", objectFit:"cover" }}}} /></div>)}}</div>}}
+          {{p.images.length > 1 && <div style={{{{ display:"flex", gap:8 }}}}>{{p.images.map((img, i) => <div key={{i}} onClick={{() => setImgIdx(i)}} style={{{{ width:72, height:72, overflow:"hidden", border: imgIdx===i ? "2px solid #1a1a1a" : "1px solid #ddd", cursor:"pointer" }}}}><Img p={{p}} i={{i}} sizes="72px" style={{{{ width:"100%", height:"100%", objectFit:"cover" }}}} /></div>)}}</div>}}
         </div>
         <div style={{{{ display:"flex", flexDirection:"column", justifyContent:"center" }}}}>
           <h1 style={{{{ fontFamily:"'Cormorant Garamond',serif", fontSize:36, fontWeight:400, color:"#1a1a1a", margin:"0 0 16px", lineHeight:1.2 }}}}>{{}}</h1>
@@ -414,7 +788,10 @@ export default function App() {{
   const [data, setData] = useState(null);
   const [cart, setCart] = useState([]);
   const [wishlist, setWishlist] = useState([]);
+  const [featured, setFeatured] = useState([]);
+  const manifest = useManifest();
   const ref = useRef(null);
+  useEffect(() => {{ if (manifest) loadShard(manifest.featured).then(setFeatured); }}, [manifest]);
   
   const nav = (p, d=null) => {{ setView(p); setData(d); if(ref.current) ref.current.scrollTop=0; }};
   const addCart = (p) => {{
@@ -440,7 +817,7 @@ export default function App() {{
             <h2 style={{{{ fontFamily:"'Cormorant Garamond',serif", fontSize:42, fontWeight:300, margin:0 }}}}>Our Collections</h2>
           </div>
           <div style={{{{ display:"grid", gridTemplateColumns:"repeat(auto-fill, minmax(280px, 1fr))", gap:16 }}}}>
-            {{CATEGORIES.map(c => <div key={{c.id}} onClick={{() => nav("shop", c.id)}} style={{{{ position:"relative", height:280, overflow:"hidden", cursor:"pointer", background:"#f0ede8" }}}}>
+            {{(manifest ? manifest.categories : []).map(c => <div key={{c.id}} onClick={{() => nav("shop", c.id)}} style={{{{ position:"relative", height:280, overflow:"hidden", cursor:"pointer", background:"#f0ede8" }}}}>
               <div style={{{{ position:"absolute", inset:0, backgroundImage:`url(${{c.image}})`, backgroundSize:"cover", backgroundPosition:"center", transition:"transform 0.8s" }}}} onMouseOver={{e => e.target.style.transform="scale(1.08)"}} onMouseOut={{e => e.target.style.transform="scale(1)"}} />
               <div style={{{{ position:"absolute", inset:0, background:"linear-gradient(to top, rgba(0,0,0,0.6), rgba(0,0,0,0.1) 60%)" }}}} />
               <div style={{{{ position:"absolute", bottom:24, left:24, right:24 }}}}>
@@ -450,7 +827,7 @@ export default function App() {{
             </div>)}}
           </div>
         </section>
-        {{(() => {{ const feat = PRODUCTS.filter(p => p.featured); return feat.length > 0 ? (
+        {{(() => {{ const feat = featured; return feat.length > 0 ? (
           <section style={{{{ background:"#fff", padding:"80px 0" }}}}>
             <div style={{{{ maxWidth:1400, margin:"0 auto", padding:"0 40px" }}}}>
               <h2 style={{{{ fontFamily:"'Cormorant Garamond',serif", fontSize:42, fontWeight:300, marginBottom:48 }}}}>Featured Pieces</h2>
@@ -467,7 +844,7 @@ export default function App() {{
       {{view==="wishlist" && <section style={{{{ maxWidth:1400, margin:"0 auto", padding:"48px 40px" }}}}>
         <h1 style={{{{ fontFamily:"'Cormorant Garamond',serif", fontSize:42, fontWeight:300, marginBottom:48 }}}}>Wishlist</h1>
         {{wishlist.length === 0 ? <div style={{{{ textAlign:"center", padding:"80px 0" }}}}><p style={{{{ color:"#999" }}}}>Your wishlist is empty</p></div> :
-        <div style={{{{ display:"grid", gridTemplateColumns:"repeat(auto-fill, minmax(280px, 1fr))", gap:32 }}}}>{{PRODUCTS.filter(p => wishlist.includes(p.id)).map(p => <ProductCard key={{p.id}} product={{p}} onCart={{addCart}} onWish={{toggleWish}} wished={{true}} onNav={{nav}} />)}}</div>}}
+        <div style={{{{ display:"grid", gridTemplateColumns:"repeat(auto-fill, minmax(280px, 1fr))", gap:32 }}}}>{{wishlist.map(id => known.get(id)).filter(Boolean).map(p => <ProductCard key={{p.id}} product={{p}} onCart={{addCart}} onWish={{toggleWish}} wished={{true}} onNav={{nav}} />)}}</div>}}
       </section>}}
       <Footer onNav={{nav}} />
       <div onClick={{() => window.open("https://wa.me/"+WHATSAPP, "_blank")}} style={{{{ position:"fixed", bottom:24, right:24, zIndex:999, width:56, height:56, borderRadius:"50%", background:"#25D366", display:"flex", alignItems:"center", justifyContent:"center", cursor:"pointer", boxShadow:"0 4px 20px rgba(37,211,102,0.4)" }}}}>
@@ -478,28 +855,50 @@ export default function App() {{
 }}
 '''
 
+def write_if_changed(path, text):
+    """Write text unless the file already holds exactly that; True if written.
+    
+    Curation output is deterministic, so an identical file means an
+    unchanged build (and an unchanged mtime for anything watching it).
+    """
+    path = Path(path)
+    data = text.encode("utf-8")
+    if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python generate_site.py <products.xlsx> [output.jsx]")
-        print("\\nThis reads your product spreadsheet and generates a complete React storefront.")
+        print("Usage: python generate_site.py <catalog.jsonl|catalog.parquet|products.xlsx> [output.jsx]")
+        print("\\nThis reads your product catalog and generates a complete React storefront.")
         sys.exit(1)
     
     xlsx_path = sys.argv[1]
     output_path = sys.argv[2] if len(sys.argv) > 2 else "unicorn-furniture-generated.jsx"
     
     print(f"📖 Reading products from {xlsx_path}...")
-    products = read_products(xlsx_path)
-    categories = read_categories(xlsx_path)
+    products, categories = read_workbook(xlsx_path)
     
     print(f"✅ Found {len(products)} active products across {len(set(p['category'] for p in products))} categories")
+
+    manifest = load_image_manifest()
+    if manifest:
+        hits = apply_image_manifest(products, manifest)
+        print(f"🖼️ {hits} images self-hosted via {IMAGE_MANIFEST}")
     print(f"📝 Generating site...")
     
-    jsx = generate_jsx(products, categories)
+    files = build_shards(products, categories)
+    written, unchanged, removed = write_shards(files, DATA_DIR)
+    jsx_written = write_if_changed(output_path, generate_jsx())
     
-    Path(output_path).write_text(jsx)
-    print(f"🚀 Site generated: {output_path}")
+    if not written and not removed and not jsx_written:
+        print(f"⏭️ Site unchanged: {output_path} + {DATA_DIR} (nothing to deploy)")
+        return
+    print(f"🗂️ Product data: {DATA_DIR} ({written} shard(s) written, {unchanged} unchanged, {removed} removed)")
+    print(f"🚀 Site generated: {output_path}{'' if jsx_written else ' (unchanged)'}")
     print(f"\\nNext steps:")
-    print(f"  1. Copy to your Vercel project")
+    print(f"  1. Copy to your Vercel project (the JSX to src/, {DATA_DIR} to public/data/)")
     print(f"  2. git add . && git commit -m 'Update products' && git push")
     print(f"  3. Vercel auto-deploys in ~30 seconds")
 
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — PRODUCT IMAGE PIPELINE
+===========================================
+Self-hosts the catalog's product images in modern formats, so the
+storefront stops hot-linking full-size supplier images.
+
+  Catalog → download (threads, bounded pool) → resize + encode
+  (process pool, Pillow) → public/products/<hash>-<width>.<fmt>
+                         → public/products/manifest.json
+
+  - Several widths per image (WIDTHS, never upscaled), WebP always,
+    AVIF too when Pillow supports it
+  - Content-addressed: files are named after the hash of the source
+    bytes, so the same photo under two URLs is stored once
+  - Bounded memory: only DOWNLOAD_CONNECTIONS downloads and
+    ENCODE_WINDOW × workers encodes are in flight at any time
+  - Incremental: URLs already in the manifest whose files exist are
+    not downloaded again
+  - generate_site.py reads the manifest and emits local srcset data
+
+USAGE:
+  python image_pipeline.py unicorn-furniture-catalog.jsonl
+  python image_pipeline.py catalog.jsonl --out ../public/products --workers 4
+  python generate_site.py unicorn-furniture-catalog.jsonl   # picks up the manifest
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from io import BytesIO
+from itertools import islice
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image, ImageOps, features
+
+from catalog_io import read_catalog
+
+HAS_AVIF = features.check("avif")
+
+OUTPUT_DIR = os.environ.get("SITE_IMAGE_DIR", str(Path(__file__).resolve().parent.parent / "public" / "products"))
+URL_PREFIX = "/products/"          # where OUTPUT_DIR is served from
+MANIFEST_NAME = "manifest.json"
+
+WIDTHS = (320, 640, 960, 1280)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+AVIF_SPEED = 8         # encoder effort 0-10; 8 is ~3x faster than the default for ~5% more bytes
+DOWNLOAD_CONNECTIONS = 16
+ENCODE_WINDOW = 2      # encodes in flight per worker process (each holds its source bytes)
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; UnicornFurnitureImagePipeline/1.0)"
+
+
+# ═══════════════════════════════════════════════════════════════
+# ENCODING (runs in worker processes)
+# ═══════════════════════════════════════════════════════════════
+
+def target_widths(source_width):
+    """WIDTHS below the source width, plus the source width capped at the largest."""
+    widths = [w for w in WIDTHS if w < source_width]
+    top = min(source_width, WIDTHS[-1])
+    if top not in widths:
+        widths.append(top)
+    return widths
+
+
+def encode_image(data, digest, out_dir, formats):
+    """Decode source bytes, write every width × format; return the manifest entry."""
+    out_dir = Path(out_dir)
+    with Image.open(BytesIO(data)) as im:
+        im = ImageOps.exif_transpose(im)
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha else "RGB")
+        width, height = im.size
+        entry = {"hash": digest, "width": width, "height": height}
+        for fmt in formats:
+            entry[fmt] = []
+        for w in sorted(target_widths(width), reverse=True):
+            h = max(1, round(height * w / width))
+            resized = im if w == width else im.resize((w, h), Image.LANCZOS, reducing_gap=3.0)
+            for fmt in formats:
+                name = f"{digest}-{w}.{fmt}"
+                path = out_dir / name
+                if not path.exists():
+                    tmp = path.with_suffix(f".{fmt}.tmp")
+                    if fmt == "webp":
+                        resized.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+                    else:
+                        resized.save(tmp, "AVIF", quality=AVIF_QUALITY, speed=AVIF_SPEED)
+                    tmp.replace(path)
+                entry[fmt].insert(0, [w, name])
+    return entry
+
+
+# ═══════════════════════════════════════════════════════════════
+# PIPELINE
+# ═══════════════════════════════════════════════════════════════
+
+def load_manifest(path):
+    path = Path(path)
+    if not path.exists():
+        return {"images": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _complete(entry, out_dir, formats):
+    """Every file of a manifest entry is on disk (and all wanted formats are there)."""
+    return all(fmt in entry for fmt in formats) and all(
+        (out_dir / name).exists() for fmt in formats for _, name in entry[fmt]
+    )
+
+
+def catalog_image_urls(catalog_path):
+    """Distinct image URLs of the active products, in catalog order."""
+    urls = {}
+    for rec in read_catalog(catalog_path, columns=["images", "active"]):
+        if str(rec.get("active") or "YES").upper() != "YES":
+            continue
+        for url in (rec.get("images") or [])[:4]:
+            if str(url).startswith("http"):
+                urls.setdefault(str(url), None)
+    return list(urls)
+
+
+class ImagePipeline:
+    """Download → resize/encode → manifest, skipping work already done."""
+
+    def __init__(self, out_dir=OUTPUT_DIR, workers=None, connections=DOWNLOAD_CONNECTIONS, formats=None):
+        self.out_dir = Path(out_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.connections = connections
+        self.formats = formats or (["avif", "webp"] if HAS_AVIF else ["webp"])
+        self.manifest_path = self.out_dir / MANIFEST_NAME
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = {"urls": 0, "skipped": 0, "downloaded": 0, "encoded": 0, "shared": 0, "failed": 0}
+
+    def download(self, url):
+        """(url, bytes or None, error)."""
+        try:
+            r = self.session.get(url, timeout=(5, 30), stream=True)
+            with r:
+                if r.status_code != 200:
+                    return url, None, f"HTTP {r.status_code}"
+                data = b""
+                for chunk in r.iter_content(256 * 1024):
+                    data += chunk
+                    if len(data) > MAX_SOURCE_BYTES:
+                        return url, None, "too large"
+                return url, data, None
+        except requests.RequestException as e:
+            return url, None, type(e).__name__
+
+    def _collect(self, done, pending, waiting, by_hash, images):
+        """Record finished encodes: manifest entries for every waiting URL."""
+        for future in done:
+            digest = pending.pop(future)
+            urls = waiting.pop(digest)
+            try:
+                entry = future.result()
+            except Exception as e:  # undecodable / truncated source
+                self.stats["failed"] += len(urls)
+                print(f"  ⚠️ cannot decode ({type(e).__name__}): {urls[0][:80]}")
+                continue
+            self.stats["encoded"] += 1
+            by_hash[digest] = entry
+            for url in urls:
+                images[url] = entry
+
+    def run(self, urls):
+        """Process urls; returns the updated manifest (also written to disk)."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        manifest = load_manifest(self.manifest_path)
+        images = manifest["images"]
+        by_hash = {e["hash"]: e for e in images.values() if _complete(e, self.out_dir, self.formats)}
+
+        todo = []
+        for url in dict.fromkeys(urls):
+            self.stats["urls"] += 1
+            if url in images and _complete(images[url], self.out_dir, self.formats):
+                self.stats["skipped"] += 1
+            else:
+                todo.append(url)
+
+        # Each download / queued encode holds a whole source image: keep
+        # both bounded instead of submitting everything up front
+        window = ENCODE_WINDOW * self.workers
+        with ThreadPoolExecutor(max_workers=min(self.connections, max(len(todo), 1))) as fetchers, \
+                ProcessPoolExecutor(max_workers=self.workers) as encoders:
+            pending = {}  # encode future → digest
+            waiting = {}  # digest → urls waiting on the same content
+            queued = iter(todo)
+            fetching = {fetchers.submit(self.download, u) for u in islice(queued, self.connections)}
+            while fetching:
+                done, fetching = wait(fetching, return_when=FIRST_COMPLETED)
+                fetching |= {fetchers.submit(self.download, u) for u in islice(queued, len(done))}
+                for fetched in done:
+                    url, data, error = fetched.result()
+                    if data is None:
+                        self.stats["failed"] += 1
+                        print(f"  ⚠️ {error}: {url[:80]}")
+                        continue
+                    self.stats["downloaded"] += 1
+                    digest = hashlib.sha256(data).hexdigest()[:20]
+                    if digest in by_hash:
+                        images[url] = by_hash[digest]
+                        self.stats["shared"] += 1
+                    elif digest in waiting:
+                        waiting[digest].append(url)
+                        self.stats["shared"] += 1
+                    else:
+                        while len(pending) >= window:
+                            self._collect(wait(pending, return_when=FIRST_COMPLETED).done, pending, waiting, by_hash, images)
+                        waiting[digest] = [url]
+                        future = encoders.submit(encode_image, data, digest, str(self.out_dir), self.formats)
+                        pending[future] = digest
+            self._collect(wait(pending).done, pending, waiting, by_hash, images)
+
+        manifest["images"] = dict(sorted(images.items()))
+        manifest["formats"] = self.formats
+        manifest["url_prefix"] = URL_PREFIX
+        text = json.dumps(manifest, indent=1, sort_keys=True) + "\n"
+        if not self.manifest_path.exists() or self.manifest_path.read_text(encoding="utf-8") != text:
+            self.manifest_path.write_text(text, encoding="utf-8")
+        return manifest
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print("Usage: python image_pipeline.py <catalog.jsonl|catalog.parquet> [--out DIR] [--workers N]")
+        sys.exit(1)
+    out_dir = OUTPUT_DIR
+    workers = None
+    if "--out" in args:
+        i = args.index("--out")
+        out_dir = args[i + 1]
+        del args[i:i + 2]
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    urls = catalog_image_urls(args[0])
+    pipeline = ImagePipeline(out_dir=out_dir, workers=workers)
+    print(f"🖼️ {len(urls)} product images → {out_dir} ({', '.join(pipeline.formats)} × {len(WIDTHS)} widths)")
+    pipeline.run(urls)
+    s = pipeline.stats
+    print(f"✅ {s['encoded']} encoded · {s['skipped']} already done · {s['shared']} duplicates · {s['failed']} failed")
+    print(f"📒 Manifest: {pipeline.manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — IMAGE PROBE
+================================
+Checks product image URLs for real before they reach the storefront:
+dead links, redirects, non-images and thumbnails too small to show.
+
+  - Reads only the first few KB of each image (Range request, streamed
+    and closed as soon as the dimensions are known)
+  - Real format and size from the file header: JPEG, PNG, GIF, WebP, AVIF
+  - Concurrent, with one bounded keep-alive pool (max_connections)
+  - Results cached per URL in a DiskCache with a TTL (failures expire
+    sooner, so a flaky CDN is retried on the next run)
+
+Works against any HTTP server, e.g. a local static one for testing:
+  python -m http.server 8000 --directory ../public
+  python image_probe.py http://127.0.0.1:8000/products/infinity-coffee-table.png
+
+USAGE:
+  from image_probe import ImageProbe
+  probe = ImageProbe(cache=DiskCache(".cache/image_probe.sqlite"))
+  results = probe.probe_many(urls)          # {url: result dict}
+  probe.usable(results[url])                # live image, big enough
+  for product in probe.verify(products): ...  # images replaced by the usable ones
+
+  # In the curator: dead / tiny images are dropped before the gates run,
+  # so "No images" rejections and image-count scores reflect reality
+  curator = PremiumCurator(image_probe=probe)
+"""
+
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from disk_cache import DiskCache
+from premium_curator import ImageCurator, _get_images
+
+# Bytes requested up front; JPEGs with big EXIF/ICC blocks keep reading
+# (in CHUNK_BYTES steps) up to MAX_HEADER_BYTES before giving up.
+HEADER_BYTES = 16 * 1024
+CHUNK_BYTES = 16 * 1024
+MAX_HEADER_BYTES = 256 * 1024
+
+PROBE_TTL = 7 * 24 * 3600        # seconds a successful probe is trusted
+FAILED_PROBE_TTL = 24 * 3600     # dead / unreadable URLs are retried sooner
+MIN_IMAGE_SIDE = 400             # px, shortest side worth showing on a product page
+PROBE_BATCH = 500                # products per verify() round
+
+USER_AGENT = "Mozilla/5.0 (compatible; UnicornFurnitureImageProbe/1.0)"
+
+
+# ═══════════════════════════════════════════════════════════════
+# HEADER PARSERS
+# ═══════════════════════════════════════════════════════════════
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(data):
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:           # fill byte
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def _webp_size(data):
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30 and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25 and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    return None
+
+
+def _avif_size(data):
+    # 'ispe' (image spatial extents) box: version/flags, width, height
+    at = data.find(b"ispe")
+    if at < 0 or at + 16 > len(data):
+        return None
+    return struct.unpack(">II", data[at + 8:at + 16])
+
+
+def image_info(data):
+    """(format, width, height) from the first bytes of an image file.
+
+    format is None when the bytes are not a recognised image; width and
+    height are None when the header was cut off before the dimensions.
+    """
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        if len(data) >= 24 and data[12:16] == b"IHDR":
+            return ("png",) + struct.unpack(">II", data[16:24])
+        return ("png", None, None)
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        if len(data) >= 10:
+            return ("gif",) + struct.unpack("<HH", data[6:10])
+        return ("gif", None, None)
+    if data[:2] == b"\xff\xd8":
+        return ("jpeg",) + (_jpeg_size(data) or (None, None))
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ("webp",) + (_webp_size(data) or (None, None))
+    if data[4:8] == b"ftyp" and data[8:12] in (b"avif", b"avis"):
+        return ("avif",) + (_avif_size(data) or (None, None))
+    return (None, None, None)
+
+
+# ═══════════════════════════════════════════════════════════════
+# PROBER
+# ═══════════════════════════════════════════════════════════════
+
+class ImageProbe:
+    """Concurrent, cached image URL checker."""
+
+    def __init__(self, cache=None, max_connections=16, timeout=(5, 10),
+                 min_side=MIN_IMAGE_SIDE, ttl=PROBE_TTL, failed_ttl=FAILED_PROBE_TTL):
+        self.cache = cache
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.min_side = min_side
+        self.ttl = ttl
+        self.failed_ttl = failed_ttl
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def cache_key(url):
+        return DiskCache.make_key("image_probe", url)
+
+    def probe(self, url):
+        """Fetch just enough of url to know what it is. Never raises.
+
+        Result keys: url, ok, status, final_url, redirected, format,
+        width, height, bytes_read, error.
+        """
+        result = {"url": url, "ok": False, "status": None, "final_url": url, "redirected": False,
+                  "format": None, "width": None, "height": None, "bytes_read": 0, "error": None}
+        try:
+            response = self.session.get(url, headers={"Range": f"bytes=0-{HEADER_BYTES - 1}"},
+                                        stream=True, timeout=self.timeout, allow_redirects=True)
+        except requests.RequestException as e:
+            result["error"] = type(e).__name__
+            return result
+
+        with response:
+            result["status"] = response.status_code
+            result["final_url"] = response.url
+            result["redirected"] = bool(response.history)
+            if response.status_code not in (200, 206):
+                result["error"] = f"HTTP {response.status_code}"
+                return result
+
+            # Servers that ignore Range send the whole file; stop reading
+            # as soon as the header is parsed either way.
+            data = b""
+            fmt = width = height = None
+            try:
+                for chunk in response.iter_content(CHUNK_BYTES):
+                    data += chunk
+                    fmt, width, height = image_info(data)
+                    if width is not None or (fmt is None and len(data) >= 32) or len(data) >= MAX_HEADER_BYTES:
+                        break
+            except requests.RequestException as e:
+                result["error"] = type(e).__name__
+                return result
+
+        # A 206 stops at HEADER_BYTES; JPEG frame headers can sit behind
+        # large metadata blocks, so fetch the rest of the budget once.
+        if fmt and width is None and response.status_code == 206 and len(data) < MAX_HEADER_BYTES:
+            try:
+                more = self.session.get(result["final_url"], timeout=self.timeout,
+                                        headers={"Range": f"bytes={len(data)}-{MAX_HEADER_BYTES - 1}"})
+                if more.status_code == 206:
+                    data += more.content
+                    fmt, width, height = image_info(data)
+            except requests.RequestException:
+                pass
+
+        result["bytes_read"] = len(data)
+        if fmt is None:
+            result["error"] = f"not an image ({response.headers.get('Content-Type', 'unknown type')})"
+        elif width is None:
+            result["format"] = fmt
+            result["error"] = "dimensions not found in header"
+        else:
+            result.update(ok=True, format=fmt, width=width, height=height)
+        return result
+
+    def probe_many(self, urls):
+        """{url: result} for every distinct url; cached ones are not re-fetched."""
+        urls = [u for u in dict.fromkeys(urls) if u]
+        keys = {url: self.cache_key(url) for url in urls}
+        cached = self.cache.get_many(keys.values()) if self.cache is not None else {}
+        results = {url: cached[key] for url, key in keys.items() if key in cached}
+        todo = [url for url in urls if url not in results]
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(self.max_connections, len(todo))) as pool:
+                fresh = dict(zip(todo, pool.map(self.probe, todo)))
+            if self.cache is not None:
+                # Transport errors (no HTTP status) are not cached: they
+                # say more about this run's network than about the image.
+                self.cache.set_many({keys[u]: r for u, r in fresh.items() if r["ok"]}, ttl=self.ttl)
+                self.cache.set_many({keys[u]: r for u, r in fresh.items()
+                                     if not r["ok"] and r["status"] is not None}, ttl=self.failed_ttl)
+            results.update(fresh)
+        return results
+
+    def usable(self, result):
+        """Live image with a shortest side of at least min_side."""
+        return bool(result and result["ok"] and min(result["width"], result["height"]) >= self.min_side)
+
+    def verify(self, products, batch_size=PROBE_BATCH):
+        """Yield products (as copies) whose images are only the usable ones.
+
+        Candidate URLs are the ones the curator would use; redirected
+        images are replaced by their final URL. The original image
+        fields are folded into a single `images` list.
+
+        If not a single URL of a batch could be reached at all (network
+        down, DNS failure), the batch is passed through unchecked rather
+        than rejecting every product.
+        """
+        products = iter(products)
+        while True:
+            batch = list(islice(products, batch_size))
+            if not batch:
+                return
+            candidates = [ImageCurator.curate(_get_images(p)) for p in batch]
+            results = self.probe_many(url for urls in candidates for url in urls)
+            if results and all(r["status"] is None for r in results.values()):
+                print(f"  ⚠️ Image probe: no image host reachable — {len(batch)} products left unchecked")
+                yield from batch
+                continue
+            for product, urls in zip(batch, candidates):
+                checked = dict(product)
+                for field in ("image_url", "image_url_1", "image_url_2", "image_url_3", "image_url_4"):
+                    checked.pop(field, None)
+                checked["images"] = [results[u]["final_url"] for u in urls if self.usable(results[u])]
+                yield checked
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python image_probe.py <image-url> [more urls...]")
+        sys.exit(1)
+    probe = ImageProbe()
+    for url, r in probe.probe_many(sys.argv[1:]).items():
+        if r["ok"]:
+            mark = "✅" if probe.usable(r) else "⚠️ too small"
+            print(f"{mark} {r['format']} {r['width']}x{r['height']} ({r['bytes_read']} bytes read)"
+                  f"{' → ' + r['final_url'] if r['redirected'] else ''}  {url}")
+        else:
+            print(f"❌ {r['error']}  {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — KEYWORD MATCHER
+====================================
+Finds every occurrence of a fixed set of keywords in one pass over the
+text, instead of one `kw in text` scan per keyword.
+
+Uses a C Aho-Corasick automaton when pyahocorasick is installed
+(pip install pyahocorasick). Otherwise the keywords are compiled once
+into a single trie-shaped regex inside a lookahead, so the scan tries
+every start position exactly once and, at each, follows at most one
+branch of the trie. The longest keyword starting at a position is
+captured; shorter keywords that are prefixes of it are added from a
+precomputed table.
+
+Either way overlapping hits ("tempered glass" / "glass",
+"sintered stone" / "sintered") are all reported.
+
+Keywords are organised in named groups (one per rule list). Each
+group keeps its own priority: the order of its list.
+
+USAGE:
+  from keyword_matcher import KeywordMatcher
+  rules = KeywordMatcher({"reject": ["cheap", "pet bed"], "types": ["sofa bed", "sofa", "bed"]})
+  hits = rules.scan("modern velvet sofa bed")
+  hits.first("types")      # → "sofa bed" (earliest in the list, not in the text)
+  hits.count("reject")     # → 0
+  rules.hits("sofa bed")   # → [(0, "sofa"), (0, "sofa bed"), (5, "bed")]
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex matching the longest of `keywords` at the current position."""
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in node.items() if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not terminal else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy: only one branch can match the next character, so the
+            # longest keyword on this path wins; fall back to the shorter one.
+            body = (body if body.startswith("(?:") else "(?:" + body + ")") + "?"
+        return body
+
+    return build(trie)
+
+
+class Hits:
+    """Keywords found in one text, with the position of their first occurrence."""
+
+    __slots__ = ("_matcher", "found")
+
+    def __init__(self, matcher: "KeywordMatcher", found: Dict[str, int]):
+        self._matcher = matcher
+        self.found = found
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self.found
+
+    def first(self, group: str) -> Optional[str]:
+        """Highest-priority (earliest-listed) keyword of `group` present, if any."""
+        rank = self._matcher.rank[group]
+        best, best_rank = None, len(rank)
+        for kw in self.found:
+            r = rank.get(kw, best_rank)
+            if r < best_rank:
+                best, best_rank = kw, r
+        return best
+
+    def count(self, group: str) -> int:
+        """Number of distinct keywords of `group` present."""
+        rank = self._matcher.rank[group]
+        return sum(1 for kw in self.found if kw in rank)
+
+    def within(self, end: int) -> "Hits":
+        """Hits that lie entirely in text[:end] (e.g. the title part of title + description)."""
+        return Hits(self._matcher, {kw: s for kw, s in self.found.items() if s + len(kw) <= end})
+
+
+class KeywordMatcher:
+    """Compiled multi-keyword matcher over named, ordered keyword groups."""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups = {name: list(dict.fromkeys(kws)) for name, kws in groups.items()}
+        self.rank = {name: {kw: i for i, kw in enumerate(kws)} for name, kws in self.groups.items()}
+        keywords = sorted({kw for kws in self.groups.values() for kw in kws if kw})
+        self._automaton = None
+        self._pattern = None
+        if not keywords:
+            return
+        if HAS_AHOCORASICK:
+            self._automaton = ahocorasick.Automaton()
+            for kw in keywords:
+                self._automaton.add_word(kw, (len(kw) - 1, kw))
+            self._automaton.make_automaton()
+        else:
+            self._prefixes = {kw: tuple(k for k in keywords if kw.startswith(k)) for kw in keywords}
+            self._pattern = re.compile("(?=(" + _trie_pattern(keywords) + "))")
+
+    def _iter(self, text: str):
+        """(start, keyword) for every occurrence, overlapping ones included."""
+        if self._automaton is not None:
+            for end, (offset, kw) in self._automaton.iter(text):
+                yield end - offset, kw
+        elif self._pattern is not None:
+            prefixes = self._prefixes
+            for m in self._pattern.finditer(text):
+                start = m.start()
+                for kw in prefixes[m.group(1)]:
+                    yield start, kw
+
+    def hits(self, text: str) -> List[Tuple[int, str]]:
+        """Every (position, keyword) occurrence in text, in position order."""
+        return sorted(self._iter(text))
+
+    def scan(self, text: str) -> Hits:
+        """Single pass over text; see Hits for per-group lookups."""
+        # Both backends report occurrences in increasing start order for
+        # any one keyword, so the first one seen is the earliest.
+        found = {}
+        if self._automaton is not None:
+            for end, (offset, kw) in self._automaton.iter(text):
+                if kw not in found:
+                    found[kw] = end - offset
+        elif self._pattern is not None:
+            prefixes = self._prefixes
+            for m in self._pattern.finditer(text):
+                for kw in prefixes[m.group(1)]:
+                    if kw not in found:
+                        found[kw] = m.start()
+        return Hits(self, found)
+
+    def first(self, text: str, group: str) -> Optional[str]:
+        """Shortcut for scan(text).first(group)."""
+        return self.scan(text).first(group)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — MOCK ALIEXPRESS API SERVER
+===============================================
+Local stand-in for https://api-sg.aliexpress.com/sync so the importer's
+concurrency, retries and throughput can be load-tested on a laptop with
+no credentials and no network.
+
+Serves deterministic synthetic furniture for:
+  aliexpress.affiliate.product.query
+  aliexpress.affiliate.hotproduct.query
+  aliexpress.affiliate.productdetail.get
+
+Searches honour min_sale_price / max_sale_price the way the real API
+does: out-of-window items are skipped server side and pages stay full
+(counted as "price_filtered" in /stats).
+
+USAGE:
+  python mock_aliexpress_server.py --port 8765 --latency 120 --jitter 60 \\
+      --error-rate 0.05 --throttle-rps 20 --pages 5
+
+  AE_API_URL=http://127.0.0.1:8765/sync python aliexpress_import.py --bulk --pages 5
+
+  curl http://127.0.0.1:8765/stats     # request / error / throttle counters
+
+Fault injection:
+  --latency/--jitter   Per-request delay in ms (uniform ±jitter)
+  --error-rate         Fraction of requests answered with HTTP 500/502/503
+  --throttle-rps       Above this rate, answer with error_response ApiCallLimit
+  --pages              Result pages available per keyword (then empty pages)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+MATERIALS = ["Velvet", "Bouclé", "Linen", "Leather", "Marble", "Sintered Stone", "Oak", "Walnut", "Glass", "Brass"]
+STYLES = ["Modern", "Nordic", "Italian", "Minimalist", "Luxury", "Mid Century", "Curved", "Tufted"]
+COLORS = ["Grey", "Beige", "Cream", "Black", "Green", "Navy", "Walnut", "Pink"]
+SIZES = ["Single", "Double", "Queen", "King", "2 Seater", "3 Seater", "120cm", "160cm", "200cm"]
+MAX_SCAN_FACTOR = 20   # candidates generated per requested item before a filtered page gives up
+
+
+class MockConfig:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rps=0.0, pages=5, seed=7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.pages = pages
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = []  # request times inside the last second (throttle check)
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "price_filtered": 0, "by_method": {}}
+
+
+def _rng_for(*parts):
+    """Deterministic RNG per keyword/page/id so repeated calls agree."""
+    return random.Random(int(hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()[:12], 16))
+
+
+def make_product(product_id, keywords=""):
+    r = _rng_for("product", product_id)
+    title = " ".join([
+        r.choice(["Hot Sale", "New Arrival", "Free Shipping", ""]),
+        r.choice(STYLES), r.choice(MATERIALS), keywords.title() or "Furniture",
+        r.choice(["For Living Room", "Home Furniture", "Bedroom", ""]),
+    ]).strip()
+    price = round(r.uniform(15, 900), 2)
+    original = round(price * r.choice([1.0, 1.2, 1.6, 2.0]), 2)
+    images = [f"https://ae01.alicdn.com/kf/S{product_id}_{i}.jpg" for i in range(r.randint(1, 6))]
+    return {
+        "product_id": product_id,
+        "product_title": " ".join(title.split()),
+        "target_sale_price": f"{price:.2f}",
+        "target_original_price": f"{original:.2f}",
+        "product_main_image_url": images[0],
+        "product_small_image_urls": {"string": images[1:]},
+        "lastest_volume": r.randint(0, 1500),
+        "evaluate_rate": f"{r.uniform(70, 100):.1f}%",
+        "shop_url": f"https://www.aliexpress.com/store/{r.randint(1000, 9999)}",
+        "promotion_link": f"https://s.click.aliexpress.com/e/_mock{product_id}",
+    }
+
+
+def make_detail(product_id):
+    p = make_product(product_id)
+    r = _rng_for("detail", product_id)
+    p["product_small_image_urls"] = {"string": [f"https://ae01.alicdn.com/kf/S{product_id}_d{i}.jpg" for i in range(r.randint(3, 9))]}
+    p["sku_info"] = (
+        [{"sku_property_name": "Color", "property_value_definition_name": c} for c in r.sample(COLORS, r.randint(1, 4))]
+        + [{"sku_property_name": "Size", "sku_property_value": s} for s in r.sample(SIZES, r.randint(0, 3))]
+    )
+    return p
+
+
+def _price(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def search_page(keywords, page, page_size, min_price=None, max_price=None):
+    """One page of a keyword's results, price-filtered server side like the
+    real API: pages stay full, items outside the window are never sent.
+
+    Returns (products, filtered) — filtered counts the candidates skipped.
+    """
+    base = 1005000000000000 + int(hashlib.md5(keywords.encode()).hexdigest()[:8], 16) % 10**9 * 1000
+    skip = (page - 1) * page_size
+    products, filtered = [], 0
+    for i in range(MAX_SCAN_FACTOR * page * page_size):   # bounded when nothing matches
+        if len(products) == page_size:
+            break
+        product = make_product(base + i, keywords)
+        price = float(product["target_sale_price"])
+        if (min_price is not None and price < min_price) or (max_price is not None and price > max_price):
+            filtered += not skip   # earlier pages' candidates were counted there
+        elif skip:
+            skip -= 1
+        else:
+            products.append(product)
+    return products, filtered
+
+
+def handle_api(config, params):
+    """Build the JSON body for one /sync request."""
+    method = params.get("method", "")
+    page = int(params.get("page_no", 1) or 1)
+    page_size = min(int(params.get("page_size", 20) or 20), 50)
+    keywords = params.get("keywords", "")
+
+    if method in ("aliexpress.affiliate.product.query", "aliexpress.affiliate.hotproduct.query"):
+        products = []
+        if page <= config.pages:
+            products, filtered = search_page(keywords, page, page_size,
+                                             _price(params.get("min_sale_price")), _price(params.get("max_sale_price")))
+            with config.lock:
+                config.stats["price_filtered"] += filtered
+        envelope = method.replace(".", "_") + "_response"
+        return {envelope: {"resp_result": {"resp_code": 200, "resp_msg": "Call succeeds", "result": {
+            "current_page_no": page, "current_record_count": len(products),
+            "total_record_count": config.pages * page_size, "products": {"product": products},
+        }}}}
+
+    if method == "aliexpress.affiliate.productdetail.get":
+        ids = [i for i in params.get("product_ids", "").split(",") if i]
+        products = [make_detail(int(i)) for i in ids if i.isdigit()]
+        return {"aliexpress_affiliate_productdetail_get_response": {"resp_result": {
+            "resp_code": 200, "result": {"current_record_count": len(products), "products": {"product": products}},
+        }}}
+
+    return {"error_response": {"code": "InvalidMethod", "msg": f"Unknown method {method}"}}
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real gateway
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                with config.lock:
+                    return self._send(200, config.stats)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            method = params.get("method", "")
+
+            with config.lock:
+                s = config.stats
+                s["requests"] += 1
+                s["by_method"][method] = s["by_method"].get(method, 0) + 1
+                delay = max(0, config.latency_ms + config.rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+                fail = config.rng.random() < config.error_rate
+                now = time.monotonic()
+                config.window = [t for t in config.window if now - t < 1]
+                throttled = bool(config.throttle_rps) and len(config.window) >= config.throttle_rps
+                config.window.append(now)
+                if fail:
+                    s["errors"] += 1
+                elif throttled:
+                    s["throttled"] += 1
+                else:
+                    s["ok"] += 1
+
+            time.sleep(delay)
+            if fail:
+                return self._send(config.rng.choice([500, 502, 503]), {"error": "injected failure"})
+            if throttled:
+                return self._send(200, {"error_response": {"code": "ApiCallLimit", "msg": "App call limited"}})
+            self._send(200, handle_api(config, params))
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8765, **options):
+    """Start the mock server in a background thread; returns the server."""
+    config = MockConfig(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock AliExpress affiliate API for load testing")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=80, help="mean latency in ms")
+    ap.add_argument("--jitter", type=float, default=40, help="± latency jitter in ms")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of 5xx responses")
+    ap.add_argument("--throttle-rps", type=float, default=0, help="answer ApiCallLimit above this rate")
+    ap.add_argument("--pages", type=int, default=5, help="result pages per keyword")
+    ap.add_argument("--seed", type=int, default=7)
+    a = ap.parse_args()
+
+    server = serve(a.host, a.port, latency_ms=a.latency, jitter_ms=a.jitter, error_rate=a.error_rate,
+                   throttle_rps=a.throttle_rps, pages=a.pages, seed=a.seed)
+    print(f"🧪 Mock AliExpress API on http://{a.host}:{a.port}/sync "
+          f"(latency {a.latency:g}±{a.jitter:g}ms · errors {a.error_rate:.0%} · "
+          f"throttle {a.throttle_rps or '∞'} rps · {a.pages} pages)")
+    print(f"   export AE_API_URL=http://{a.host}:{a.port}/sync")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps(server.config.stats)}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,14 +15,46 @@ USAGE:
   curator = PremiumCurator()
   curated = curator.curate(raw_products)
 
+  # Batch mode over a DataFrame / Arrow table (needs numpy + pandas)
+  curated = curator.curate_frame(df)
+
+  # Same result as curate(), spread over CPU cores
+  curated = curator.curate_parallel(raw_products, workers=8)
+
+  # Streaming, constant memory (listings unranked, featured top-up kept)
+  for listing in curator.curate_iter(feed): ...
+
+  # Reuse per-product results from earlier runs (unchanged feed ≈ free)
+  curator = PremiumCurator(cache=DiskCache(".cache/curation.sqlite", max_bytes=128 * 1024**2))
+
+  # Collapse the same product listed under many ids (see dedup.py)
+  curator = PremiumCurator(dedupers=[ImageDeduper(cache=DiskCache(".cache/image_hash.sqlite"))])
+
   # Standalone demo
   python premium_curator.py
 """
 
+import json
+import os
 import re
 import hashlib
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from time import perf_counter_ns
 from typing import List, Dict, Optional
 
+from disk_cache import DiskCache
+from keyword_matcher import KeywordMatcher
+from stage_timer import StageTimer
+
+try:
+    import numpy as np
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
 # ═══════════════════════════════════════════════════════════════
 # CONSTANTS
 # ═══════════════════════════════════════════════════════════════
@@ -34,6 +66,14 @@ USD_TO_AED = 3.67
 # HELPER: Normalise field names across different input sources
 # ═══════════════════════════════════════════════════════════════
 
+def stable_hash(text: str) -> int:
+    """Same value in every process (unlike hash(), which is salted per run).
+    
+    Use for every "pick one of N" choice, so identical input gives
+    identical listings and downstream files."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
 def _get_cost_usd(product: Dict) -> float:
     """Extract cost in USD from any field format."""
     for key in ["cost_usd", "cost_aed", "cost"]:
@@ -102,13 +142,33 @@ class QualityGates:
     }
     
     @classmethod
-    def evaluate(cls, product: Dict) -> tuple:
-        score = 50
-        reasons = []
+    def find_reject_keyword(cls, text: str) -> Optional[str]:
+        """First REJECT_KEYWORDS entry found in (lower-cased) text, if any."""
+        return TEXT_RULES.scan(text).first("reject")
+    
+    @staticmethod
+    def scan(product: Dict):
+        """One keyword scan of name + description.
         
+        Returns (hits, name_length); hits.within(name_length) are the
+        name-only hits used by the pricing and description steps.
+        """
         name = str(product.get("name", "") or "").lower()
         desc = str(product.get("description", "") or "").lower()
-        full_text = f"{name} {desc}"
+        return TEXT_RULES.scan(f"{name} {desc}"), len(name)
+    
+    @classmethod
+    def min_cost_usd(cls, category: str) -> float:
+        """Price floor for a category (15 USD for unknown categories)."""
+        return cls.MIN_COST_USD.get(str(category).lower(), 15)
+    
+    @classmethod
+    def evaluate(cls, product: Dict, hits=None) -> tuple:
+        score = 50
+        reasons = []
+        
+        if hits is None:
+            hits, _ = cls.scan(product)
         category = str(product.get("category", "")).lower()
         cost_usd = _get_cost_usd(product)
         images = _get_images(product)
@@ -116,12 +176,12 @@ class QualityGates:
         rating = str(product.get("ae_rating", "0") or "0")
         
         # Hard reject
-        for kw in cls.REJECT_KEYWORDS:
-            if kw in full_text:
-                return (False, 0, [f"Rejected: '{kw}'"])
+        kw = hits.first("reject")
+        if kw:
+            return (False, 0, [f"Rejected: '{kw}'"])
         
         # Price floor
-        min_cost = cls.MIN_COST_USD.get(category, 15)
+        min_cost = cls.min_cost_usd(category)
         if 0 < cost_usd < min_cost:
             return (False, 0, [f"Too cheap: ${cost_usd:.0f} < ${min_cost} min for {category}"])
         
@@ -130,7 +190,7 @@ class QualityGates:
             return (False, 0, ["No images"])
         
         # Premium materials
-        mat_count = sum(1 for m in cls.PREMIUM_MATERIALS if m in full_text)
+        mat_count = hits.count("premium")
         if mat_count:
             score += min(mat_count * 7, 28)
             reasons.append(f"{mat_count} premium material(s)")
@@ -236,54 +296,49 @@ class NameTransformer:
         ("bed", "Bed"),  # LAST — only if nothing else matched
     ]
     
-    _counters = {}
-    _used = set()
+    DEFAULT_COLLECTIONS = ["Unicorn", "Elite", "Prima", "Luxe", "Regal"]
+    
+    _namer = None  # CollectionNamer behind the classmethod API
     
     @classmethod
-    def reset(cls):
-        cls._counters = {}
-        cls._used = set()
+    def reset(cls, reserved=()):
+        """Start a new run. `reserved` names (e.g. listings kept from an
+        earlier incremental run) count as already used."""
+        cls._namer = CollectionNamer(reserved)
     
     @classmethod
     def transform(cls, raw_name: str, category: str) -> str:
+        if cls._namer is None:
+            cls.reset()
+        return cls._namer.assign(cls.parts(raw_name, category), category)
+    
+    @classmethod
+    def parts(cls, raw_name: str, category: str) -> tuple:
+        """(material, style, product_type) for a raw title — no run state."""
         name_lower = raw_name.lower()
-        
-        for junk in cls.STRIP:
+        for junk in cls.STRIP:   # in order: "brand new" must go before "new"
             name_lower = name_lower.replace(junk, " ")
         name_lower = re.sub(r'\s+', ' ', name_lower).strip()
+        hits = NAME_RULES.scan(name_lower)
         
         # Detect material
-        material = ""
-        for kw, display in cls.MATERIALS.items():
-            if kw in name_lower:
-                material = display
-                break
+        kw = hits.first("materials")
+        material = cls.MATERIALS[kw] if kw else ""
         
         # Detect style
-        style = ""
-        for kw, display in cls.STYLES.items():
-            if kw in name_lower:
-                style = display
-                break
-        if not style:
-            style = "Modern"
+        kw = hits.first("styles")
+        style = cls.STYLES[kw] if kw else "Modern"
         
         # Detect type (list is ordered longest-first)
-        product_type = ""
-        for kw, display in cls.TYPES:
-            if kw in name_lower:
-                product_type = display
-                break
+        kw = hits.first("types")
+        product_type = _TYPE_NAMES[kw] if kw else ""
         if not product_type:
             product_type = category.replace("-", " ").title() if category else "Furniture"
         
-        # Collection name
-        cat_key = category.lower().strip()
-        collections = cls.COLLECTIONS.get(cat_key, ["Unicorn", "Elite", "Prima", "Luxe", "Regal"])
-        idx = cls._counters.get(cat_key, 0)
-        collection = collections[idx % len(collections)]
-        cls._counters[cat_key] = idx + 1
-        
+        return material, style, product_type
+    
+    @staticmethod
+    def compose(collection: str, material: str, style: str, product_type: str) -> str:
         # Assemble: Collection + Material + [Style] + Type
         parts = [collection]
         if material:
@@ -293,15 +348,42 @@ class NameTransformer:
         elif not material:
             parts.append(style)
         parts.append(product_type)
+        return " ".join(parts)
+
+
+class CollectionNamer:
+    """Collection-name state for one curation run.
+    
+    Each category cycles through its COLLECTIONS in assignment order, so
+    names are deterministic for a given input order. A name already in
+    use moves on to the next collection; if every collection is taken
+    the name gets a numeric suffix, so names never collide.
+    """
+    
+    def __init__(self, reserved=()):
+        self.counters = {}
+        self.used = set(reserved)
+    
+    def assign(self, parts: tuple, category: str) -> str:
+        material, style, product_type = parts
+        cat_key = category.lower().strip()
+        collections = NameTransformer.COLLECTIONS.get(cat_key, NameTransformer.DEFAULT_COLLECTIONS)
+        idx = self.counters.get(cat_key, 0)
         
-        name = " ".join(parts)
-        
-        if name in cls._used:
-            alt = collections[(idx + 1) % len(collections)]
-            name = name.replace(collection, alt)
-            cls._counters[cat_key] = idx + 2
-        cls._used.add(name)
+        for attempt in range(len(collections)):
+            name = NameTransformer.compose(collections[(idx + attempt) % len(collections)], material, style, product_type)
+            if name not in self.used:
+                self.counters[cat_key] = idx + attempt + 1
+                break
+        else:
+            base = NameTransformer.compose(collections[idx % len(collections)], material, style, product_type)
+            n = 2
+            while f"{base} {n}" in self.used:
+                n += 1
+            name = f"{base} {n}"
+            self.counters[cat_key] = idx + 1
         
+        self.used.add(name)
         return name
 
 
@@ -362,20 +444,24 @@ class DescriptionGenerator:
     DEFAULT = "premium materials and expert craftsmanship"
     
     @classmethod
-    def generate(cls, curated_name: str, raw_name: str, category: str) -> str:
-        raw_lower = raw_name.lower()
-        
-        mat = cls.DEFAULT
-        for kw, phrase in cls.MAT_PHRASES.items():
-            if kw in raw_lower:
-                mat = phrase
-                break
-        
+    def generate(cls, curated_name: str, raw_name: str, category: str, hits=None) -> str:
+        if hits is None:
+            hits = TEXT_RULES.scan(raw_name.lower())
+        return cls.render(curated_name, cls.phrase(hits), category)
+    
+    @classmethod
+    def phrase(cls, hits) -> str:
+        """Material phrase for the raw title's keyword hits."""
+        kw = hits.first("mat_phrases")
+        return cls.MAT_PHRASES[kw] if kw else cls.DEFAULT
+    
+    @classmethod
+    def render(cls, curated_name: str, mat: str, category: str) -> str:
         templates = cls.TEMPLATES.get(category.lower(), [
             "The {name} — {mat}. Designed for homes that demand more."
         ])
         
-        return templates[hash(curated_name) % len(templates)].format(name=curated_name, mat=mat)
+        return templates[stable_hash(curated_name) % len(templates)].format(name=curated_name, mat=mat)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -399,7 +485,7 @@ class PricePositioner:
     }
     
     @classmethod
-    def calculate(cls, cost_usd: float, raw_name: str = "") -> Dict:
+    def calculate(cls, cost_usd: float, raw_name: str = "", hits=None) -> Dict:
         if cost_usd <= 0:
             return {"price_aed": 0, "old_price_aed": None, "margin_pct": 0}
         
@@ -409,11 +495,11 @@ class PricePositioner:
                 markup = m
                 break
         
-        name_lower = raw_name.lower()
-        for mat, premium in cls.MATERIAL_PREMIUM.items():
-            if mat in name_lower:
-                markup *= premium
-                break
+        if hits is None:
+            hits = TEXT_RULES.scan(raw_name.lower())
+        mat = hits.first("material_premium")
+        if mat:
+            markup *= cls.MATERIAL_PREMIUM[mat]
         
         raw_price = cost_usd * USD_TO_AED * markup
         
@@ -432,6 +518,36 @@ class PricePositioner:
         margin = round((1 - cost_aed / price) * 100, 1) if price > 0 else 0
         
         return {"price_aed": int(price), "old_price_aed": int(old_price), "margin_pct": margin}
+    
+    @classmethod
+    def tier_markups(cls, cost_usd):
+        """TIERS markup for an array of costs (2.5 outside every tier)."""
+        lows = np.array([t[0] for t in cls.TIERS], dtype=float)
+        highs = np.array([t[1] for t in cls.TIERS], dtype=float)
+        markups = np.array([t[2] for t in cls.TIERS], dtype=float)
+        idx = np.searchsorted(lows, cost_usd, side="right") - 1
+        safe = idx.clip(0)
+        return np.where((idx >= 0) & (cost_usd < highs[safe]), markups[safe], 2.5)
+    
+    @classmethod
+    def calculate_many(cls, cost_usd, material_premium):
+        """Array version of calculate() for costs > 0.
+        
+        material_premium holds each row's MATERIAL_PREMIUM factor (1.0
+        for none). Returns (price_aed, old_price_aed, margin) as float
+        arrays; margin is unrounded so callers can apply Python's round()
+        and match calculate() exactly.
+        """
+        markup = cls.tier_markups(cost_usd) * material_premium
+        raw_price = cost_usd * USD_TO_AED * markup
+        price = np.where(raw_price >= 1000, np.round(raw_price / 100) * 100 - 1,
+                np.where(raw_price >= 200, np.round(raw_price / 50) * 50 - 1,
+                         np.round(raw_price / 10) * 10 - 1))
+        price = np.maximum(price, 199)
+        discount_pct = np.where(cost_usd < 200, 0.30, 0.25)
+        old_price = np.round(price * (1 + discount_pct) / 100) * 100 - 1
+        margin = (1 - cost_usd * USD_TO_AED / price) * 100
+        return price, old_price, margin
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -448,19 +564,79 @@ class ImageCurator:
         for img in images:
             if not img or not isinstance(img, str) or len(img) < 10:
                 continue
-            if any(re.search(p, img, re.IGNORECASE) for p in cls.REJECT):
+            if REJECT_IMAGE_PATTERN.search(img):
                 continue
-            u = re.sub(r'_\d+x\d+', '', img)
+            u = SIZE_SUFFIX_PATTERN.sub('', img)
             if 'alicdn.com' in u:
                 u = u.replace('.webp', '.jpg')
             out.append(u)
         return out[:4]
 
 
+# ═══════════════════════════════════════════════════════════════
+# COMPILED KEYWORD RULES
+# ═══════════════════════════════════════════════════════════════
+# Every keyword list above compiled into one matcher per text:
+#   TEXT_RULES — raw name + description (gates, description, pricing)
+#   NAME_RULES — name after STRIP clean-up (NameTransformer)
+# plus a single compiled regex for ImageCurator.REJECT. STRIP stays a
+# sequential str.replace() loop: each entry sees the previous entries'
+# output, which no single alternation regex reproduces.
+# Call build_rules() after changing any of the lists at runtime.
+#
+# RULESET_VERSION hashes every UPPERCASE constant of the rule classes
+# (keyword lists, TIERS, MIN_COST_USD, templates ...) plus
+# RULESET_REVISION, so cached curation results go stale on their own
+# when a rule changes. Bump RULESET_REVISION when the scoring / pricing
+# *code* changes.
+
+RULESET_REVISION = 2
+
+
+def ruleset_version() -> str:
+    constants = {"revision": RULESET_REVISION, "usd_to_aed": USD_TO_AED}
+    for cls in (QualityGates, NameTransformer, DescriptionGenerator, PricePositioner, ImageCurator):
+        constants[cls.__name__] = {k: v for k, v in vars(cls).items() if k.isupper()}
+    return DiskCache.make_key(constants)
+
+
+def build_rules():
+    global TEXT_RULES, NAME_RULES, _TYPE_NAMES, REJECT_IMAGE_PATTERN, RULESET_VERSION
+    TEXT_RULES = KeywordMatcher({
+        "reject": QualityGates.REJECT_KEYWORDS,
+        "premium": QualityGates.PREMIUM_MATERIALS,
+        "mat_phrases": DescriptionGenerator.MAT_PHRASES,
+        "material_premium": PricePositioner.MATERIAL_PREMIUM,
+    })
+    NAME_RULES = KeywordMatcher({
+        "materials": NameTransformer.MATERIALS,
+        "styles": NameTransformer.STYLES,
+        "types": [kw for kw, _ in NameTransformer.TYPES],
+    })
+    _TYPE_NAMES = {}
+    for kw, display in NameTransformer.TYPES:
+        _TYPE_NAMES.setdefault(kw, display)
+    REJECT_IMAGE_PATTERN = re.compile("|".join(ImageCurator.REJECT), re.IGNORECASE)
+    RULESET_VERSION = ruleset_version()
+
+
+SIZE_SUFFIX_PATTERN = re.compile(r'_\d+x\d+')
+
+build_rules()
+
+
 # ═══════════════════════════════════════════════════════════════
 # BADGE ASSIGNER
 # ═══════════════════════════════════════════════════════════════
 
+FEATURED_BADGES = ("Premium", "Exclusive", "Best Seller")
+
+
+def featured_flag(score: int, badge: str) -> str:
+    """A listing's own featured flag, before PremiumCurator's top-up."""
+    return "YES" if (score >= 65 or badge in FEATURED_BADGES) else "NO"
+
+
 def assign_badge(product: Dict, score: int, cost_usd: float) -> str:
     orders = int(product.get("ae_orders", 0) or 0)
     if cost_usd > 500 and score >= 75: return "Premium"
@@ -470,93 +646,594 @@ def assign_badge(product: Dict, score: int, cost_usd: float) -> str:
     return "New"
 
 
+# ═══════════════════════════════════════════════════════════════
+# PER-PRODUCT STAGE (order-independent, safe to run in workers)
+# ═══════════════════════════════════════════════════════════════
+
+_DEFAULT_ID = "__default_product_id__"
+
+
+_DERIVE_STAGES = ("gate", "price", "images", "naming", "description")
+_GATE_STAGE = ("gate",)
+_COMPLETE_STAGES = ("collection_name", "render")
+
+
+def derive_product(product: Dict, timer: Optional[StageTimer] = None) -> tuple:
+    """The computed part of prepare_product(), as compact plain values.
+    
+    Returns (False, reason) or (True, DERIVED_FIELDS values). This is
+    what curate_parallel() workers send back and what the curation
+    cache stores; everything else in a listing is copied from the raw
+    product by _listing(). `timer` gets one sample per stage; without
+    one, no clock is read at all.
+    """
+    timed = timer is not None
+    t0 = perf_counter_ns() if timed else 0
+    hits, name_length = QualityGates.scan(product)
+    passes, score, reasons = QualityGates.evaluate(product, hits)
+    if not passes:
+        if timed:
+            timer.lap(_GATE_STAGE, (t0, perf_counter_ns()), total="product")
+        return (False, reasons[0] if reasons else 'low score')
+    t1 = perf_counter_ns() if timed else 0
+    
+    raw_name = str(product.get("name", ""))
+    category = str(product.get("category", "uncategorized")).lower().strip()
+    cost_usd = _get_cost_usd(product)
+    images = _get_images(product)
+    name_hits = hits.within(name_length)
+    
+    if cost_usd > 0:
+        pricing = PricePositioner.calculate(cost_usd, raw_name, name_hits)
+    else:
+        existing = int(product.get("price_aed", 0) or 0)
+        if existing > 0:
+            pricing = {"price_aed": existing, "old_price_aed": round(existing * 1.28 / 100) * 100 - 1, "margin_pct": 0}
+        else:
+            pricing = {"price_aed": 999, "old_price_aed": 1299, "margin_pct": 0}
+    
+    badge = assign_badge(product, score, cost_usd)
+    featured = featured_flag(score, badge)
+    t2 = perf_counter_ns() if timed else 0
+    images = ImageCurator.curate(images)
+    t3 = perf_counter_ns() if timed else 0
+    parts = NameTransformer.parts(raw_name, category)
+    t4 = perf_counter_ns() if timed else 0
+    mat = DescriptionGenerator.phrase(name_hits)
+    
+    if timed:
+        timer.lap(_DERIVE_STAGES, (t0, t1, t2, t3, t4, perf_counter_ns()), total="product")
+    return (True, (
+        category, pricing["price_aed"], pricing["old_price_aed"], badge, featured,
+        images, round(cost_usd, 2), round(cost_usd * USD_TO_AED),
+        pricing["margin_pct"], score, parts, mat,
+    ))
+
+
+def _listing(product: Dict, derived) -> tuple:
+    """prepare_product() result from a product and its derive_product() value."""
+    ok, values = derived
+    if not ok:
+        return (False, (str(product.get('name', '')), values))
+    (category, price_aed, old_price_aed, badge, featured, images,
+     cost_usd, cost_aed, margin_pct, score, parts, mat) = values
+    return (True, {
+        "product_id": product.get("product_id", _DEFAULT_ID),
+        "name": "",
+        "raw_name": str(product.get("name", "")),
+        "category": category,
+        "description": "",
+        "price_aed": price_aed,
+        "old_price_aed": old_price_aed,
+        "badge": badge,
+        "featured": featured,
+        "active": "YES",
+        "colors": product.get("colors", ""),
+        "sizes": product.get("sizes", ""),
+        "images": list(images),
+        "cost_usd": cost_usd,
+        "cost_aed": cost_aed,
+        "margin_pct": margin_pct,
+        "delivery_days": product.get("delivery_days", 21),
+        "ae_url": product.get("ae_url", ""),
+        "ae_orders": product.get("ae_orders", 0),
+        "ae_rating": product.get("ae_rating", ""),
+        "quality_score": score,
+        "_parts": tuple(parts),
+        "_mat": mat,
+    })
+
+
+def prepare_product(product: Dict) -> tuple:
+    """Everything about one product that does not depend on the others.
+    
+    Returns (False, (raw_name, reason)) or (True, listing) where the listing
+    still lacks its collection name and description; PremiumCurator
+    fills those in input order (see _assemble). "_parts" / "_mat" carry
+    the naming and description inputs.
+    """
+    return _listing(product, derive_product(product))
+
+
+def _derive_chunk(products: List[Dict], timer: Optional[StageTimer] = None) -> List[tuple]:
+    return [derive_product(p, timer) for p in products]
+
+
+def _derive_chunk_timed(products: List[Dict]) -> tuple:
+    """_derive_chunk() for worker processes: (values, StageTimer state)."""
+    timer = StageTimer()
+    return _derive_chunk(products, timer), timer.state()
+
+
+# Every raw field derive_product() reads (directly or via the helpers).
+# Only these go into the cache key, so fields that are merely copied
+# (ids, URLs, colours) or not used at all do not cause misses. Keep in
+# sync when the derivation reads more.
+CURATION_FIELDS = (
+    "name", "description", "category", "cost_usd", "cost_aed", "cost", "price_aed",
+    "images", "image_url", "image_url_1", "image_url_2", "image_url_3", "image_url_4",
+    "ae_orders", "ae_rating",
+)
+
+
+_key_encoder = json.JSONEncoder(separators=(",", ":"), default=str, ensure_ascii=False, check_circular=False).encode
+
+
+def curation_key(product: Dict) -> str:
+    """Cache key for derive_product(product) under the current rules.
+    
+    Fields are encoded in CURATION_FIELDS order, so no key sorting is
+    needed; values JSON cannot encode fall back to str().
+    """
+    fields = [(f, product[f]) for f in CURATION_FIELDS if f in product]
+    return hashlib.blake2b(_key_encoder([RULESET_VERSION, fields]).encode(), digest_size=16).hexdigest()
+
+
+# Order counts and ratings drift daily, but curation only reads them
+# against these thresholds (QualityGates.evaluate, assign_badge)
+ORDER_THRESHOLDS = (50, 100, 200)
+RATING_THRESHOLDS = (75, 90, 95)
+# Raw fields _listing() copies into the listing as they are
+LISTING_COPY_FIELDS = ("ae_url", "colors", "sizes", "delivery_days")
+
+
+def _rating(product: Dict):
+    try:
+        return float(str(product.get("ae_rating", "0") or "0").replace("%", ""))
+    except ValueError:
+        return None
+
+
+def change_key(product: Dict) -> str:
+    """Hash of everything a product's listing depends on, for incremental imports.
+    
+    CURATION_FIELDS plus the copied fields, except that ae_orders and
+    ae_rating only count by which side of each threshold they fall on,
+    so a listing is not re-curated each time its order count ticks up.
+    Unlike curation_key(), rule changes do not count: reprice.py updates
+    stored prices; for other rule changes, delete the state file.
+    """
+    orders = int(product.get("ae_orders", 0) or 0)
+    rating = _rating(product)
+    fields = [(f, product[f]) for f in CURATION_FIELDS + LISTING_COPY_FIELDS
+              if f in product and f not in ("ae_orders", "ae_rating")]
+    low, *high = RATING_THRESHOLDS
+    fields.append(("orders", [orders > t for t in ORDER_THRESHOLDS]))
+    fields.append(("rating", None if rating is None else [rating < low] + [rating > t for t in high]))
+    return hashlib.blake2b(_key_encoder(fields).encode(), digest_size=16).hexdigest()
+
+
 # ═══════════════════════════════════════════════════════════════
 # MASTER CURATOR
 # ═══════════════════════════════════════════════════════════════
 
 class PremiumCurator:
     
-    def __init__(self, min_score=40):
+    FEATURED_MIN = 6     # top-scoring listings forced to featured if fewer qualify
+    REJECT_SAMPLE = 25   # rejection lines kept for the report (counts cover all)
+    CACHE_BATCH = 1000   # products per cache lookup / write transaction
+    
+    def __init__(self, min_score=40, cache: Optional[DiskCache] = None, image_probe=None, dedupers=()):
+        """`cache` (a DiskCache) memoizes derive_product() across runs,
+        keyed by curation_key(); naming and descriptions are still done
+        per run because they depend on the rest of the feed.
+        
+        `image_probe` (image_probe.ImageProbe) checks every image URL
+        first and keeps only live, large-enough ones, so the image gate
+        and score see real images (curate / curate_parallel / curate_iter).
+        
+        `dedupers` (e.g. dedup.ImageDeduper) each collapse near-duplicate
+        listings to their best one, in order, after scoring and before
+        naming (curate / curate_parallel). Dropped listings are counted
+        as "Duplicate of ..." rejections.
+        
+        Every run is timed per stage (`self.timer`, a StageTimer): per
+        product for gate / price / images / naming / description and the
+        final collection_name / render pass, per batch for probe, cache,
+        dedupe and rank. stats["timings"] holds the summary (p50/p95/p99,
+        throughput); export_stats() writes stats as JSON.
+        """
         self.min_score = min_score
-        self.stats = {"input": 0, "passed": 0, "rejected": 0, "reject_log": [], "avg_score": 0, "avg_margin": 0}
+        self.cache = cache
+        self.image_probe = image_probe
+        self.dedupers = list(dedupers)
+        self.timer = StageTimer()
+        self.stats = {"input": 0, "passed": 0, "rejected": 0, "reject_log": [], "reject_reasons": {},
+                      "avg_score": 0, "avg_margin": 0, "cache_hits": 0, "timings": {}}
+    
+    def _reject(self, raw_name: str, reason: str):
+        """Count a rejection under its normalised reason; keep a capped sample of lines."""
+        self.stats["rejected"] += 1
+        key = re.sub(r"\d+", "#", reason)
+        self.stats["reject_reasons"][key] = self.stats["reject_reasons"].get(key, 0) + 1
+        if len(self.stats["reject_log"]) < self.REJECT_SAMPLE:
+            self.stats["reject_log"].append(f"  ✗ {raw_name[:45]}  → {reason}")
+    
+    def curate(self, raw_products: List[Dict], reserved_names=()) -> List[Dict]:
+        return self._curate(self._checked(raw_products), reserved_names)
+    
+    def _checked(self, raw_products):
+        """raw_products with their images verified by self.image_probe (if set)."""
+        if self.image_probe is None:
+            return raw_products
+        with self.timer.batch("probe", len(raw_products)):
+            return list(self.image_probe.verify(raw_products))
     
-    def curate(self, raw_products: List[Dict]) -> List[Dict]:
+    def _curate(self, raw_products: List[Dict], reserved_names=()) -> List[Dict]:
         self.stats["input"] = len(raw_products)
-        curated = []
-        scores = []
-        margins = []
+        if self.cache is not None:
+            return self._assemble(self._prepared(raw_products), reserved_names)
+        return self._assemble(self._derived(raw_products), reserved_names)
+    
+    def _derived(self, raw_products):
+        """prepare_product() results in input order, timed."""
+        timer = self.timer
+        for product in raw_products:
+            yield _listing(product, derive_product(product, timer))
+    
+    def _prepared(self, raw_products, derive_many=None, batch_size=None):
+        """prepare_product() results in input order, through self.cache.
+        
+        Works in batches: one lookup per batch, derive_many() on the
+        misses only, one write for the fresh derive_product() values.
+        """
+        batch_size = batch_size or self.CACHE_BATCH
+        derive_many = derive_many or (lambda todo: _derive_chunk(todo, self.timer))
+        products = iter(raw_products)
+        while True:
+            batch = list(islice(products, batch_size))
+            if not batch:
+                return
+            with self.timer.batch("cache_read", len(batch)):
+                keys = [curation_key(p) for p in batch]
+                cached = self.cache.get_many(keys)
+            todo = [p for p, key in zip(batch, keys) if key not in cached]
+            if todo:
+                fresh = derive_many(todo)
+                with self.timer.batch("cache_write", len(todo)):
+                    self.cache.set_many(dict(zip((key for key in keys if key not in cached), fresh)))
+                cached.update(zip((key for key in keys if key not in cached), fresh))
+            self.stats["cache_hits"] += len(batch) - len(todo)
+            
+            for product, key in zip(batch, keys):
+                yield _listing(product, cached[key])
+    
+    def curate_parallel(self, raw_products: List[Dict], workers=None, reserved_names=(), chunk_size=None) -> List[Dict]:
+        """curate() with the per-product work spread over worker processes.
         
-        NameTransformer.reset()
+        Workers run derive_product() on shards of the feed; the parent
+        then names and describes the survivors in input order, so the
+        result is identical to curate(). Workers import this module
+        fresh on spawn-based platforms, so rule lists changed at runtime
+        are only seen there on fork.
+        """
+        workers = workers or os.cpu_count() or 1
+        raw_products = self._checked(raw_products)
+        n = len(raw_products)
+        chunk_size = chunk_size or max(250, -(-n // (workers * 4)))
+        if workers <= 1 or n <= chunk_size:
+            return self._curate(raw_products, reserved_names)
         
-        for product in raw_products:
-            passes, score, reasons = QualityGates.evaluate(product)
-            if not passes:
-                self.stats["rejected"] += 1
-                self.stats["reject_log"].append(
-                    f"  ✗ {str(product.get('name',''))[:45]}  → {reasons[0] if reasons else 'low score'}"
-                )
+        self.stats["input"] = n
+        
+        def derive_many(products):
+            if len(products) <= chunk_size:
+                return _derive_chunk(products, self.timer)
+            chunks = [products[i:i + chunk_size] for i in range(0, len(products), chunk_size)]
+            return chain.from_iterable(timed(pool.map(_derive_chunk_timed, chunks)))
+        
+        def timed(results):
+            for values, timer_state in results:
+                self.timer.merge(timer_state)
+                yield values
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if self.cache is not None:
+                # Only cache misses go to the workers
+                prepared = self._prepared(raw_products, lambda todo: list(derive_many(todo)), batch_size=n)
+            else:
+                prepared = map(_listing, raw_products, derive_many(raw_products))
+            return self._assemble(prepared, reserved_names)
+    
+    def _assemble(self, prepared, reserved_names=()) -> List[Dict]:
+        """Reconciliation pass over prepare_product() results, in input order."""
+        namer = CollectionNamer(reserved_names)
+        passed = []
+        for ok, item in prepared:
+            if not ok:
+                self._reject(*item)
+                continue
+            passed.append(item)
+        
+        for deduper in self.dedupers:
+            with self.timer.batch(f"dedupe_{deduper.label}", len(passed)):
+                passed, dropped = deduper.collapse(passed)
+            for item, kept in dropped:
+                self._reject(item["raw_name"], f"Duplicate of {kept['product_id']} ({deduper.label})")
+        
+        scores = [item["quality_score"] for item in passed]
+        margins = [item["margin_pct"] for item in passed]
+        curated = [self._complete(item, namer, position, self.timer) for position, item in enumerate(passed, 1)]
+        return self._finish(curated, scores, margins)
+    
+    @staticmethod
+    def _complete(item: Dict, namer: "CollectionNamer", position: int, timer: Optional[StageTimer] = None) -> Dict:
+        """Name and describe a prepared listing (position = 1-based pass order)."""
+        timed = timer is not None
+        t0 = perf_counter_ns() if timed else 0
+        premium_name = namer.assign(item.pop("_parts"), item["category"])
+        mat = item.pop("_mat")
+        if item["product_id"] == _DEFAULT_ID:
+            item["product_id"] = f"UF-{position:03d}"
+        item["name"] = premium_name
+        t1 = perf_counter_ns() if timed else 0
+        item["description"] = DescriptionGenerator.render(premium_name, mat, item["category"])
+        if timed:
+            timer.lap(_COMPLETE_STAGES, (t0, t1, perf_counter_ns()))
+        return item
+    
+    def curate_iter(self, raw_products, reserved_names=()):
+        """Yield curated listings as they pass, in (roughly) input order.
+        
+        Memory stays constant for any feed size: only a min-heap of the
+        FEATURED_MIN best-scoring listings is held back. Once that many
+        listings are featured on their own, the heap is flushed and
+        everything streams; otherwise the held listings get the same
+        featured top-up as curate() at the end of the feed. Their ids are
+        left in stats["featured_ids"]. Rejections are kept as counters
+        plus a capped sample (see _reject). Collapsing duplicates needs
+        the whole feed, so a curator with dedupers cannot stream.
+        """
+        if self.dedupers:
+            raise ValueError("curate_iter() cannot collapse duplicates; use curate() with dedupers")
+        namer = CollectionNamer(reserved_names)
+        held = []  # (score, -seq, listing): worst candidate on top
+        featured = passed = 0
+        score_sum = margin_sum = 0
+        self.stats["featured_ids"] = []
+        
+        if self.image_probe is not None:
+            raw_products = self.image_probe.verify(raw_products)
+        
+        def counted():
+            for product in raw_products:
+                self.stats["input"] += 1
+                yield product
+        
+        prepared = self._prepared(counted()) if self.cache is not None else self._derived(counted())
+        for ok, item in prepared:
+            if not ok:
+                self._reject(*item)
                 continue
             
-            scores.append(score)
-            raw_name = str(product.get("name", ""))
-            category = str(product.get("category", "uncategorized")).lower().strip()
-            cost_usd = _get_cost_usd(product)
-            images = _get_images(product)
-            
-            premium_name = NameTransformer.transform(raw_name, category)
-            
-            if cost_usd > 0:
-                pricing = PricePositioner.calculate(cost_usd, raw_name)
-            else:
-                existing = int(product.get("price_aed", 0) or 0)
-                if existing > 0:
-                    pricing = {"price_aed": existing, "old_price_aed": round(existing * 1.28 / 100) * 100 - 1, "margin_pct": 0}
-                else:
-                    pricing = {"price_aed": 999, "old_price_aed": 1299, "margin_pct": 0}
+            passed += 1
+            score_sum += item["quality_score"]
+            margin_sum += item["margin_pct"]
+            listing = self._complete(item, namer, passed, self.timer)
+            if listing["featured"] == "YES":
+                featured += 1
             
-            margins.append(pricing["margin_pct"])
-            description = DescriptionGenerator.generate(premium_name, raw_name, category)
-            curated_images = ImageCurator.curate(images)
-            badge = assign_badge(product, score, cost_usd)
-            featured = "YES" if (score >= 65 or badge in ["Premium", "Exclusive", "Best Seller"]) else "NO"
+            if featured >= self.FEATURED_MIN:
+                while held:
+                    yield heapq.heappop(held)[2]
+                yield listing
+                continue
             
-            curated.append({
-                "product_id": product.get("product_id", f"UF-{len(curated)+1:03d}"),
-                "name": premium_name,
-                "raw_name": raw_name,
-                "category": category,
-                "description": description,
-                "price_aed": pricing["price_aed"],
-                "old_price_aed": pricing["old_price_aed"],
-                "badge": badge,
-                "featured": featured,
-                "active": "YES",
-                "colors": product.get("colors", ""),
-                "sizes": product.get("sizes", ""),
-                "images": curated_images,
-                "cost_usd": round(cost_usd, 2),
-                "cost_aed": round(cost_usd * USD_TO_AED),
-                "margin_pct": pricing["margin_pct"],
-                "delivery_days": product.get("delivery_days", 21),
-                "ae_url": product.get("ae_url", ""),
-                "ae_orders": product.get("ae_orders", 0),
-                "ae_rating": product.get("ae_rating", ""),
-                "quality_score": score,
-            })
+            entry = (listing["quality_score"], -passed, listing)
+            if len(held) < self.FEATURED_MIN:
+                heapq.heappush(held, entry)
+                continue
+            if entry[:2] > held[0][:2]:
+                entry = heapq.heapreplace(held, entry)
+            yield entry[2]
         
-        curated.sort(key=lambda x: x.get("quality_score", 0), reverse=True)
+        top = sorted(held, reverse=True, key=lambda e: e[:2])
+        if featured < self.FEATURED_MIN:
+            for _, _, listing in top:
+                listing["featured"] = "YES"
+                self.stats["featured_ids"].append(listing["product_id"])
         
-        featured_count = sum(1 for p in curated if p["featured"] == "YES")
-        if featured_count < 6:
-            for p in curated[:min(6, len(curated))]:
+        self.stats["passed"] = passed
+        self.stats["avg_score"] = round(score_sum / passed, 1) if passed else 0
+        self.stats["avg_margin"] = round(margin_sum / passed, 1) if passed else 0
+        self.stats["timings"] = self.timer.report()
+        for _, _, listing in top:
+            yield listing
+    
+    @classmethod
+    def top_up_featured(cls, listings):
+        """Feature the FEATURED_MIN best-scoring listings if fewer are featured."""
+        if sum(1 for p in listings if p["featured"] == "YES") < cls.FEATURED_MIN:
+            for p in sorted(listings, key=lambda x: x.get("quality_score", 0), reverse=True)[:cls.FEATURED_MIN]:
                 p["featured"] = "YES"
+    
+    def _finish(self, curated, scores, margins):
+        """Rank, top up featured listings and record stats."""
+        with self.timer.batch("rank", len(curated)):
+            curated.sort(key=lambda x: x.get("quality_score", 0), reverse=True)
+            self.top_up_featured(curated)
         
         self.stats["passed"] = len(curated)
         self.stats["avg_score"] = round(sum(scores) / len(scores), 1) if scores else 0
         self.stats["avg_margin"] = round(sum(margins) / len(margins), 1) if margins else 0
+        self.stats["timings"] = self.timer.report()
         
         return curated
     
+    def curate_frame(self, frame, reserved_names=()) -> List[Dict]:
+        """Batch version of curate() for a DataFrame or Arrow table.
+        
+        Gates, scores, tier markups, price rounding and badges are
+        computed as array operations; only the text steps (keyword scan,
+        naming, descriptions, images) run per row. The result is
+        identical to curate(frame.to_dict("records")) for a curator
+        without dedupers.
+        """
+        if self.dedupers:
+            raise ValueError("curate_frame() does not collapse duplicates; use curate() with dedupers")
+        if not HAS_PANDAS:
+            raise ImportError("curate_frame needs numpy and pandas: pip install numpy pandas")
+        df = frame.to_pandas() if hasattr(frame, "to_pandas") else pd.DataFrame(frame)
+        df = df.reset_index(drop=True)
+        n = len(df)
+        self.stats["input"] = n
+        
+        def values(col, default):
+            return df[col].tolist() if col in df.columns else [default] * n
+        
+        def numbers(col):
+            if col not in df.columns:
+                return np.zeros(n)
+            return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        
+        # ── Field extraction (same precedence as _get_cost_usd / _get_images) ──
+        t0 = perf_counter_ns()
+        cost = np.zeros(n)
+        unset = np.ones(n, dtype=bool)
+        for key in ["cost_usd", "cost_aed", "cost"]:
+            v = numbers(key)
+            take = unset & (v > 0)
+            cost[take] = v[take] / USD_TO_AED if "aed" in key else v[take]
+            unset &= ~take
+        
+        image_cols = [c for c in ["images", "image_url_1", "image_url_2", "image_url_3", "image_url_4", "image_url"]
+                      if c in df.columns]
+        image_rows = zip(*(df[c].tolist() for c in image_cols)) if image_cols else ([] for _ in range(n))
+        images = [
+            _get_images({k: list(v) if isinstance(v, (tuple, np.ndarray)) else v for k, v in zip(image_cols, row)})
+            for row in image_rows
+        ]
+        image_count = np.array([len(i) for i in images], dtype=int)
+        
+        raw_names = values("name", "")
+        texts = [f"{str(nm or '').lower()} {str(d or '').lower()}" for nm, d in zip(raw_names, values("description", ""))]
+        name_lengths = [len(str(nm or "").lower()) for nm in raw_names]
+        hits = [TEXT_RULES.scan(t) for t in texts]
+        reject_kw = [h.first("reject") for h in hits]
+        mat_count = np.array([h.count("premium") for h in hits], dtype=int)
+        
+        gate_categories = [str(c).lower() for c in values("category", "")]
+        min_cost = np.array([QualityGates.min_cost_usd(c) for c in gate_categories], dtype=float)
+        orders = np.nan_to_num(numbers("ae_orders")).astype(int)
+        rating_text = pd.Series([str(r or "0").replace("%", "").strip() for r in values("ae_rating", "0")], dtype=object)
+        rating = pd.to_numeric(rating_text, errors="coerce").to_numpy(dtype=float)
+        
+        # ── Quality gates + score ──
+        t1 = perf_counter_ns()
+        self.timer.add_batch("frame_extract", t1 - t0, n)
+        rejected_kw = np.array([kw is not None for kw in reject_kw], dtype=bool)
+        too_cheap = ~rejected_kw & (cost > 0) & (cost < min_cost)
+        no_images = ~rejected_kw & ~too_cheap & (image_count == 0)
+        score = (50 + np.minimum(mat_count * 7, 28)
+                 + np.select([image_count >= 3, image_count == 1], [8, -3], 0)
+                 + np.select([orders > 200, orders > 50], [12, 7], 0)
+                 + np.select([rating > 95, rating > 90, rating < 75], [8, 4, -8], 0))
+        low_score = ~rejected_kw & ~too_cheap & ~no_images & (score < 40)
+        passes = ~(rejected_kw | too_cheap | no_images | low_score)
+        score = np.minimum(score, 100)
+        
+        for i in np.flatnonzero(~passes):
+            if rejected_kw[i]:
+                reason = f"Rejected: '{reject_kw[i]}'"
+            elif too_cheap[i]:
+                reason = f"Too cheap: ${cost[i]:.0f} < ${QualityGates.min_cost_usd(gate_categories[i])} min for {gate_categories[i]}"
+            elif no_images[i]:
+                reason = "No images"
+            elif mat_count[i]:
+                reason = f"{mat_count[i]} premium material(s)"
+            elif orders[i] > 200:
+                reason = f"High demand ({orders[i]})"
+            elif orders[i] > 50:
+                reason = f"Good demand ({orders[i]})"
+            else:
+                reason = f"Score {score[i]}/100 below threshold"
+            self._reject(str(raw_names[i]), reason)
+        
+        # ── Pricing (passing rows) ──
+        t2 = perf_counter_ns()
+        self.timer.add_batch("frame_gate", t2 - t1, n)
+        keep = np.flatnonzero(passes)
+        name_hits = [hits[i].within(name_lengths[i]) for i in keep]
+        premium = np.array([PricePositioner.MATERIAL_PREMIUM.get(h.first("material_premium"), 1.0) for h in name_hits])
+        kept_cost = cost[keep]
+        priced = kept_cost > 0
+        price, old_price, margin = PricePositioner.calculate_many(np.where(priced, kept_cost, 1.0), premium)
+        existing = np.nan_to_num(numbers("price_aed")[keep]).astype(int)
+        price = np.where(priced, price, np.where(existing > 0, existing, 999)).astype(int)
+        old_price = np.where(priced, old_price,
+                    np.where(existing > 0, np.round(existing * 1.28 / 100) * 100 - 1, 1299)).astype(int)
+        margin = [round(m, 1) if p else 0 for m, p in zip(margin.tolist(), priced.tolist())]
+        
+        kept_score = score[keep]
+        kept_orders = orders[keep]
+        badge = np.select(
+            [(kept_cost > 500) & (kept_score >= 75), kept_cost > 800, kept_orders > 100],
+            ["Premium", "Exclusive", "Best Seller"], "New")
+        featured = np.where((kept_score >= 65) | np.isin(badge, ["Premium", "Exclusive", "Best Seller"]), "YES", "NO")
+        
+        # ── Naming + assembly, in input order ──
+        t3 = perf_counter_ns()
+        self.timer.add_batch("frame_price", t3 - t2, len(keep))
+        namer = CollectionNamer(reserved_names)
+        product_ids = values("product_id", None)
+        has_id = "product_id" in df.columns
+        categories = values("category", "uncategorized")
+        passthrough = {k: values(k, d) for k, d in [("colors", ""), ("sizes", ""), ("delivery_days", 21),
+                                                   ("ae_url", ""), ("ae_orders", 0), ("ae_rating", "")]}
+        cost_list = kept_cost.tolist()
+        curated = []
+        for j, i in enumerate(keep.tolist()):
+            raw_name = str(raw_names[i])
+            category = str(categories[i]).lower().strip()
+            premium_name = namer.assign(NameTransformer.parts(raw_name, category), category)
+            c = cost_list[j]
+            curated.append({
+                "product_id": product_ids[i] if has_id else f"UF-{len(curated)+1:03d}",
+                "name": premium_name,
+                "raw_name": raw_name,
+                "category": category,
+                "description": DescriptionGenerator.render(premium_name, DescriptionGenerator.phrase(name_hits[j]), category),
+                "price_aed": int(price[j]),
+                "old_price_aed": int(old_price[j]),
+                "badge": str(badge[j]),
+                "featured": str(featured[j]),
+                "active": "YES",
+                "colors": passthrough["colors"][i],
+                "sizes": passthrough["sizes"][i],
+                "images": ImageCurator.curate(images[i]),
+                "cost_usd": round(c, 2) if c > 0 else 0,
+                "cost_aed": round(c * USD_TO_AED) if c > 0 else 0,
+                "margin_pct": margin[j],
+                "delivery_days": passthrough["delivery_days"][i],
+                "ae_url": passthrough["ae_url"][i],
+                "ae_orders": passthrough["ae_orders"][i],
+                "ae_rating": passthrough["ae_rating"][i],
+                "quality_score": int(kept_score[j]),
+            })
+        
+        self.timer.add_batch("frame_assemble", perf_counter_ns() - t3, len(curated))
+        return self._finish(curated, kept_score.tolist(), margin)
+    
     def print_report(self):
         s = self.stats
         print(f"\n{'='*60}")
@@ -567,11 +1244,33 @@ class PremiumCurator:
         print(f"  Rejected:       {s['rejected']} products")
         print(f"  Avg quality:    {s['avg_score']}/100")
         print(f"  Avg margin:     {s['avg_margin']}%")
+        if self.cache is not None:
+            print(f"  Cache hits:     {s['cache_hits']} products (ruleset {RULESET_VERSION[:12]})")
+        if s['timings']:
+            print(f"\n  Timing:           total ms      items/s     p50 µs     p95 µs     p99 µs")
+            for stage, t in s['timings'].items():
+                rate = f"{t['per_second']:>12,}" if t['per_second'] else f"{'—':>12}"
+                line = f"    {stage:<15}{t['total_ms']:>11,.1f} {rate}"
+                if 'p50_us' in t:
+                    line += f" {t['p50_us']:>10,.1f} {t['p95_us']:>10,.1f} {t['p99_us']:>10,.1f}"
+                print(line)
         if s['reject_log']:
             print(f"\n  Rejections:")
             for r in s['reject_log']:
                 print(f"  {r}")
+            if s['rejected'] > len(s['reject_log']):
+                print(f"    … and {s['rejected'] - len(s['reject_log'])} more. By reason:")
+                for reason, count in sorted(s['reject_reasons'].items(), key=lambda kv: -kv[1])[:10]:
+                    print(f"    {count:>7}  {reason}")
         print(f"{'='*60}")
+    
+    def export_stats(self, path):
+        """Write stats (counts, rejection reasons, stage timings) as JSON for dashboards."""
+        stats = {k: v for k, v in self.stats.items() if k != "reject_log"}
+        stats["ruleset"] = RULESET_VERSION
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -15,7 +15,8 @@ HOW TO USE:
 The script:
   - Extracts product IDs from URLs  
   - Uses publicly available product data
-  - Auto-generates your spreadsheet
+  - Writes the product catalog (unicorn-furniture-catalog.jsonl)
+    plus a review spreadsheet (skip it with --no-xlsx)
   - Runs the site generator
 
 EVEN SIMPLER:
@@ -30,9 +31,11 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+from catalog_io import write_catalog, write_product_workbook
+from keyword_matcher import KeywordMatcher
 
 MARKUP = 2.5
 USD_TO_AED = 3.67
@@ -47,13 +50,13 @@ CATEGORY_MAP = {
 }
 
 
+CATEGORY_RULES = KeywordMatcher({"category": CATEGORY_MAP})
+
+
 def guess_category(name):
-    """Guess product category from name."""
-    name_lower = name.lower()
-    for keyword, cat in CATEGORY_MAP.items():
-        if keyword in name_lower:
-            return cat
-    return "uncategorized"
+    """Guess product category from name (first CATEGORY_MAP keyword, in map order)."""
+    keyword = CATEGORY_RULES.first(name.lower(), "category")
+    return CATEGORY_MAP[keyword] if keyword else "uncategorized"
 
 
 def parse_aliexpress_urls(url_file):
@@ -78,65 +81,112 @@ def parse_aliexpress_urls(url_file):
     return products
 
 
+CSV_TEXT_COLUMNS = [
+    "product_id", "sku", "name", "category", "badge", "description", "colors", "sizes",
+    "featured", "image_url", "image", "image_url_1", "img", "image_url_2", "image_url_3", "image_url_4",
+]
+CSV_NUMBER_COLUMNS = [
+    "price", "price_aed", "selling_price", "cost", "cost_aed", "cost_usd",
+    "old_price", "delivery_days",
+]
+
+
+def _first_present(df, columns):
+    """Per row, the value of the first listed column that has one (NaN if none)."""
+    present = [c for c in columns if c in df.columns]
+    if not present:
+        return pd.Series(float("nan"), index=df.index, dtype=object)
+    first = df[present[0]].astype(object)
+    for col in present[1:]:
+        first = first.where(first.notna(), df[col].astype(object))
+    return first
+
+
+def _to_number(col, strip_aed=False):
+    text = col.astype(str).str.replace(",", "", regex=False)
+    if strip_aed:
+        text = text.str.replace("AED", "", regex=False)
+    return pd.to_numeric(text.str.strip(), errors="coerce").where(col.notna())
+
+
+def _text_or_empty(df, name):
+    if name not in df.columns:
+        return [""] * len(df)
+    col = df[name]
+    return col.where(col.notna(), "").astype(str).tolist()
+
+
 def parse_csv(csv_file):
-    """Read products from a simple CSV file."""
-    products = []
-    df = pd.read_csv(csv_file)
-    
-    for _, row in df.iterrows():
-        name = str(row.get("name", row.iloc[0]))
-        category = str(row.get("category", "")) or guess_category(name)
-        
-        price = 0
-        for col in ["price", "price_aed", "selling_price"]:
-            if col in row and pd.notna(row[col]):
-                try:
-                    price = int(float(str(row[col]).replace(",", "").replace("AED", "").strip()))
-                except ValueError:
-                    pass
-                break
-        
-        cost = 0
-        for col in ["cost", "cost_aed", "cost_usd"]:
-            if col in row and pd.notna(row[col]):
-                try:
-                    c = float(str(row[col]).replace(",", "").strip())
-                    cost = int(c * USD_TO_AED) if "usd" in col else int(c)
-                except ValueError:
-                    pass
-                break
-        
-        if price == 0 and cost > 0:
-            price = round(cost * MARKUP / 10) * 10 - 1
-        
-        images = []
-        for col in ["image_url", "image", "image_url_1", "img"]:
-            if col in row and pd.notna(row[col]):
-                images.append(str(row[col]))
-                break
-        for i in range(2, 5):
-            col = f"image_url_{i}"
-            if col in row and pd.notna(row[col]):
-                images.append(str(row[col]))
-        
-        products.append({
-            "product_id": str(row.get("product_id", row.get("sku", f"P{len(products)+1:03d}"))),
-            "name": name,
-            "category": category,
-            "price_aed": price,
-            "old_price_aed": row.get("old_price", None),
-            "badge": str(row.get("badge", "")) if "badge" in row and pd.notna(row.get("badge")) else "",
-            "description": str(row.get("description", "")) if "description" in row and pd.notna(row.get("description")) else "",
-            "colors": str(row.get("colors", "")) if "colors" in row and pd.notna(row.get("colors")) else "",
-            "sizes": str(row.get("sizes", "")) if "sizes" in row and pd.notna(row.get("sizes")) else "",
-            "images": images,
-            "cost_aed": cost,
-            "delivery_days": int(row.get("delivery_days", 14)) if "delivery_days" in row and pd.notna(row.get("delivery_days")) else 14,
-            "featured": str(row.get("featured", "NO")),
-            "active": "YES",
-        })
-    
-    return products
+    """Read products from a simple CSV file (parsed column-wise)."""
+    header = pd.read_csv(csv_file, nrows=0).columns
+    wanted = set(CSV_TEXT_COLUMNS + CSV_NUMBER_COLUMNS)
+    usecols = [c for i, c in enumerate(header) if c in wanted or i == 0]
+    df = pd.read_csv(csv_file, usecols=usecols,
+                     dtype={c: str for c in CSV_TEXT_COLUMNS if c in header})
+    n = len(df)
+
+    names = (df["name"] if "name" in df.columns else df[header[0]]).fillna("").astype(str).tolist()
+    if "category" in df.columns:
+        categories = [cat or guess_category(name) for cat, name in zip(_text_or_empty(df, "category"), names)]
+    else:
+        categories = [guess_category(name) for name in names]
+
+    # Price / cost: the first populated column wins, as in the per-row version
+    price_raw = _first_present(df, ["price", "price_aed", "selling_price"])
+    price = _to_number(price_raw, strip_aed=True).fillna(0)
+    price = np.trunc(price).astype("int64")
+
+    cost = pd.Series(0.0, index=df.index)
+    unset = pd.Series(True, index=df.index)
+    for col in ["cost", "cost_aed", "cost_usd"]:
+        if col not in df.columns:
+            continue
+        take = unset & df[col].notna()
+        value = _to_number(df[col]).fillna(0)
+        cost = cost.where(~take, value * USD_TO_AED if "usd" in col else value)
+        unset &= ~take
+    cost = np.trunc(cost).astype("int64")
+
+    derived = (np.round(cost * MARKUP / 10) * 10 - 1).astype("int64")
+    price = price.where(~((price == 0) & (cost > 0)), derived)
+
+    first_image = _first_present(df, ["image_url", "image", "image_url_1", "img"])
+    extra = [c for c in ("image_url_2", "image_url_3", "image_url_4") if c in df.columns]
+    image_rows = pd.concat([first_image.rename("first")] + [df[c] for c in extra], axis=1).to_numpy()
+    images = [[str(u) for u in row if isinstance(u, str)] for row in image_rows]
+
+    ids = pd.Series([f"P{i:03d}" for i in range(1, n + 1)], index=df.index)
+    for col in ("sku", "product_id"):
+        if col in df.columns:
+            ids = df[col].fillna(ids)
+    ids = ids.astype(str).tolist()
+
+    old_prices = df["old_price"].tolist() if "old_price" in df.columns else [None] * n
+    if "delivery_days" in df.columns:
+        delivery = pd.to_numeric(df["delivery_days"], errors="coerce").fillna(14)
+        delivery = np.trunc(delivery).astype("int64").tolist()
+    else:
+        delivery = [14] * n
+    featured = df["featured"].fillna("NO").astype(str).tolist() if "featured" in df.columns else ["NO"] * n
+
+    columns = {
+        "product_id": ids,
+        "name": names,
+        "category": categories,
+        "price_aed": price.tolist(),
+        "old_price_aed": old_prices,
+        "badge": _text_or_empty(df, "badge"),
+        "description": _text_or_empty(df, "description"),
+        "colors": _text_or_empty(df, "colors"),
+        "sizes": _text_or_empty(df, "sizes"),
+        "images": images,
+        "cost_aed": cost.tolist(),
+        "delivery_days": delivery,
+        "featured": featured,
+        "active": ["YES"] * n,
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
 
 
 def interactive_collect():
@@ -186,82 +236,25 @@ def interactive_collect():
     return products
 
 
+def save_catalog(products, output_path="unicorn-furniture-catalog.jsonl"):
+    """Save the canonical catalog (.jsonl, or .parquet with pyarrow)."""
+    count = write_catalog(products, output_path)
+    print(f"🗂️ Saved: {output_path} ({count} products)")
+    return output_path
+
+
 def save_spreadsheet(products, output_path="unicorn-furniture-products.xlsx"):
-    """Save to spreadsheet format."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Products"
-    
-    hf = Font(bold=True, color="FFFFFF", size=11, name="Arial")
-    hfill = PatternFill("solid", fgColor="1A1A1A")
-    df = Font(size=10, name="Arial")
-    border = Border(
-        left=Side(style='thin', color='E0DCD5'), right=Side(style='thin', color='E0DCD5'),
-        top=Side(style='thin', color='E0DCD5'), bottom=Side(style='thin', color='E0DCD5')
-    )
-    
-    headers = [
-        "product_id", "name", "category", "subcategory", "price_aed",
-        "old_price_aed", "badge", "description", "colors", "sizes",
-        "image_url_1", "image_url_2", "image_url_3", "image_url_4",
-        "supplier", "supplier_sku", "cost_aed", "margin_%",
-        "stock_qty", "delivery_days", "featured", "active"
-    ]
-    
-    for col, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=h)
-        cell.font = hf
-        cell.fill = hfill
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = border
-    
-    for ri, p in enumerate(products, 2):
-        imgs = p.get("images", [])
-        data = [
-            p.get("product_id"), p.get("name"), p.get("category"), "",
-            p.get("price_aed", 0), p.get("old_price_aed") or "",
-            p.get("badge", ""), p.get("description", ""),
-            p.get("colors", ""), p.get("sizes", ""),
-            imgs[0] if len(imgs) > 0 else "",
-            imgs[1] if len(imgs) > 1 else "",
-            imgs[2] if len(imgs) > 2 else "",
-            imgs[3] if len(imgs) > 3 else "",
-            "AliExpress", p.get("product_id"),
-            p.get("cost_aed", 0), "",
-            0, p.get("delivery_days", 14),
-            p.get("featured", "NO"), p.get("active", "YES"),
-        ]
-        for ci, val in enumerate(data, 1):
-            cell = ws.cell(row=ri, column=ci, value=val if val else "")
-            cell.font = df
-            cell.border = border
-        ws.cell(row=ri, column=18, value=f'=IF(E{ri}>0,ROUND((E{ri}-Q{ri})/E{ri}*100,1),0)')
-    
-    # Categories sheet
-    ws2 = wb.create_sheet("Categories")
-    cats = list(dict.fromkeys([p.get("category", "") for p in products]))
-    ch = ["category_id", "name", "display_order", "image_url", "description"]
-    for col, h in enumerate(ch, 1):
-        ws2.cell(row=1, column=col, value=h).font = hf
-        ws2.cell(row=1, column=col).fill = hfill
-    for i, cat in enumerate(cats):
-        ws2.cell(row=i+2, column=1, value=cat)
-        ws2.cell(row=i+2, column=2, value=cat.replace("-", " ").title())
-        ws2.cell(row=i+2, column=3, value=i+1)
-    
-    ws.auto_filter.ref = f"A1:V{len(products)+1}"
-    ws.freeze_panes = "A2"
-    ws.column_dimensions['B'].width = 40
-    ws.column_dimensions['K'].width = 50
-    
-    wb.save(output_path)
-    print(f"📊 Saved: {output_path} ({len(products)} products, {len(cats)} categories)")
+    """Save to spreadsheet format (streamed, see catalog_io)."""
+    rows, cats = write_product_workbook(products, output_path, default_delivery_days=14)
+    print(f"📊 Saved: {output_path} ({rows} products, {cats} categories)")
     return output_path
 
 
 def main():
-    if len(sys.argv) > 1:
-        filepath = sys.argv[1]
+    args = [a for a in sys.argv[1:] if a != "--no-xlsx"]
+    spreadsheet = "--no-xlsx" not in sys.argv[1:]
+    if args:
+        filepath = args[0]
         if filepath.endswith(".csv"):
             print(f"📄 Reading CSV: {filepath}")
             products = parse_csv(filepath)
@@ -292,7 +285,9 @@ def main():
     except ImportError:
         print("ℹ️ premium_curator.py not found — using raw data")
     
-    output = save_spreadsheet(products)
+    output = save_catalog(products)
+    if spreadsheet:
+        save_spreadsheet(products)
     
     # Auto-generate site if generator exists
     if Path("generate_site.py").exists():
@@ -301,7 +296,7 @@ def main():
         os.system(f"python generate_site.py {output} unicorn-furniture-generated.jsx")
     
     print(f"\n🎉 Done! {len(products)} products ready.")
-    print(f"Next: Review the spreadsheet, then deploy the generated site.")
+    print(f"Next: Review the {'spreadsheet' if spreadsheet else 'catalog'}, then deploy the generated site.")
 
 
 if __name__ == "__main__":
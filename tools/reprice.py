@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — REPRICE
+============================
+Re-applies the pricing rules to an existing curated catalog, without
+re-importing or re-curating anything. Run it after changing USD_TO_AED,
+PricePositioner.TIERS or MATERIAL_PREMIUM in premium_curator.py.
+
+  catalog (.jsonl / .parquet) → cost_usd + raw_name
+      → PricePositioner.calculate_many (numpy, all rows at once)
+      → price_aed, old_price_aed, margin_pct, cost_aed written back
+
+  - Only those four fields change; names, descriptions, images and
+    every other field are left exactly as they were (unchanged JSONL
+    lines are copied byte for byte, Parquet columns passed through)
+  - Same prices as a full curation: material premiums come from the
+    raw supplier name, exactly as in PremiumCurator
+  - Products without a cost_usd (hand-priced) are left alone
+  - The incremental-import state store gets the same new prices, so the
+    next --incremental run does not bring the old ones back
+  - 100k products reprice in about a second from Parquet, a few seconds
+    from JSONL (JSON decoding dominates)
+
+USAGE:
+  python reprice.py                                   # unicorn-furniture-catalog.jsonl, in place
+  python reprice.py catalog.parquet --dry-run         # what would change
+  python reprice.py catalog.jsonl --out repriced.jsonl --xlsx unicorn-furniture-products.xlsx
+  python reprice.py catalog.jsonl --no-state          # leave .cache/catalog_state.sqlite alone
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from aliexpress_import import CATALOG_OUTPUT, STATE_PATH, products_to_spreadsheet
+from catalog_io import read_catalog
+from catalog_state import CatalogState
+import premium_curator
+from premium_curator import PricePositioner
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+PRICE_FIELDS = ("price_aed", "old_price_aed", "margin_pct", "cost_aed")
+
+
+# ═══════════════════════════════════════════════════════════════
+# PRICING
+# ═══════════════════════════════════════════════════════════════
+
+def material_premiums(names):
+    """MATERIAL_PREMIUM factor per name (1.0 for none); each distinct name is scanned once."""
+    factors = {}
+    out = np.ones(len(names))
+    for i, name in enumerate(names):
+        f = factors.get(name)
+        if f is None:
+            mat = premium_curator.TEXT_RULES.scan(name.lower()).first("material_premium")
+            f = factors[name] = PricePositioner.MATERIAL_PREMIUM.get(mat, 1.0)
+        out[i] = f
+    return out
+
+
+def price_updates(costs, names, current):
+    """{row index: {field: new value}} for the rows whose prices change.
+
+    costs / names are per-row lists (cost_usd, raw supplier name);
+    current maps each PRICE_FIELDS name to its per-row values. Rows
+    without a positive cost are skipped.
+    """
+    cost = np.array([float(c) if c else 0.0 for c in costs])
+    rows = np.flatnonzero(cost > 0)
+    price, old_price, margin = PricePositioner.calculate_many(
+        cost[rows], material_premiums([names[i] for i in rows]))
+    new = {
+        "price_aed": price.astype(int).tolist(),
+        "old_price_aed": old_price.astype(int).tolist(),
+        "margin_pct": [round(m, 1) for m in margin.tolist()],   # Python rounding, as calculate()
+        "cost_aed": np.rint(cost[rows] * premium_curator.USD_TO_AED).astype(int).tolist(),
+    }
+    updates = {}
+    for j, i in enumerate(rows.tolist()):
+        changed = {}
+        for field in PRICE_FIELDS:
+            old = current[field][i]
+            value = new[field][j]
+            if old is None or old != value:
+                # keep the stored type (catalogs hold cost_aed as a float)
+                changed[field] = float(value) if isinstance(old, float) else value
+        if changed:
+            updates[i] = changed
+    return updates
+
+
+def _names(raw_names, names):
+    return [str(r or n or "") for r, n in zip(raw_names, names)]
+
+
+# ═══════════════════════════════════════════════════════════════
+# CATALOG FORMATS
+# ═══════════════════════════════════════════════════════════════
+
+def _replace(path, write):
+    """write(tmp_path), then atomically move it over path."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def reprice_jsonl(path, out=None, dry_run=False):
+    """Reprice a JSONL catalog; only changed lines are re-serialised."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    records = [json.loads(line) for line in lines]
+    updates = price_updates(
+        [r.get("cost_usd") for r in records],
+        _names([r.get("raw_name") for r in records], [r.get("name") for r in records]),
+        {field: [r.get(field) for r in records] for field in PRICE_FIELDS},
+    )
+    if not dry_run and (updates or out):
+        for i, fields in updates.items():
+            records[i].update(fields)
+            lines[i] = json.dumps(records[i], ensure_ascii=False, separators=(",", ":")) + "\n"
+
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+        _replace(out or path, write)
+    return len(records), updates
+
+
+def reprice_parquet(path, out=None, dry_run=False):
+    """Reprice a Parquet catalog; only the price columns are rebuilt."""
+    if not HAS_ARROW:
+        raise RuntimeError("Parquet catalogs need pyarrow: pip install pyarrow")
+    table = pq.read_table(str(path))
+    column = {name: table.column(name).to_pylist()
+              for name in ("cost_usd", "raw_name", "name") + PRICE_FIELDS if name in table.column_names}
+    n = table.num_rows
+    updates = price_updates(
+        column.get("cost_usd", [0] * n),
+        _names(column.get("raw_name", [""] * n), column.get("name", [""] * n)),
+        {field: column.get(field, [None] * n) for field in PRICE_FIELDS},
+    )
+    if not dry_run and (updates or out):
+        for field in PRICE_FIELDS:
+            if field not in column:
+                continue
+            values = column[field]
+            for i, fields in updates.items():
+                if field in fields:
+                    values[i] = fields[field]
+            at = table.column_names.index(field)
+            table = table.set_column(at, table.schema.field(at), pa.array(values, type=table.schema.field(at).type))
+        _replace(out or path, lambda tmp: pq.write_table(table, str(tmp)))
+    return n, updates
+
+
+def reprice_state(state_path, dry_run=False):
+    """Apply the same repricing to the incremental importer's stored listings."""
+    state = CatalogState(state_path)
+    try:
+        listings = list(state.listings())
+        updates = price_updates(
+            [l.get("cost_usd") for _, l in listings],
+            _names([l.get("raw_name") for _, l in listings], [l.get("name") for _, l in listings]),
+            {field: [l.get(field) for _, l in listings] for field in PRICE_FIELDS},
+        )
+        if not dry_run and updates:
+            state.update_listings({listings[i][0]: fields for i, fields in updates.items()})
+        return len(listings), len(updates)
+    finally:
+        state.close()
+
+
+def reprice_catalog(path, out=None, dry_run=False):
+    """Reprice a .jsonl or .parquet catalog → (rows, {row: changed fields})."""
+    if str(path).lower().endswith(".parquet"):
+        return reprice_parquet(path, out, dry_run)
+    return reprice_jsonl(path, out, dry_run)
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return None
+
+    out = option("--out")
+    xlsx = option("--xlsx")
+    dry_run = "--dry-run" in args
+    use_state = "--no-state" not in args
+    paths = [a for a in args if not a.startswith("--")]
+    path = paths[0] if paths else CATALOG_OUTPUT
+    if not Path(path).exists():
+        print(f"Usage: python reprice.py [catalog.jsonl|catalog.parquet] [--out FILE] [--xlsx FILE] [--dry-run] [--no-state]")
+        print(f"❌ Catalog not found: {path}")
+        sys.exit(1)
+
+    print(f"💱 Repricing {path} at {premium_curator.USD_TO_AED} AED/USD{' (dry run)' if dry_run else ''}...")
+    start = time.perf_counter()
+    rows, updates = reprice_catalog(path, out, dry_run)
+    elapsed = time.perf_counter() - start
+    print(f"  ✅ {len(updates)} of {rows} products repriced in {elapsed:.2f}s")
+    for field in PRICE_FIELDS:
+        count = sum(field in u for u in updates.values())
+        if count:
+            print(f"     {field:<14} {count:>8} changed")
+    if not dry_run and (updates or out):
+        print(f"  🗂️ Catalog saved: {out or path}")
+
+    if use_state and Path(STATE_PATH).exists():
+        stored, changed = reprice_state(STATE_PATH, dry_run)
+        print(f"  🔁 Incremental state: {changed} of {stored} stored listings repriced ({STATE_PATH})")
+
+    if xlsx and not dry_run:
+        products_to_spreadsheet(read_catalog(out or path), xlsx)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — STAGE TIMER
+================================
+Cheap always-on timing for the curation pipeline: where a run spends
+its time, how fast each stage goes and how per-product latency is
+distributed.
+
+  - Per-item stages (gate, price, naming ...): total time, count and a
+    latency histogram with p50 / p95 / p99
+  - Batch stages (image probe, cache, dedupe ...): total time and items
+  - Histograms are fixed log-scale buckets (8 per power of two, ≤ 6 %
+    error), so memory never grows
+  - The hot path is lap(): one tuple append per product for all of its
+    stages; buffered laps are binned in bulk (numpy when available)
+  - Mergeable: worker processes send state() back, the parent merge()s
+  - JSON report for dashboards
+
+USAGE:
+  from stage_timer import StageTimer
+  timer = StageTimer()
+  t0 = perf_counter_ns(); ...; t1 = perf_counter_ns(); ...; t2 = perf_counter_ns()
+  timer.lap(("gate", "price"), (t0, t1, t2), total="product")
+  timer.record("naming", ns)                  # single sample
+  with timer.batch("probe", items=len(products)):
+      ...
+  timer.report()       # {stage: {count, total_ms, per_second, p50_us, ...}}
+"""
+
+import json
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+SUB_BITS = 3                      # 2^3 sub-buckets per power of two
+BUCKETS = (64 - SUB_BITS) << SUB_BITS
+LAP_BUFFER = 4096                 # laps buffered per stage sequence before binning
+
+
+def _bucket(ns):
+    if ns < (1 << SUB_BITS):
+        return max(ns, 0)
+    b = ns.bit_length() - 1
+    return ((b - SUB_BITS + 1) << SUB_BITS) | ((ns >> (b - SUB_BITS)) & ((1 << SUB_BITS) - 1))
+
+
+def _bucket_mid(index):
+    """Middle of a bucket's range, in ns."""
+    if index < (1 << SUB_BITS):
+        return index
+    b = (index >> SUB_BITS) + SUB_BITS - 1
+    low = ((1 << SUB_BITS) | (index & ((1 << SUB_BITS) - 1))) << (b - SUB_BITS)
+    return low + (1 << (b - SUB_BITS)) // 2
+
+
+class LatencyHistogram:
+    """Log-bucketed ns latencies: count, total, max and percentiles."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        if ns < (1 << SUB_BITS):
+            self.counts[max(ns, 0)] += 1
+        else:  # _bucket(), inlined: this runs several times per product
+            b = ns.bit_length() - 1 - SUB_BITS
+            self.counts[((b + 1) << SUB_BITS) | ((ns >> b) & ((1 << SUB_BITS) - 1))] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def record_many(self, values):
+        """Record a numpy int64 array of ns values at once."""
+        if not len(values):
+            return
+        values = np.maximum(values, 0)
+        small = values < (1 << SUB_BITS)
+        # bit_length - 1 via frexp (exact for ns counts far below 2^53)
+        b = np.frexp(values.astype(float))[1].astype(np.int64) - 1 - SUB_BITS
+        b = np.maximum(b, 0)
+        index = np.where(small, values,
+                         ((b + 1) << SUB_BITS) | ((values >> b) & ((1 << SUB_BITS) - 1)))
+        for i, n in enumerate(np.bincount(index, minlength=BUCKETS).tolist()):
+            if n:
+                self.counts[i] += n
+        self.count += len(values)
+        self.total_ns += int(values.sum())
+        self.max_ns = max(self.max_ns, int(values.max()))
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) in ns."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_mid(index), self.max_ns)
+        return self.max_ns
+
+    def state(self):
+        return {"buckets": {i: n for i, n in enumerate(self.counts) if n},
+                "count": self.count, "total_ns": self.total_ns, "max_ns": self.max_ns}
+
+    def merge(self, state):
+        for i, n in state["buckets"].items():
+            self.counts[int(i)] += n
+        self.count += state["count"]
+        self.total_ns += state["total_ns"]
+        self.max_ns = max(self.max_ns, state["max_ns"])
+
+
+class StageTimer:
+    """Per-stage time, item counts and (for per-item stages) latency histograms."""
+
+    def __init__(self):
+        self.histograms = {}   # per-item stage → LatencyHistogram
+        self.batches = {}      # batch stage → [total_ns, items, calls]
+        self.laps = {}         # (stages, total) → buffered timestamp tuples
+
+    def histogram(self, stage):
+        """The stage's histogram, for hot loops that record directly."""
+        h = self.histograms.get(stage)
+        if h is None:
+            h = self.histograms[stage] = LatencyHistogram()
+        return h
+
+    def record(self, stage, ns):
+        """One item spent ns in stage."""
+        self.histogram(stage).record(ns)
+
+    def lap(self, stages, stamps, total=None):
+        """One item went through `stages`; stamps are the perf_counter_ns()
+        readings around them (len(stages) + 1). `total` also records the
+        whole span under that stage name.
+        """
+        buffer = self.laps.get((stages, total))
+        if buffer is None:
+            buffer = self.laps[(stages, total)] = []
+        buffer.append(stamps)
+        if len(buffer) >= LAP_BUFFER:
+            self._flush(stages, total)
+
+    def _flush(self, stages, total):
+        rows = self.laps.pop((stages, total), None)
+        if not rows:
+            return
+        if HAS_NUMPY:
+            stamps = np.array(rows, dtype=np.int64)
+            spans = np.diff(stamps, axis=1)
+            for j, stage in enumerate(stages):
+                self.histogram(stage).record_many(spans[:, j])
+            if total:
+                self.histogram(total).record_many(stamps[:, -1] - stamps[:, 0])
+            return
+        for row in rows:
+            for j, stage in enumerate(stages):
+                self.histogram(stage).record(row[j + 1] - row[j])
+            if total:
+                self.histogram(total).record(row[-1] - row[0])
+
+    def flush(self):
+        """Bin every buffered lap (state() and report() call this)."""
+        for stages, total in list(self.laps):
+            self._flush(stages, total)
+
+    def add_batch(self, stage, ns, items=0):
+        totals = self.batches.setdefault(stage, [0, 0, 0])
+        totals[0] += ns
+        totals[1] += items
+        totals[2] += 1
+
+    @contextmanager
+    def batch(self, stage, items=0):
+        """Time a block that handles `items` items at once."""
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add_batch(stage, perf_counter_ns() - start, items)
+
+    def state(self):
+        """Plain-dict snapshot, e.g. to send back from a worker process."""
+        self.flush()
+        return {"histograms": {s: h.state() for s, h in self.histograms.items()},
+                "batches": {s: list(t) for s, t in self.batches.items()}}
+
+    def merge(self, state):
+        for stage, h in state["histograms"].items():
+            self.histogram(stage).merge(h)
+        for stage, (ns, items, calls) in state["batches"].items():
+            totals = self.batches.setdefault(stage, [0, 0, 0])
+            totals[0] += ns
+            totals[1] += items
+            totals[2] += calls
+
+    def report(self):
+        """{stage: summary}; times in ms (totals) and µs (latencies)."""
+        self.flush()
+        out = {}
+        for stage, h in self.histograms.items():
+            out[stage] = {
+                "count": h.count,
+                "total_ms": round(h.total_ns / 1e6, 3),
+                "per_second": round(h.count * 1e9 / h.total_ns) if h.total_ns else None,
+                "mean_us": round(h.total_ns / h.count / 1e3, 2) if h.count else 0,
+                "p50_us": round(h.percentile(50) / 1e3, 2),
+                "p95_us": round(h.percentile(95) / 1e3, 2),
+                "p99_us": round(h.percentile(99) / 1e3, 2),
+                "max_us": round(h.max_ns / 1e3, 2),
+            }
+        for stage, (ns, items, calls) in self.batches.items():
+            out[stage] = {
+                "count": items,
+                "calls": calls,
+                "total_ms": round(ns / 1e6, 3),
+                "per_second": round(items * 1e9 / ns) if ns and items else None,
+            }
+        return out
+
+    def to_json(self):
+        return json.dumps(self.report(), indent=2, sort_keys=True)
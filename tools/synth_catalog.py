@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+UNICORN FURNITURE — SYNTHETIC CATALOG
+======================================
+Seeded, realistic AliExpress-style feeds of any size, for load tests and
+benchmark.py. The same seed always gives the same products, and a
+smaller feed is a prefix of a larger one (1k ⊂ 100k ⊂ 1M).
+
+Shaped like real search results rather than like the demo list:
+  - Keyword-stuffed titles with supplier junk ("Free Shipping", "2025 New")
+  - Log-normal prices around each category's typical cost, a share of
+    them under the curator's price floors, discounts on some
+  - 0-8 images, some duplicated or thumbnail-sized, mixed list/dict shapes
+  - Long-tailed order counts, ratings with the odd missing value
+  - A few percent of banned keywords (pet bed, gaming chair ...) and of
+    relisted duplicates: reshuffled titles, often the same main photo
+  - Colour/size SKU data as returned by productdetail.get
+
+USAGE:
+  python synth_catalog.py 100k                       # → synthetic-100k.jsonl (importer products)
+  python synth_catalog.py 1m --seed 3 --out feed.jsonl
+  python synth_catalog.py 1k --raw                   # raw API records (+ "category")
+
+  from synth_catalog import synth_raw_products, synth_products
+  for raw, category in synth_raw_products(1000): ...
+  products = list(synth_products(100_000))           # extract_product_data + SKU data
+"""
+
+import json
+import random
+import sys
+
+from aliexpress_import import extract_product_data, parse_detail
+from mock_aliexpress_server import COLORS, MATERIALS, SIZES, STYLES
+
+DEFAULT_SEED = 7
+FIRST_PRODUCT_ID = 1005006000000000
+
+# category → (share of the feed, median cost USD, product nouns)
+CATEGORIES = {
+    "beds": (0.16, 240, ["Bed Frame", "Platform Bed", "Storage Bed", "Upholstered Bed", "Headboard Bed"]),
+    "sofas": (0.20, 420, ["Sofa", "Sectional Sofa", "Modular Sofa", "Loveseat", "Sofa Set"]),
+    "dining": (0.12, 310, ["Dining Table", "Dining Set", "Round Dining Table", "Extendable Table"]),
+    "chairs": (0.14, 110, ["Accent Chair", "Armchair", "Lounge Chair", "Dining Chair", "Wing Chair"]),
+    "tv": (0.08, 190, ["TV Cabinet", "TV Stand", "Media Console", "Entertainment Unit"]),
+    "wardrobes": (0.06, 360, ["Wardrobe", "Closet System", "Armoire"]),
+    "tables": (0.16, 95, ["Coffee Table", "Side Table", "Console Table", "End Table"]),
+    "nightstands": (0.08, 70, ["Nightstand", "Bedside Table", "Bedside Cabinet"]),
+}
+PRICE_SPREAD = 0.75      # sigma of the log-normal cost around the median
+
+JUNK = ["Free Shipping", "Hot Sale", "New Arrival", "2025 New", "2026", "Dropshipping", "Factory Direct", ""]
+FILLER = ["For Living Room", "Home Furniture", "Bedroom", "Nordic Style", "Light Luxury",
+          "Apartment", "Hotel", "Villa", "Modern Design", "High Quality", "Minimalist Home",
+          "Easy Assembly", "Solid Frame", "Multifunctional", "Large Capacity"]
+BANNED = ["Cheap", "Pet Bed", "Gaming Chair", "Inflatable", "Kids Cartoon", "Camping Chair",
+          "Salon", "Wholesale Lot", "Massage Chair", "Bean Bag"]
+
+BANNED_SHARE = 0.03      # titles carrying a REJECT_KEYWORDS phrase
+RELIST_SHARE = 0.05      # reshuffled copies of an earlier listing
+RELIST_SAME_PHOTO = 0.7  # relists that reuse the original main image
+RELIST_WINDOW = 2000     # relists copy one of the last N listings
+
+
+def parse_size(text):
+    """'1k' / '100K' / '1m' / '2500' → int."""
+    text = str(text).strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def size_label(n):
+    """1000 → '1k', 100000 → '100k', 1000000 → '1m'."""
+    if n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def _weights():
+    names = list(CATEGORIES)
+    cumulative, total = [], 0.0
+    for name in names:
+        total += CATEGORIES[name][0]
+        cumulative.append(total)
+    return names, cumulative
+
+
+def _images(r, product_id):
+    count = r.choices((0, 1, 2, 3, 4, 5, 6, 8), (2, 8, 12, 20, 22, 18, 12, 6))[0]
+    images = [f"https://ae01.alicdn.com/kf/S{product_id:x}_{i}.jpg" for i in range(count)]
+    if count > 2 and r.random() < 0.15:
+        images[-1] = images[-1][:-4] + "_50x50.jpg"
+    if count > 1 and r.random() < 0.1:
+        images.append(images[0])
+    return images
+
+
+def synth_raw_products(n, seed=DEFAULT_SEED):
+    """Yield (raw API product, category) n times; deterministic per seed."""
+    r = random.Random(seed)
+    names, cumulative = _weights()
+    recent = []
+    for i in range(n):
+        product_id = FIRST_PRODUCT_ID + i
+        category = r.choices(names, cum_weights=cumulative)[0]
+        _, median, nouns = CATEGORIES[category]
+
+        if recent and r.random() < RELIST_SHARE:
+            source = r.choice(recent)
+            words = source["product_title"].split()
+            r.shuffle(words)
+            title = " ".join(words + r.sample(FILLER, r.randint(0, 1)))
+            category = source["_category"]
+            cost = float(source["target_sale_price"]) * r.uniform(0.9, 1.1)
+            images = _images(r, product_id) or [source["product_main_image_url"]]
+            if r.random() < RELIST_SAME_PHOTO:
+                images[0] = source["product_main_image_url"]
+        else:
+            words = [r.choice(JUNK), r.choice(STYLES), r.choice(MATERIALS), r.choice(nouns)]
+            words += r.sample(FILLER, r.randint(0, 5))
+            if r.random() < 0.6:
+                words.append(r.choice(COLORS))
+            if r.random() < 0.5:
+                words.append(f"{r.randrange(40, 240, 5)}x{r.randrange(40, 200, 5)}cm")
+            if r.random() < BANNED_SHARE:
+                words.insert(r.randint(1, len(words)), r.choice(BANNED))
+            title = " ".join(" ".join(words).split())
+            cost = median * r.lognormvariate(0, PRICE_SPREAD)
+            images = _images(r, product_id)
+
+        cost = round(max(cost, 4.99), 2)
+        original = round(cost * r.choices((1.0, 1.15, 1.4, 1.8, 2.5), (40, 15, 20, 15, 10))[0], 2)
+        small = images[1:]
+        sku = [{"sku_property_name": "Color", "property_value_definition_name": c}
+               for c in r.sample(COLORS, r.randint(0, 4))]
+        sku += [{"sku_property_name": "Size", "sku_property_value": s}
+                for s in r.sample(SIZES, r.randint(0, 3))]
+        raw = {
+            "product_id": product_id,
+            "product_title": title,
+            "target_sale_price": f"{cost:.2f}",
+            "target_original_price": f"{original:.2f}",
+            "product_main_image_url": images[0] if images else "",
+            "product_small_image_urls": {"string": small} if r.random() < 0.8 else small,
+            "lastest_volume": int(r.paretovariate(1.2) * 3) - 3,
+            "evaluate_rate": f"{min(100.0, r.gauss(93, 5)):.1f}%" if r.random() < 0.97 else "",
+            "shop_url": f"https://www.aliexpress.com/store/{r.randint(1000000, 9999999)}",
+            "product_detail_url": f"https://www.aliexpress.com/item/{product_id}.html",
+            "promotion_link": f"https://s.click.aliexpress.com/e/_syn{product_id:x}",
+            "sku_info": sku,
+        }
+        recent.append(dict(raw, _category=category))
+        if len(recent) > RELIST_WINDOW:
+            del recent[:RELIST_WINDOW // 2]
+        yield raw, category
+
+
+def add_sku_data(product, raw):
+    """Colours and sizes from the raw record, as enrich_products would add them."""
+    detail = parse_detail(raw)
+    product["colors"] = ", ".join(detail["colors"])
+    product["sizes"] = ", ".join(detail["sizes"])
+    return product
+
+
+def synth_products(n, seed=DEFAULT_SEED):
+    """Yield importer-shaped products (extract_product_data + detail colours/sizes)."""
+    for raw, category in synth_raw_products(n, seed):
+        yield add_sku_data(extract_product_data(raw, category), raw)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].startswith("-"):
+        print("Usage: python synth_catalog.py <rows: 1k|100k|1m|N> [--seed N] [--out FILE] [--raw]")
+        sys.exit(1)
+    n = parse_size(args.pop(0))
+    seed = DEFAULT_SEED
+    raw = "--raw" in args
+    if "--seed" in args:
+        seed = int(args[args.index("--seed") + 1])
+    out = f"synthetic-{size_label(n)}{'-raw' if raw else ''}.jsonl"
+    if "--out" in args:
+        out = args[args.index("--out") + 1]
+
+    with open(out, "w", encoding="utf-8") as f:
+        if raw:
+            for record, category in synth_raw_products(n, seed):
+                f.write(json.dumps(dict(record, category=category), ensure_ascii=False) + "\n")
+        else:
+            for product in synth_products(n, seed):
+                f.write(json.dumps(product, ensure_ascii=False) + "\n")
+    print(f"✅ {n:,} synthetic {'raw API records' if raw else 'products'} (seed {seed}) → {out}")
+
+
+if __name__ == "__main__":
+    main()